@@ -0,0 +1,68 @@
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.base import create_sqlite_engine
+from models.goods import Goods
+from models.migrations import migrate
+import models.stock  # noqa: F401
+import models.stock_in  # noqa: F401
+import models.stock_out  # noqa: F401
+import models.stock_flow  # noqa: F401
+import models.stock_daily_agg  # noqa: F401
+import models.stock_snapshot  # noqa: F401
+import models.import_checkpoint  # noqa: F401
+import models.goods_stock_total  # noqa: F401
+import models.user  # noqa: F401
+
+
+@contextmanager
+def temp_database() -> Iterator[Engine]:
+    """在临时目录中创建一个全新的 SQLite 数据库（使用正式的连接参数），结束后自动删除。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(Path(tmp) / "bench.db")
+        migrate(engine)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
+
+
+def seed_goods(engine: Engine, count: int, batch_size: int = 10_000) -> None:
+    """批量写入 count 条测试商品，编码为 G0000001 形式。"""
+    with Session(engine) as session:
+        for start in range(0, count, batch_size):
+            session.execute(
+                insert(Goods),
+                [
+                    {
+                        "code": f"G{i:07d}",
+                        "name": f"测试商品{i}",
+                        "category": f"分类{i % 50}",
+                        "spec": f"{i % 20 + 1}kg",
+                        "unit": "件",
+                        "min_stock": 10,
+                        "is_active": True,
+                    }
+                    for i in range(start + 1, min(start + batch_size, count) + 1)
+                ],
+            )
+        session.commit()
+
+
+class Timer:
+    """简单计时器：with Timer() as t: ...; t.elapsed。"""
+
+    def __enter__(self) -> "Timer":
+        self._start = perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = perf_counter() - self._start
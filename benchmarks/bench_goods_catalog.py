@@ -0,0 +1,68 @@
+"""商品目录缓存基准：对比每单都查库解析编码与经 GoodsCatalog 解析（首轮含未命中加载），并估算缓存内存占用。
+
+用法：python -m benchmarks.bench_goods_catalog [--sizes 10000 100000 1000000] [--lines 500]
+"""
+
+import argparse
+import random
+import tracemalloc
+
+from sqlalchemy.orm import Session
+
+from services.goods_catalog import GoodsCatalog
+from services.goods_service import GoodsService
+from ._common import Timer, seed_goods, temp_database
+
+ORDERS = 50
+
+
+def _orders(size: int, lines: int) -> list[list[str]]:
+    rng = random.Random(0)
+    # 模拟一个班次内反复出现的常用商品：编码从前 5% 的商品中抽取
+    hot = max(lines, size // 20)
+    return [[f"G{rng.randint(1, hot):07d}" for _ in range(lines)] for _ in range(ORDERS)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lines", type=int, default=500, help="每单明细行数")
+    args = parser.parse_args()
+
+    print(
+        f"{'商品数':>10} {'查库(ms/单)':>12} {'首轮(ms/单)':>12} {'预热后(ms/单)':>14} {'命中率':>8} "
+        f"{'全量缓存(MB)':>12} {'字节/商品':>10}"
+    )
+    for size in args.sizes:
+        with temp_database() as engine:
+            seed_goods(engine, size)
+            orders = _orders(size, args.lines)
+            with Session(engine) as session:
+                with Timer() as direct:
+                    for codes in orders:
+                        GoodsService.resolve_codes(session, codes)
+                catalog = GoodsCatalog()
+                with Timer() as first:
+                    for codes in orders:
+                        catalog.resolve_codes(session, codes)
+                with Timer() as warm:
+                    for codes in orders:
+                        catalog.resolve_codes(session, codes)
+                stats = catalog.stats()
+
+                # 全部商品装入缓存后的内存占用
+                full = GoodsCatalog()
+                tracemalloc.start()
+                full.get_many(session, range(1, size + 1))
+                memory, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        print(
+            f"{size:>10} {direct.elapsed * 1000 / ORDERS:>12.2f} "
+            f"{first.elapsed * 1000 / ORDERS:>12.2f} {warm.elapsed * 1000 / ORDERS:>14.2f} "
+            f"{stats.hit_rate:>8.1%} "
+            f"{memory / 1024 / 1024:>12.1f} {memory / size:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
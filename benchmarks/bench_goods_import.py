@@ -0,0 +1,71 @@
+"""商品批量导入基准：CSV 文件经 GoodsImportService 分批 upsert 写入 WAL 数据库的吞吐量。
+
+文件中一半编码已存在（走更新），一半为新编码（走插入）；另外对比逐条 GoodsService.create。
+目标：不低于 50,000 行/秒。
+
+用法：python -m benchmarks.bench_goods_import [--rows 80000] [--baseline 2000]
+"""
+
+import argparse
+import csv
+import tempfile
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from services.goods_import_service import GoodsImportService
+from services.goods_service import GoodsService
+from ._common import Timer, seed_goods, temp_database
+
+TARGET_ROWS_PER_SECOND = 50_000
+
+
+def _write_csv(path: Path, rows: int) -> None:
+    """编码 G0000001 起，前一半与 seed_goods 生成的商品重叠。"""
+    start = rows // 2
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["编码", "名称", "分类", "规格", "单位", "采购价", "销售价", "最低库存"])
+        for i in range(start + 1, start + rows + 1):
+            writer.writerow(
+                [f"G{i:07d}", f"导入商品{i}", f"分类{i % 50}", f"{i % 20 + 1}kg", "件", 1.5, 2.5, 10]
+            )
+
+
+def _baseline(rows: int) -> float:
+    """逐条 GoodsService.create 的行/秒。"""
+    with temp_database() as engine, Session(engine) as session:
+        with Timer() as timer:
+            for i in range(rows):
+                GoodsService.create(session, code=f"B{i:07d}", name=f"逐条商品{i}")
+            session.commit()
+    return rows / timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=80_000)
+    parser.add_argument("--baseline", type=int, default=2_000, help="逐条创建的行数，0 表示跳过")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "goods.csv"
+        _write_csv(path, args.rows)
+        with temp_database() as engine:
+            seed_goods(engine, args.rows)
+            with Timer() as timer, Session(engine) as session:
+                result = GoodsImportService.import_file(session, str(path))
+                session.commit()
+
+    rate = args.rows / timer.elapsed
+    print(
+        f"批量导入 {args.rows} 行（新增 {result.inserted}，更新 {result.updated}，"
+        f"错误 {len(result.errors)}）：{timer.elapsed:.2f} 秒，{rate:,.0f} 行/秒"
+    )
+    if args.baseline:
+        print(f"逐条 GoodsService.create：{_baseline(args.baseline):,.0f} 行/秒")
+    print(f"[{'达标' if rate >= TARGET_ROWS_PER_SECOND else '未达标'}] 目标 {TARGET_ROWS_PER_SECOND:,} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""商品关键字搜索基准：对比 LIKE '%kw%' 全表扫描与 goods_fts 全文索引。
+
+用法：python -m benchmarks.bench_goods_search [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+from statistics import mean
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.goods import Goods
+from services.goods_service import GoodsService
+from ._common import Timer, seed_goods, temp_database
+
+KEYWORDS = ["G000123", "商品4567", "20kg", "不存在的关键字"]
+REPEAT = 5
+
+
+def _like_list(session: Session, keyword: str, page_size: int = 50):
+    """改造前 GoodsService.list 的查询方式：LIKE 过滤，先 COUNT 再取一页。"""
+    kw = f"%{keyword}%"
+    cond = Goods.is_active.is_(True) & (Goods.code.like(kw) | Goods.name.like(kw))
+    total = session.scalar(select(func.count()).select_from(Goods).where(cond))
+    rows = session.execute(
+        select(Goods).where(cond).order_by(Goods.code).limit(page_size)
+    ).scalars().all()
+    return rows, total
+
+
+def _measure(fn, session: Session, keyword: str) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        with Timer() as timer:
+            fn(session, keyword)
+        timings.append(timer.elapsed)
+    return mean(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'商品数':>10} {'关键字':<12} {'LIKE(ms)':>10} {'FTS(ms)':>10} {'加速比':>8}")
+    for size in args.sizes:
+        with temp_database() as engine:
+            seed_goods(engine, size)
+            with Session(engine) as session:
+                for keyword in KEYWORDS:
+                    like_ms = _measure(_like_list, session, keyword)
+                    fts_ms = _measure(
+                        lambda s, kw: GoodsService.list(s, keyword=kw), session, keyword
+                    )
+                    print(
+                        f"{size:>10} {keyword:<12} {like_ms:>10.2f} {fts_ms:>10.2f} "
+                        f"{like_ms / fts_ms:>7.1f}x"
+                    )
+
+
+if __name__ == "__main__":
+    main()
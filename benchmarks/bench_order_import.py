@@ -0,0 +1,118 @@
+"""单据批量导入基准：入库单 / 出库单文件按单号分组、分批过账的吞吐量，并验证中断续导。
+
+入库文件中夹带少量错误单据（商品编码不存在、数量非法），导入到一半时模拟中断，
+再次导入同一文件应只处理剩余单据，且每张正确的单据恰好过账一次。
+
+用法：python -m benchmarks.bench_order_import [--orders 2000] [--lines 5]
+"""
+
+import argparse
+import csv
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.base import write_engine
+from models.stock_in import StockIn
+from models.stock_out import StockOut
+from services.import_readers import ImportCancelled
+from services.order_import_service import ORDER_BATCH_SIZE, OrderImportService
+from ._common import Timer, seed_goods, temp_database
+
+GOODS = 2_000
+# 每隔多少张单据放一张错误单据
+BAD_EVERY = 97
+
+
+def _write_orders(path: Path, prefix: str, orders: int, lines: int, with_errors: bool) -> int:
+    """写入导入文件，返回其中正确单据的张数。"""
+    good = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["单号", "日期", "供应商", "商品编码", "数量", "单价", "批次"])
+        for n in range(1, orders + 1):
+            bad = with_errors and n % BAD_EVERY == 0
+            good += not bad
+            for k in range(lines):
+                gid = (n * lines + k) % GOODS + 1
+                code = "NOPE" if bad and k == 0 else f"G{gid:07d}"
+                quantity = "-1" if bad and k == 1 else (10 if prefix == "IN" else 1)
+                writer.writerow(
+                    [f"{prefix}{n:07d}", "2024-06-01", "供应商A", code, quantity, 2.5, f"B{n % 5}"]
+                )
+    return good
+
+
+def _count(engine, model) -> int:
+    with Session(engine) as session:
+        return session.scalar(select(func.count()).select_from(model))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2_000)
+    parser.add_argument("--lines", type=int, default=5, help="每张单据的明细行数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, temp_database() as engine:
+        seed_goods(engine, GOODS)
+        factory = sessionmaker(bind=write_engine(engine))
+        in_path = Path(tmp) / "stock_in.csv"
+        out_path = Path(tmp) / "stock_out.csv"
+        expected_in = _write_orders(in_path, "IN", args.orders, args.lines, with_errors=True)
+        expected_out = _write_orders(out_path, "OUT", args.orders, args.lines, with_errors=False)
+
+        # 第 3 批提交后模拟中断
+        batches = 0
+
+        def crash(rows: int, total: int) -> None:
+            nonlocal batches
+            batches += 1
+            if batches == 3:
+                raise ImportCancelled()
+
+        with Timer() as first:
+            try:
+                OrderImportService.import_file(str(in_path), "stock_in", crash, session_factory=factory)
+            except ImportCancelled:
+                pass
+        interrupted_at = _count(engine, StockIn)
+        with Timer() as second:
+            resumed = OrderImportService.import_file(str(in_path), "stock_in", session_factory=factory)
+        again = OrderImportService.import_file(str(in_path), "stock_in", session_factory=factory)
+
+        with Timer() as outbound:
+            out_result = OrderImportService.import_file(
+                str(out_path), "stock_out", session_factory=factory
+            )
+
+        posted_in = _count(engine, StockIn)
+        posted_out = _count(engine, StockOut)
+
+    in_rate = posted_in / (first.elapsed + second.elapsed)
+    print(
+        f"入库导入 {args.orders} 张 × {args.lines} 行：中断前提交 {interrupted_at} 张"
+        f"（{3 * ORDER_BATCH_SIZE} 张/3 批），续导从第 {resumed.resumed_from} 行之后继续，"
+        f"跳过 {resumed.orders_skipped} 张，过账 {resumed.orders_posted} 张，出错 {resumed.orders_failed} 张"
+    )
+    print(f"入库合计 {posted_in} 张（预期 {expected_in}），{in_rate:,.0f} 单/秒")
+    print(
+        f"出库导入 {out_result.orders_posted} 张（预期 {expected_out}），"
+        f"{out_result.orders_posted / outbound.elapsed:,.0f} 单/秒"
+    )
+    checks = {
+        "中断前只提交了完整批次": interrupted_at == 3 * ORDER_BATCH_SIZE - 3 * ORDER_BATCH_SIZE // BAD_EVERY,
+        "续导后每张正确单据恰好过账一次": posted_in == expected_in,
+        "续导跳过已处理的单据": resumed.orders_skipped == 3 * ORDER_BATCH_SIZE,
+        "错误单据全部记录": resumed.orders_failed == args.orders // BAD_EVERY - 3 * ORDER_BATCH_SIZE // BAD_EVERY,
+        "已完成的文件不再处理": again.completed_before,
+        "出库单全部过账": posted_out == expected_out and not out_result.errors,
+    }
+    for name, ok in checks.items():
+        print(f"[{'通过' if ok else '失败'}] {name}")
+
+
+if __name__ == "__main__":
+    main()
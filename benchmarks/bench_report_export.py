@@ -0,0 +1,183 @@
+"""出入库明细导出基准：对比改造前的 pandas DataFrame 导出与流式 xlsx / csv / parquet 导出。
+
+每种方式在独立子进程中运行，以便分别统计峰值内存（RSS）。未安装 pyarrow 时跳过 parquet。
+
+用法：python -m benchmarks.bench_report_export [--lines 100000 500000]
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from models.base import create_sqlite_engine
+from models.goods import Goods
+from models.stock_in import StockIn, StockInItem
+from models.stock_out import StockOut, StockOutItem
+from services.report_service import ReportService
+from services.report_writers import EXPORT_FORMATS
+from ._common import Timer, seed_goods, temp_database
+
+GOODS_COUNT = 10_000
+LINES_PER_ORDER = 20
+START = datetime(2024, 1, 1)
+END = datetime(2025, 1, 1)
+
+
+def _seed_orders(engine, lines: int) -> None:
+    """生成 lines 条明细，入库与出库各占一半，日期均匀分布在一年内。"""
+    orders = max(1, lines // LINES_PER_ORDER)
+    step = (END - START) / orders
+    with Session(engine) as session:
+        for model, item_model, fk, prefix in (
+            (StockIn, StockInItem, "stock_in_id", "IN"),
+            (StockOut, StockOutItem, "stock_out_id", "OUT"),
+        ):
+            half = orders // 2 or 1
+            session.execute(
+                insert(model),
+                [
+                    {"order_no": f"{prefix}{i:08d}", "date": START + step * ((i - 1) * 2 + (prefix == "OUT"))}
+                    for i in range(1, half + 1)
+                ],
+            )
+            for order_start in range(1, half + 1, 1000):
+                session.execute(
+                    insert(item_model),
+                    [
+                        {
+                            fk: order_id,
+                            "goods_id": (order_id * LINES_PER_ORDER + n) % GOODS_COUNT + 1,
+                            "quantity": Decimal(n + 1),
+                            "price": Decimal("9.90"),
+                        }
+                        for order_id in range(order_start, min(order_start + 1000, half + 1))
+                        for n in range(LINES_PER_ORDER)
+                    ],
+                )
+        session.commit()
+
+
+def _legacy_export(session: Session, filepath: str) -> int:
+    """改造前 ReportService.export_inout_detail 的实现：两次全量查询 + DataFrame 排序。"""
+    import pandas as pd
+
+    in_stmt = (
+        select(
+            StockIn.date, StockIn.order_no, Goods.code, Goods.name,
+            StockInItem.quantity, StockInItem.price, literal("入库"),
+        )
+        .join(StockInItem, StockInItem.stock_in_id == StockIn.id)
+        .join(Goods, Goods.id == StockInItem.goods_id)
+        .where(StockIn.date.between(START, END))
+    )
+    out_stmt = (
+        select(
+            StockOut.date, StockOut.order_no, Goods.code, Goods.name,
+            -StockOutItem.quantity, StockOutItem.price, literal("出库"),
+        )
+        .join(StockOutItem, StockOutItem.stock_out_id == StockOut.id)
+        .join(Goods, Goods.id == StockOutItem.goods_id)
+        .where(StockOut.date.between(START, END))
+    )
+    rows = list(session.execute(in_stmt)) + list(session.execute(out_stmt))
+    df = pd.DataFrame(rows, columns=["日期", "单号", "商品编码", "商品名称", "数量", "单价", "类型"])
+    df.sort_values(by="日期", inplace=True)
+    df.to_excel(filepath, index=False)
+    return len(df)
+
+
+def _stream_export(fmt: str):
+    def _export(session: Session, filepath: str) -> int:
+        return ReportService.export_inout_detail(session, filepath, START, END, fmt=fmt)
+
+    return _export
+
+
+METHODS = {
+    "pandas": _legacy_export,
+    "xlsx": _stream_export("xlsx"),
+    "csv": _stream_export("csv"),
+    "parquet": _stream_export("parquet"),
+}
+
+
+def _peak_memory_mb() -> tuple[float, str]:
+    """返回进程峰值内存；Windows 上没有 resource 模块时退回 tracemalloc 统计的 Python 堆峰值。"""
+    try:
+        import resource
+    except ImportError:
+        import tracemalloc
+
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024, "py-heap"
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024), "rss"
+
+
+def _run_child(method: str, db_path: str, out_path: str) -> None:
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        import tracemalloc
+
+        tracemalloc.start()
+    engine = create_sqlite_engine(Path(db_path))
+    with Session(engine) as session, Timer() as timer:
+        rows = METHODS[method](session, out_path)
+    peak, kind = _peak_memory_mb()
+    print(json.dumps({"rows": rows, "seconds": timer.elapsed, "peak_mb": peak, "kind": kind}))
+
+
+def _measure(method: str, db_path: str, out_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_report_export", "--child", method, db_path, out_path],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--child", nargs=3, metavar=("METHOD", "DB", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(*args.child)
+        return
+
+    print(f"{'明细行数':>10} {'方式':<8} {'耗时(s)':>8} {'行/秒':>10} {'峰值内存(MB)':>14}")
+    for lines in args.lines:
+        with temp_database() as engine, tempfile.TemporaryDirectory() as tmp:
+            seed_goods(engine, GOODS_COUNT)
+            _seed_orders(engine, lines)
+            with Session(engine) as session:
+                total = session.scalar(select(func.count()).select_from(StockInItem))
+                total += session.scalar(select(func.count()).select_from(StockOutItem))
+            db_path = engine.url.database
+            engine.dispose()
+            for method in METHODS:
+                if method == "parquet" and importlib.util.find_spec("pyarrow") is None:
+                    continue
+                suffix = EXPORT_FORMATS.get(method, (".xlsx",))[0]
+                result = _measure(method, db_path, str(Path(tmp) / f"{method}{suffix}"))
+                assert result["rows"] == total
+                print(
+                    f"{total:>10} {method:<8} {result['seconds']:>8.2f} "
+                    f"{total / result['seconds']:>10.0f} {result['peak_mb']:>10.1f} ({result['kind']})"
+                )
+
+
+if __name__ == "__main__":
+    main()
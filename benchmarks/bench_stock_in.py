@@ -0,0 +1,61 @@
+"""入库过账基准：统计不同明细行数下每秒过账的行数。
+
+用法：python -m benchmarks.bench_stock_in [--lines 10 1000 50000]
+"""
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from services.stock_in_service import StockInItemData, StockInService
+from ._common import Timer, seed_goods, temp_database
+
+GOODS_COUNT = 5_000
+
+
+def _make_items(lines: int) -> list[StockInItemData]:
+    return [
+        StockInItemData(
+            goods_id=i % GOODS_COUNT + 1,
+            quantity=5,
+            price=1.5,
+            batch_no=f"B{i % 7}",
+            location=f"A-{i % 11:02d}",
+        )
+        for i in range(lines)
+    ]
+
+
+def run(lines: int) -> float:
+    """返回过账 lines 行明细所用秒数（库中已存在一半的库存行）。"""
+    with temp_database() as engine:
+        seed_goods(engine, GOODS_COUNT)
+        items = _make_items(lines)
+        # 预先入库一半明细，使正式过账时同时覆盖“累加已有行”和“新增行”两种路径
+        with Session(engine) as session:
+            StockInService.create_stock_in(
+                session, "WARMUP", None, datetime.now(), None, items[: max(lines // 2, 1)]
+            )
+            session.commit()
+        with Timer() as timer, Session(engine) as session:
+            StockInService.create_stock_in(
+                session, "BENCH", "基准供应商", datetime.now(), None, items
+            )
+            session.commit()
+        return timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 1_000, 50_000])
+    args = parser.parse_args()
+
+    print(f"{'明细行数':>10} {'耗时(s)':>10} {'行/秒':>12}")
+    for lines in args.lines:
+        elapsed = run(lines)
+        print(f"{lines:>10} {elapsed:>10.3f} {lines / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
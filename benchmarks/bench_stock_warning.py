@@ -0,0 +1,87 @@
+"""库存预警查询基准：对比按库存表全量分组汇总（原实现）与读 goods_stock_total 预警标记的首页耗时。
+
+每个商品 2 个库存行，约 0.5% 的商品库存低于最低库存。首页取 50 行并精确计数，
+与预警界面每次刷新的查询一致。
+
+用法：python -m benchmarks.bench_stock_warning [--sizes 10000 100000 500000] [--repeat 20]
+"""
+
+import argparse
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from models.goods import Goods
+from models.stock import Stock
+from services.goods_stock_total_service import GoodsStockTotalService
+from services.stock_service import StockService
+from ._common import Timer, seed_goods, temp_database
+
+PAGE_SIZE = 50
+# 每隔多少个商品放一个库存低于最低库存（seed_goods 的最低库存为 10）的商品
+WARNING_EVERY = 200
+
+
+def _seed_stock(engine, size: int, batch_size: int = 20_000) -> None:
+    with Session(engine) as session:
+        for start in range(1, size + 1, batch_size):
+            rows = []
+            for gid in range(start, min(start + batch_size, size + 1)):
+                qty = 2 if gid % WARNING_EVERY == 0 else 50
+                rows.append({"goods_id": gid, "quantity": qty, "batch_no": "B1"})
+                rows.append({"goods_id": gid, "quantity": qty, "batch_no": "B2"})
+            session.execute(insert(Stock), rows)
+        GoodsStockTotalService.rebuild(session)
+        session.commit()
+
+
+def _aggregate_first_page(session: Session) -> tuple[list, int]:
+    """原实现：每次刷新都按商品分组汇总整张库存表。"""
+    warning_goods = (
+        select(Stock.goods_id)
+        .join(Goods, Goods.id == Stock.goods_id)
+        .group_by(Stock.goods_id)
+        .having(func.sum(Stock.quantity) < func.max(Goods.min_stock))
+        .correlate(None)
+    )
+    condition = Stock.goods_id.in_(warning_goods)
+    rows = session.scalars(
+        select(Stock).where(condition).order_by(Stock.goods_id, Stock.id).limit(PAGE_SIZE + 1)
+    ).all()
+    total = session.scalar(select(func.count()).select_from(Stock).where(condition))
+    return rows[:PAGE_SIZE], total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=20, help="每种查询的重复次数")
+    args = parser.parse_args()
+
+    print(f"{'商品数':>10} {'预警行数':>8} {'全量汇总(ms)':>12} {'预警标记(ms)':>12} {'加速':>8}")
+    for size in args.sizes:
+        with temp_database() as engine:
+            seed_goods(engine, size)
+            _seed_stock(engine, size)
+            with Session(engine) as session:
+                with Timer() as aggregate:
+                    for _ in range(args.repeat):
+                        old_rows, old_total = _aggregate_first_page(session)
+                with Timer() as flagged:
+                    for _ in range(args.repeat):
+                        page = StockService.list_stock_page(
+                            session,
+                            only_warning=True,
+                            page_size=PAGE_SIZE,
+                            count="exact",
+                            load_goods=False,
+                        )
+                same = [(s.goods_id, s.id) for s in page.rows] == [(s.goods_id, s.id) for s in old_rows]
+                assert same and page.total == old_total, "两种查询结果不一致"
+        old_ms = aggregate.elapsed * 1000 / args.repeat
+        new_ms = flagged.elapsed * 1000 / args.repeat
+        print(f"{size:>10} {page.total:>8} {old_ms:>12.2f} {new_ms:>12.2f} {old_ms / new_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
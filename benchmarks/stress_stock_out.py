@@ -0,0 +1,169 @@
+"""多进程并发出库压力测试：模拟多个工作站同时出库，检查库存不会扣成负数。
+
+每个进程独立连接同一个数据库文件，通过 run_write_transaction（BEGIN IMMEDIATE + 冲突重试）
+反复出库；总需求量大于库存，使部分出库因库存不足被拒绝。结束后校验：
+没有负库存、库存合计与流水合计一致、商品库存合计表与库存表一致、出库单数等于各进程成功数之和，
+并输出每秒出库单数。
+
+用法：python -m benchmarks.stress_stock_out [--processes 8] [--orders 300]
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+from datetime import datetime
+from time import perf_counter
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.base import create_sqlite_engine, write_engine
+from models.goods_stock_total import GoodsStockTotal
+from models.stock import Stock
+from models.stock_flow import StockFlow
+from models.stock_out import StockOut
+from services.base import run_write_transaction
+from services.stock_in_service import StockInItemData, StockInService
+from services.stock_out_service import StockOutItemData, StockOutService
+from ._common import seed_goods, temp_database
+
+GOODS_COUNT = 50
+# 每个商品分 BATCHES 个批次入库，每批 BATCH_QTY 件
+BATCHES = 5
+BATCH_QTY = 100
+
+
+def _seed_stock(engine) -> None:
+    with Session(engine) as session:
+        for batch in range(BATCHES):
+            StockInService.create_stock_in(
+                session,
+                f"SEED{batch}",
+                None,
+                datetime.now(),
+                None,
+                [
+                    StockInItemData(
+                        goods_id=gid,
+                        quantity=BATCH_QTY,
+                        price=1,
+                        batch_no=f"B{batch}",
+                        location=None,
+                    )
+                    for gid in range(1, GOODS_COUNT + 1)
+                ],
+            )
+        session.commit()
+
+
+def _worker(db_path: str, worker: int, orders: int, barrier, results) -> None:
+    """工作进程：出库 orders 次，结果 (成功, 库存不足, 锁冲突放弃) 放入 results。"""
+    engine = create_sqlite_engine(db_path)
+    factory = sessionmaker(bind=write_engine(engine), autoflush=False, expire_on_commit=False)
+    rng = random.Random(worker)
+    ok = short = busy = 0
+    barrier.wait()
+    for n in range(orders):
+        goods = rng.sample(range(1, GOODS_COUNT + 1), 2)
+        items = [
+            StockOutItemData(
+                goods_id=gid,
+                quantity=rng.randint(1, 20),
+                price=None,
+                batch_no=None,
+                location=None,
+            )
+            for gid in goods
+        ]
+        try:
+            run_write_transaction(
+                lambda session: StockOutService.create_stock_out(
+                    session, f"W{worker}-{n}", None, datetime.now(), None, "销售", items
+                ),
+                session_factory=factory,
+            )
+            ok += 1
+        except ValueError:
+            short += 1
+        except OperationalError:
+            busy += 1
+    engine.dispose()
+    results.put((ok, short, busy))
+
+
+def run(processes: int, orders: int) -> bool:
+    with temp_database() as engine:
+        seed_goods(engine, GOODS_COUNT)
+        _seed_stock(engine)
+        db_path = engine.url.database
+
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(db_path, i, orders, barrier, results))
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        barrier.wait()
+        started = perf_counter()
+        totals = [results.get() for _ in workers]
+        elapsed = perf_counter() - started
+        for process in workers:
+            process.join()
+
+        ok = sum(t[0] for t in totals)
+        short = sum(t[1] for t in totals)
+        busy = sum(t[2] for t in totals)
+        with Session(engine) as session:
+            negative = session.scalar(select(func.count()).where(Stock.quantity < 0))
+            stock_totals = {
+                gid: qty
+                for gid, qty in session.execute(
+                    select(Stock.goods_id, func.sum(Stock.quantity)).group_by(Stock.goods_id)
+                )
+            }
+            flow_totals = {
+                gid: qty
+                for gid, qty in session.execute(
+                    select(StockFlow.goods_id, func.sum(StockFlow.change_qty)).group_by(StockFlow.goods_id)
+                )
+            }
+            goods_totals = {
+                gid: qty
+                for gid, qty in session.execute(select(GoodsStockTotal.goods_id, GoodsStockTotal.qty))
+            }
+            out_orders = session.scalar(select(func.count()).select_from(StockOut))
+
+    print(f"进程数 {processes}，每进程 {orders} 单，耗时 {elapsed:.2f} 秒")
+    print(f"成功 {ok} 单（{ok / elapsed:.0f} 单/秒），库存不足 {short} 单，锁冲突放弃 {busy} 单")
+    checks = {
+        "没有负库存": negative == 0,
+        "库存合计与流水合计一致": all(
+            abs(float(stock_totals.get(gid, 0)) - float(flow_totals.get(gid, 0))) < 1e-6
+            for gid in stock_totals.keys() | flow_totals.keys()
+        ),
+        "商品库存合计表与库存表一致": all(
+            abs(float(stock_totals.get(gid, 0)) - float(goods_totals.get(gid, 0))) < 1e-6
+            for gid in stock_totals.keys() | goods_totals.keys()
+        ),
+        "出库单数等于成功数": out_orders == ok,
+    }
+    for name, passed in checks.items():
+        print(f"[{'通过' if passed else '失败'}] {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=300, help="每个进程的出库次数")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.processes, args.orders) else 1)
+
+
+if __name__ == "__main__":
+    main()
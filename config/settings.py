@@ -18,3 +18,17 @@ EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_FILE: Path = DATA_DIR / "inventory.db"
 
+
+# SQLite 连接参数：每次建立连接时依次以 PRAGMA 应用（见 models.base.create_sqlite_engine）。
+# - journal_mode=WAL：读写互不阻塞，库存查询/报表导出时仍可入库出库；
+#   数据库文件放在网络共享目录时 WAL 不可用，可改回 "DELETE"。
+# - synchronous=NORMAL：WAL 模式下仅在检查点时 fsync，断电最多丢失最近的事务但不会损坏数据库。
+# - busy_timeout：遇到写锁时等待的毫秒数，而不是立即报 "database is locked"。
+SQLITE_PRAGMAS: dict[str, int | str] = {
+    "busy_timeout": 5000,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,  # 负数表示 KiB，即 64 MiB 页缓存
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
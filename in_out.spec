@@ -2,6 +2,26 @@
 
 block_cipher = None
 
+# 冷启动优化：
+# - 排除应用用不到的大型模块，缩小归档体积、减少启动时扫描与解压；
+# - 纯 Python 模块统一以字节码打入 PYZ 归档（noarchive=False），optimize=1 去掉 assert；
+# - 关闭 UPX：压缩过的 DLL 每次启动都要先解压，且容易被杀毒软件拦截扫描。
+EXCLUDES = [
+    # 标准库中的开发/测试工具
+    'tkinter', 'doctest', 'pydoc', 'test', 'lib2to3', 'idlelib',
+    # 常被 pandas 可选依赖牵连进来的大包
+    'matplotlib', 'IPython', 'scipy', 'numexpr', 'bottleneck', 'tables', 'sqlalchemy.testing',
+    # 其他 Qt 绑定
+    'PyQt5', 'PyQt6', 'PySide2',
+    # 未使用的 PySide6 模块
+    'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets', 'PySide6.QtWebEngineQuick',
+    'PySide6.QtWebChannel', 'PySide6.QtWebSockets', 'PySide6.QtQml', 'PySide6.QtQuick',
+    'PySide6.QtQuickWidgets', 'PySide6.Qt3DCore', 'PySide6.Qt3DRender', 'PySide6.QtMultimedia',
+    'PySide6.QtMultimediaWidgets', 'PySide6.QtCharts', 'PySide6.QtDataVisualization',
+    'PySide6.QtPdf', 'PySide6.QtPdfWidgets', 'PySide6.QtBluetooth', 'PySide6.QtPositioning',
+    'PySide6.QtSensors', 'PySide6.QtSerialPort', 'PySide6.QtDesigner', 'PySide6.QtOpenGL',
+]
+
 
 a = Analysis(
     ['main.py'],
@@ -12,11 +32,12 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDES,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
+    optimize=1,
 )
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
@@ -29,7 +50,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -45,7 +66,7 @@ coll = COLLECT(
     a.zipfiles,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     name='InOutInventory',
 )
@@ -1,18 +1,39 @@
+# 最先导入：以此刻作为进程启动时间点，统计到首屏绘制的耗时
+from utils.startup import IMPORT_PROFILER, STARTUP, pop_profile_startup_arg, write_startup_profile
+
 import sys
 
-from PySide6.QtWidgets import QApplication
+# --profile-startup[=路径]：在导入其余依赖之前开始统计各模块的导入耗时
+PROFILE_PATH = pop_profile_startup_arg(sys.argv)
+if PROFILE_PATH is not None:
+    IMPORT_PROFILER.install()
+
+import logging  # noqa: E402
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
 
-from models.base import init_db
-from ui.main_window import MainWindow
-from ui.login_dialog import LoginDialog
+from models.base import init_db  # noqa: E402
+from ui.main_window import MainWindow  # noqa: E402
+from ui.login_dialog import LoginDialog  # noqa: E402
+from ui.startup_probe import FirstPaintProbe  # noqa: E402
+
+
+def _write_profile() -> None:
+    IMPORT_PROFILER.uninstall()
+    write_startup_profile(PROFILE_PATH, STARTUP, IMPORT_PROFILER)
 
 
 def main() -> None:
     """应用入口。"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    STARTUP.mark("imports")
+
     # 初始化数据库
     init_db()
+    STARTUP.mark("init_db")
 
     app = QApplication(sys.argv)
+    STARTUP.mark("qapplication")
 
     # 全局手绘 + Claymorphism 风格样式
     app.setStyleSheet(
@@ -69,7 +90,7 @@ QLineEdit, QDateEdit, QComboBox {
 }
 
 /* 表格：浅纸色背景 + 手绘网格线 */
-QTableWidget {
+QTableView {
     background: #FAFAF8;
     gridline-color: #C4A77D;
 }
@@ -80,7 +101,7 @@ QHeaderView::section {
     padding: 4px 6px;
     font-weight: 600;
 }
-QTableWidget::item:selected {
+QTableView::item:selected {
     background: #FDE68A;
     color: #1A1A1A;
 }
@@ -92,10 +113,14 @@ QStatusBar {
     )
 
     login = LoginDialog()
+    STARTUP.mark("login_dialog")
     if login.exec() != LoginDialog.Accepted:
         return
+    STARTUP.mark("login_accepted")
 
     window = MainWindow(current_user=login.current_user)
+    STARTUP.mark("main_window")
+    FirstPaintProbe(window, on_first_paint=_write_profile if PROFILE_PATH else None)
     window.show()
     sys.exit(app.exec())
 
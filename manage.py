@@ -0,0 +1,242 @@
+"""命令行维护工具，无需启动界面即可执行数据维护任务。
+
+用法：python manage.py <命令> [参数]，python manage.py -h 查看全部命令。
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, time
+from time import perf_counter
+
+from models.base import init_db
+from services.base import get_session, run_write_transaction
+from services.stock_allocation import DEFAULT_STRATEGY, STRATEGIES
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD：{value}") from exc
+
+
+def cmd_rebuild_daily_agg(args: argparse.Namespace) -> int:
+    """由出入库明细重建 stock_daily_agg 每日汇总表。"""
+    from services.stock_daily_agg_service import StockDailyAggService
+
+    start = perf_counter()
+    rows = run_write_transaction(
+        lambda session: StockDailyAggService.rebuild(session, args.start, args.end)
+    )
+    print(f"每日汇总已重建：{rows} 行，耗时 {perf_counter() - start:.1f} 秒")
+    return 0
+
+
+def cmd_rebuild_stock_totals(args: argparse.Namespace) -> int:
+    """由库存表重建商品库存合计表及预警标记。"""
+    from services.goods_stock_total_service import GoodsStockTotalService
+
+    start = perf_counter()
+    rows = run_write_transaction(GoodsStockTotalService.rebuild)
+    print(f"商品库存合计已重建：{rows} 个商品，耗时 {perf_counter() - start:.1f} 秒")
+    return 0
+
+
+def cmd_snapshot_stock(args: argparse.Namespace) -> int:
+    """补齐每月月初的库存结存检查点。"""
+    from services.stock_snapshot_service import StockSnapshotService
+
+    start = perf_counter()
+    until = datetime.combine(args.until, time.max) if args.until else None
+    runs = run_write_transaction(
+        lambda session: StockSnapshotService.create_monthly_snapshots(session, until)
+    )
+    for run in runs:
+        print(f"{run.as_of:%Y-%m-%d}：{run.goods_count} 个商品")
+    print(f"新增结存检查点 {len(runs)} 个，耗时 {perf_counter() - start:.1f} 秒")
+    return 0
+
+
+def cmd_reconcile(args: argparse.Namespace) -> int:
+    """以库存流水为准核对库存表；存在差异且未修复时返回 1。"""
+    from services.reconcile_service import ReconcileService
+
+    with get_session() as session:
+        report = ReconcileService.reconcile(session, workers=args.workers)
+    if args.fix and report.discrepancies:
+        # 修复单独放在 BEGIN IMMEDIATE 写事务中（事务内会重新核对），核对期间不占用写锁
+        ids = [item.goods_id for item in report.discrepancies]
+        fixed = run_write_transaction(lambda session: ReconcileService.apply_fixes(session, ids))
+        report = report._replace(fixed=fixed)
+    for item in report.discrepancies[: args.limit]:
+        print(f"商品 {item.goods_id}：流水合计 {item.expected}，库存合计 {item.actual}，差额 {item.diff}")
+    if len(report.discrepancies) > args.limit:
+        print(f"……其余 {len(report.discrepancies) - args.limit} 个差异未列出")
+    print(
+        f"核对商品 {report.goods_checked} 个，流水 {report.flow_rows} 行，"
+        f"{report.workers} 个进程 / {report.partitions} 个区间，耗时 {report.elapsed:.1f} 秒，"
+        f"{report.flow_rows_per_second:,.0f} 行/秒"
+    )
+    print(f"发现差异 {len(report.discrepancies)} 个，已修复 {report.fixed} 个")
+    return 1 if report.discrepancies and not args.fix else 0
+
+
+def cmd_check_plans(args: argparse.Namespace) -> int:
+    """检查热点查询的执行计划，出现整表扫描或临时排序时返回 1。"""
+    from services.query_plans import check_hot_query_plans
+
+    with get_session() as session:
+        results = check_hot_query_plans(session)
+    failed = 0
+    for result in results:
+        print(f"[{'退化' if result.problems else '正常'}] {result.name}")
+        if args.verbose or result.problems:
+            for line in result.plan:
+                print(f"    {line}")
+        for problem in result.problems:
+            print(f"    !! {problem}")
+        failed += bool(result.problems)
+    print(f"共检查 {len(results)} 个查询，退化 {failed} 个")
+    return 1 if failed else 0
+
+
+def cmd_import_goods(args: argparse.Namespace) -> int:
+    """从 CSV / xlsx 批量导入商品；有出错的行时返回 1。"""
+    from services.goods_import_service import IMPORT_BATCH_SIZE, GoodsImportService
+    from services.import_readers import write_error_report
+
+    def progress(rows: int, total: int) -> None:
+        print(f"\r已处理 {rows:,} / {total:,} 行", end="", flush=True)
+
+    result = run_write_transaction(
+        lambda session: GoodsImportService.import_file(
+            session, args.file, progress, batch_size=args.batch_size or IMPORT_BATCH_SIZE
+        )
+    )
+    print()
+    for error in result.errors[: args.limit]:
+        print(f"第 {error.line} 行 {error.key}：{error.message}")
+    if len(result.errors) > args.limit:
+        print(f"……其余 {len(result.errors) - args.limit} 个错误未列出")
+    if args.errors and result.errors:
+        write_error_report(args.errors, result.errors)
+        print(f"错误明细已写入 {args.errors}")
+    print(
+        f"共 {result.total_rows} 行：新增 {result.inserted}，更新 {result.updated}，"
+        f"出错 {len(result.errors)}，耗时 {result.elapsed:.1f} 秒，{result.rows_per_second:,.0f} 行/秒"
+    )
+    return 1 if result.errors else 0
+
+
+def cmd_import_orders(args: argparse.Namespace) -> int:
+    """从 CSV / xlsx 批量导入入库单或出库单，可从中断处续导；有出错的单据时返回 1。"""
+    from services.import_readers import write_error_report
+    from services.order_import_service import ORDER_BATCH_SIZE, OrderImportService
+
+    def progress(rows: int, total: int) -> None:
+        print(f"\r已处理 {rows:,} / {total:,} 行", end="", flush=True)
+
+    result = OrderImportService.import_file(
+        args.file,
+        args.kind,
+        progress,
+        strategy=args.strategy,
+        batch_orders=args.batch_orders or ORDER_BATCH_SIZE,
+    )
+    if result.completed_before:
+        print("该文件此前已全部导入，本次未做任何处理")
+        return 0
+    print()
+    if result.resumed_from:
+        print(f"从第 {result.resumed_from} 行之后继续，跳过已处理的单据 {result.orders_skipped} 张")
+    for error in result.errors[: args.limit]:
+        print(f"第 {error.line} 行 {error.key}：{error.message}")
+    if len(result.errors) > args.limit:
+        print(f"……其余 {len(result.errors) - args.limit} 个错误未列出")
+    if args.errors and result.errors:
+        write_error_report(args.errors, result.errors)
+        print(f"错误明细已写入 {args.errors}")
+    print(
+        f"共 {result.total_lines} 行：过账 {result.orders_posted} 张，出错 {result.orders_failed} 张，"
+        f"耗时 {result.elapsed:.1f} 秒，{result.orders_per_second:,.0f} 单/秒"
+    )
+    return 1 if result.orders_failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="库存管理系统命令行维护工具")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="<命令>")
+
+    rebuild = commands.add_parser(
+        "rebuild-daily-agg",
+        help="由出入库明细重建每日出入库汇总表（默认重建全部日期）",
+    )
+    rebuild.add_argument("--start", type=_parse_date, help="起始日期（含），YYYY-MM-DD")
+    rebuild.add_argument("--end", type=_parse_date, help="结束日期（含），YYYY-MM-DD")
+    rebuild.set_defaults(func=cmd_rebuild_daily_agg)
+
+    rebuild_totals = commands.add_parser(
+        "rebuild-stock-totals",
+        help="由库存表重建商品库存合计表与库存预警标记（正常情况下随过账自动维护）",
+    )
+    rebuild_totals.set_defaults(func=cmd_rebuild_stock_totals)
+
+    snapshot = commands.add_parser(
+        "snapshot-stock",
+        help="补齐每月月初的库存结存检查点（可每月定时执行），加速历史时点库存查询",
+    )
+    snapshot.add_argument("--until", type=_parse_date, help="补齐到该日期为止，默认今天")
+    snapshot.set_defaults(func=cmd_snapshot_stock)
+
+    reconcile = commands.add_parser(
+        "reconcile",
+        help="以库存流水为准多进程核对库存表，可选修复；有未修复的差异时退出码为 1",
+    )
+    reconcile.add_argument("--workers", type=int, help="工作进程数，默认等于 CPU 核数")
+    reconcile.add_argument("--fix", action="store_true", help="把有差异的商品库存修正为流水合计")
+    reconcile.add_argument("--limit", type=int, default=50, help="最多列出的差异条数")
+    reconcile.set_defaults(func=cmd_reconcile)
+
+    check_plans = commands.add_parser(
+        "check-plans",
+        help="用 EXPLAIN QUERY PLAN 检查热点查询是否退化为整表扫描或临时排序，退化时退出码为 1",
+    )
+    check_plans.add_argument("-v", "--verbose", action="store_true", help="输出全部查询的执行计划")
+    check_plans.set_defaults(func=cmd_check_plans)
+
+    import_goods = commands.add_parser(
+        "import-goods",
+        help="从 CSV / xlsx 批量导入商品（按编码新增或更新），有出错的行时退出码为 1",
+    )
+    import_goods.add_argument("file", help="导入文件，第一行为表头（编码、名称 必需）")
+    import_goods.add_argument("--errors", metavar="OUT.csv", help="把出错的行写入该 CSV 文件")
+    import_goods.add_argument("--batch-size", type=int, help="每批校验并写入的行数，默认 20000")
+    import_goods.add_argument("--limit", type=int, default=20, help="最多列出的错误条数")
+    import_goods.set_defaults(func=cmd_import_goods)
+
+    import_orders = commands.add_parser(
+        "import-orders",
+        help="从 CSV / xlsx 批量导入入库单或出库单（按单号分组、分批提交，中断后可续导），"
+        "有出错的单据时退出码为 1",
+    )
+    import_orders.add_argument("kind", choices=["stock_in", "stock_out"], help="单据类型")
+    import_orders.add_argument("file", help="导入文件，每行一条明细（单号、商品编码、数量 必需）")
+    import_orders.add_argument(
+        "--strategy", choices=sorted(STRATEGIES), default=DEFAULT_STRATEGY, help="出库分配策略"
+    )
+    import_orders.add_argument("--errors", metavar="OUT.csv", help="把出错的行写入该 CSV 文件")
+    import_orders.add_argument("--batch-orders", type=int, help="每个事务提交的单据数，默认 200")
+    import_orders.add_argument("--limit", type=int, default=20, help="最多列出的错误条数")
+    import_orders.set_defaults(func=cmd_import_orders)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    init_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
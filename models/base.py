@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from pathlib import Path
+from typing import Mapping
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 
-from config.settings import DB_FILE, DATA_DIR
+from config.settings import DB_FILE, DATA_DIR, SQLITE_PRAGMAS
 # SQLAlchemy 基础 Base 类
 Base = declarative_base()
 
@@ -11,13 +15,60 @@ def get_db_path():
     return DB_FILE
 
 
-_ENGINE = create_engine(
-    f"sqlite:///{get_db_path()}",
-    echo=False,
-    future=True,
-)
+def create_sqlite_engine(
+    db_path: Path | str,
+    pragmas: Mapping[str, int | str] | None = None,
+) -> Engine:
+    """创建 SQLite engine，并在每个新连接上应用连接参数（默认取 SQLITE_PRAGMAS）。
+
+    事务由 SQLAlchemy 显式发出 BEGIN 开始（pysqlite 默认要到第一条写语句才开始事务，
+    先查询再写入的过程不在同一个事务里）。以 execution_options(begin_immediate=True)
+    打开的连接发出 BEGIN IMMEDIATE，事务开始时就取得写锁，见 write_engine()。
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=False,
+        future=True,
+    )
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+        # 关闭 pysqlite 的隐式事务管理，改由下面的 begin 事件显式开始事务
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection) -> None:
+        if connection.get_execution_options().get("begin_immediate"):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def write_engine(engine: Engine) -> Engine:
+    """返回同一连接池上、事务以 BEGIN IMMEDIATE 开始的 engine，用于先校验后写入的过账事务。
+
+    多个工作站共用同一个数据库文件时，写事务一开始就持有写锁，
+    期间的库存校验与扣减不会与其他写事务交错；读事务不受影响（WAL）。
+    """
+    return engine.execution_options(begin_immediate=True)
+
+
+_ENGINE = create_sqlite_engine(get_db_path())
 
 SessionLocal = sessionmaker(bind=_ENGINE, autoflush=False, autocommit=False, expire_on_commit=False, class_=Session)
+# 过账等写事务使用的会话工厂（BEGIN IMMEDIATE），一般通过 services.base.run_write_transaction 使用
+WriteSessionLocal = sessionmaker(
+    bind=write_engine(_ENGINE), autoflush=False, autocommit=False, expire_on_commit=False, class_=Session
+)
 
 
 def get_engine():
@@ -26,13 +77,21 @@ def get_engine():
 
 
 def init_db() -> None:
-    """创建所有表结构。应在应用启动时调用一次。"""
+    """把数据库结构升级到最新版本。应在应用启动时调用一次。
+
+    结构已是最新时只读取一次 PRAGMA user_version，不做其他结构检查。
+    """
     import models.goods  # noqa: F401
     import models.stock  # noqa: F401
     import models.stock_in  # noqa: F401
     import models.stock_out  # noqa: F401
     import models.user  # noqa: F401
     import models.stock_flow  # noqa: F401
+    import models.stock_daily_agg  # noqa: F401
+    import models.stock_snapshot  # noqa: F401
+    import models.import_checkpoint  # noqa: F401
+    import models.goods_stock_total  # noqa: F401
 
-    Base.metadata.create_all(bind=_ENGINE)
+    from .migrations import migrate
 
+    migrate(_ENGINE)
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text, Boolean
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import Column, Integer, String, Numeric, Text, Boolean, column, event, table, text
 
 from .base import Base
 
@@ -20,3 +23,86 @@ class Goods(Base):
     remark = Column(Text, nullable=True, comment="备注")
     is_active = Column(Boolean, nullable=False, default=True, comment="是否启用")
 
+
+# ---------- 全文检索影子索引 ----------
+# goods_fts 是 goods 的外部内容 FTS5 表（trigram 分词，支持任意子串匹配），
+# 只保存索引不保存副本，由下面的触发器与 goods 保持同步。
+
+# trigram 分词至少需要 3 个字符才能命中索引，更短的关键字退回 LIKE
+FTS_MIN_KEYWORD_LENGTH = 3
+
+GOODS_FTS = table("goods_fts", column("rowid"), column("rank"), column("goods_fts"))
+
+_GOODS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS goods_fts USING fts5(
+        code, name, category, spec,
+        content='goods', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS goods_fts_ai AFTER INSERT ON goods BEGIN
+        INSERT INTO goods_fts(rowid, code, name, category, spec)
+        VALUES (new.id, new.code, new.name, new.category, new.spec);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS goods_fts_ad AFTER DELETE ON goods BEGIN
+        INSERT INTO goods_fts(goods_fts, rowid, code, name, category, spec)
+        VALUES ('delete', old.id, old.code, old.name, old.category, old.spec);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS goods_fts_au AFTER UPDATE OF code, name, category, spec ON goods BEGIN
+        INSERT INTO goods_fts(goods_fts, rowid, code, name, category, spec)
+        VALUES ('delete', old.id, old.code, old.name, old.category, old.spec);
+        INSERT INTO goods_fts(rowid, code, name, category, spec)
+        VALUES (new.id, new.code, new.name, new.category, new.spec);
+    END
+    """,
+)
+
+
+_GOODS_FTS_TRIGGERS = ("goods_fts_ai", "goods_fts_ad", "goods_fts_au")
+
+
+def ensure_goods_fts(connection) -> None:
+    """创建 goods_fts 及同步触发器；首次创建时用现有商品重建索引。"""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'goods_fts'")
+    ).first()
+    for ddl in _GOODS_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if not exists:
+        connection.exec_driver_sql("INSERT INTO goods_fts(goods_fts) VALUES ('rebuild')")
+
+
+@contextmanager
+def goods_fts_triggers_suspended(connection) -> Iterator[None]:
+    """在当前事务内暂时移除 goods_fts 同步触发器，结束时重新创建。
+
+    供批量写入商品时使用：调用方需自行以整批语句维护 goods_fts（先删旧值再插新值），
+    避免每行触发一次全文索引更新。DDL 属于当前事务，事务回滚时触发器同样恢复。
+    """
+    for name in _GOODS_FTS_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        for ddl in _GOODS_FTS_DDL[1:]:
+            connection.exec_driver_sql(ddl)
+
+
+@event.listens_for(Goods.__table__, "after_create")
+def _create_goods_fts(target, connection, **kw) -> None:
+    ensure_goods_fts(connection)
+
+
+def use_goods_fts(keyword: str) -> bool:
+    return len(keyword) >= FTS_MIN_KEYWORD_LENGTH
+
+
+def goods_fts_match(keyword: str):
+    """goods_fts MATCH 条件：关键字整体作为一个短语，按子串匹配编码/名称/分类/规格。"""
+    phrase = '"' + keyword.replace('"', '""') + '"'
+    return GOODS_FTS.c.goods_fts.match(phrase)
@@ -0,0 +1,22 @@
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, Numeric, text
+
+from .base import Base
+
+
+class GoodsStockTotal(Base):
+    """各商品的库存数量合计：出入库过账、库存修正时在同一事务中增量维护。
+
+    below_min 表示合计低于商品的最低库存（未设置最低库存时为假）；
+    只有存在库存行的商品才有合计行，库存预警只读标记为真的行。
+    """
+
+    __tablename__ = "goods_stock_total"
+
+    goods_id = Column(Integer, ForeignKey("goods.id"), primary_key=True)
+    qty = Column(Numeric(18, 4), nullable=False, default=0, comment="库存数量合计")
+    below_min = Column(Boolean, nullable=False, default=False, comment="是否低于最低库存")
+
+    __table_args__ = (
+        # 部分索引只包含预警商品，预警查询的代价与预警商品数成正比，与商品总数无关
+        Index("ix_goods_stock_total_below_min", "goods_id", sqlite_where=text("below_min = 1")),
+    )
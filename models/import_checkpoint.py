@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+
+from .base import Base
+
+
+class ImportCheckpoint(Base):
+    """单据导入断点：每个导入文件最后一次提交到的位置。
+
+    文件以导入类型 + 内容 SHA-256 标识；断点与该批单据在同一事务中提交，
+    中断后再次导入同一文件时跳过 last_line 及之前的行。
+    """
+
+    __tablename__ = "import_checkpoint"
+
+    kind = Column(String(20), primary_key=True, comment="导入类型：stock_in / stock_out")
+    fingerprint = Column(String(64), primary_key=True, comment="文件内容 SHA-256")
+    filename = Column(String(260), nullable=True, comment="最近一次导入时的文件名")
+    last_line = Column(Integer, nullable=False, default=0, comment="已提交单据的最后一行行号")
+    last_order_no = Column(String(50), nullable=True, comment="最后提交的单号")
+    orders_posted = Column(Integer, nullable=False, default=0, comment="累计过账单据数")
+    orders_failed = Column(Integer, nullable=False, default=0, comment="累计出错单据数")
+    completed = Column(Boolean, nullable=False, default=False, comment="文件是否已全部处理")
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
@@ -0,0 +1,269 @@
+"""数据库结构版本迁移。
+
+已应用的版本号记录在 SQLite 的 PRAGMA user_version 中：
+- 版本号已是最新时启动不做任何结构检查，只读取一次 user_version；
+- 全新数据库直接按模型建表并标记为最新版本；
+- 旧数据库按版本号依次执行尚未应用的步骤，每一步完成后才更新版本号。
+
+普通步骤在一个事务内执行，必须可以重复执行（IF NOT EXISTS、先检查列是否存在等）：
+v1 会按最新模型补建缺失的表，之后的步骤可能面对已经是新结构的表。
+数据回填步骤（BatchedBackfill）分批执行，每批一个事务，进度记在
+schema_migration_progress 表中，中断后从上次完成的批次继续。
+"""
+
+import logging
+from datetime import date
+from typing import Callable, List, NamedTuple, Optional, Union
+
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from .base import Base
+
+logger = logging.getLogger(__name__)
+
+_PROGRESS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migration_progress (
+    version INTEGER PRIMARY KEY,
+    cursor TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def get_user_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def _set_user_version(connection: Connection, version: int) -> None:
+    # PRAGMA 不支持绑定参数；version 只来自下面的步骤表
+    connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def _table_exists(connection: Connection, name: str) -> bool:
+    return (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name},
+        ).first()
+        is not None
+    )
+
+
+def _find_index(name: str) -> Index:
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(name)
+
+
+def _create_indexes(connection: Connection, names: List[str]) -> None:
+    """按模型中的定义创建索引（已存在则跳过）。"""
+    for name in names:
+        connection.execute(CreateIndex(_find_index(name), if_not_exists=True))
+
+
+def _drop_indexes(connection: Connection, names: List[str]) -> None:
+    for name in names:
+        connection.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+
+class BatchedBackfill:
+    """分批回填数据。
+
+    run_batch(connection, cursor) 处理 cursor 之后的一批数据并返回新的 cursor，
+    全部完成时返回 None；cursor 为 None 表示从头开始。
+    """
+
+    def __init__(self, run_batch: Callable[[Connection, Optional[str]], Optional[str]]) -> None:
+        self.run_batch = run_batch
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    step: Union[Callable[[Connection], None], BatchedBackfill]
+
+
+# ---------- 迁移步骤 ----------
+
+
+def _tables_and_hot_query_indexes(connection: Connection) -> None:
+    """补建缺失的表，加上热点查询的复合 / 覆盖 / 部分索引，并删除被复合索引取代的单列索引。"""
+    Base.metadata.create_all(bind=connection)
+    _drop_indexes(
+        connection,
+        [
+            # 被 ix_stock_flow_goods_time (goods_id, created_at, change_qty) 覆盖
+            "ix_stock_flow_goods_id",
+            # 被包含列表所需列的覆盖索引取代
+            "ix_stock_in_date",
+            "ix_stock_out_date",
+        ],
+    )
+    # ix_stock_fifo / ix_stock_fefo 依赖 v4 新增的 version 列，分别由 v7 / v8 创建
+    _create_indexes(
+        connection,
+        [
+            "ix_stock_goods_batch_location",
+            "ix_stock_flow_goods_time",
+            "ix_stock_flow_time",
+            "ix_stock_in_date_list",
+            "ix_stock_out_date_list",
+            "ix_stock_daily_agg_day",
+        ],
+    )
+
+
+def _goods_fts(connection: Connection) -> None:
+    """商品全文检索影子表与同步触发器（原先每次启动都检查一遍）。"""
+    from .goods import ensure_goods_fts
+
+    ensure_goods_fts(connection)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _first_movement_month(connection: Connection, since: Optional[date]) -> Optional[date]:
+    """since（含）之后最早有出入库单的月份，没有则返回 None。"""
+    since_filter = "WHERE date >= :since" if since is not None else ""
+    first = connection.execute(
+        text(
+            f"SELECT min(day) FROM (SELECT min(date(date)) AS day FROM stock_in {since_filter}"
+            f" UNION ALL SELECT min(date(date)) FROM stock_out {since_filter})"
+        ),
+        {"since": since.isoformat()} if since is not None else {},
+    ).scalar()
+    return date.fromisoformat(first).replace(day=1) if first is not None else None
+
+
+def _backfill_daily_agg(connection: Connection, cursor: Optional[str]) -> Optional[str]:
+    """按月由出入库明细重建 stock_daily_agg，cursor 为下一个有单据的月份的 1 日。"""
+    from services.stock_daily_agg_service import StockDailyAggService
+
+    month = date.fromisoformat(cursor) if cursor else _first_movement_month(connection, None)
+    if month is None:
+        return None
+    following = _next_month(month)
+    rows = StockDailyAggService.rebuild(connection, month, date.fromordinal(following.toordinal() - 1))
+    logger.info("回填每日汇总 %s：%s 行", month.strftime("%Y-%m"), rows)
+    # 跳过没有单据的月份
+    month = _first_movement_month(connection, following)
+    return month.isoformat() if month is not None else None
+
+
+def _stock_row_version(connection: Connection) -> None:
+    """库存表增加行版本号列（出库扣减时检测并发修改）。"""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(stock)")}
+    if "version" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE stock ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+def _import_checkpoint(connection: Connection) -> None:
+    """单据导入断点表。"""
+    from models.import_checkpoint import ImportCheckpoint
+
+    ImportCheckpoint.__table__.create(connection, checkfirst=True)
+
+
+def _goods_stock_total(connection: Connection) -> None:
+    """商品库存合计表（库存预警），由库存表回填。"""
+    from models.goods_stock_total import GoodsStockTotal
+    from services.goods_stock_total_service import GoodsStockTotalService
+
+    GoodsStockTotal.__table__.create(connection, checkfirst=True)
+    GoodsStockTotalService.rebuild(connection)
+
+
+def _stock_fifo_with_version(connection: Connection) -> None:
+    """先进先出部分索引附带行版本号，出库候选行查询（读取版本号）重新只读索引。"""
+    _drop_indexes(connection, ["ix_stock_fifo"])
+    _create_indexes(connection, ["ix_stock_fifo"])
+
+
+def _stock_fefo_covering(connection: Connection) -> None:
+    """先到期先出部分索引附带批次、库位、行版本号与有效期，出库候选行查询只读索引。"""
+    _drop_indexes(connection, ["ix_stock_fefo"])
+    _create_indexes(connection, ["ix_stock_fefo"])
+
+
+# 版本号必须严格递增；已发布的步骤不得修改语义，只能追加新步骤
+MIGRATIONS: List[Migration] = [
+    Migration(1, "补建缺失的表与热点查询复合/覆盖索引", _tables_and_hot_query_indexes),
+    Migration(2, "商品全文检索索引", _goods_fts),
+    Migration(3, "按月回填每日出入库汇总", BatchedBackfill(_backfill_daily_agg)),
+    Migration(4, "库存行版本号", _stock_row_version),
+    Migration(5, "单据导入断点表", _import_checkpoint),
+    Migration(6, "商品库存合计与预警标记", _goods_stock_total),
+    Migration(7, "先进先出索引附带行版本号", _stock_fifo_with_version),
+    Migration(8, "先到期先出索引覆盖候选行查询", _stock_fefo_covering),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _run_backfill(engine: Engine, migration: Migration) -> None:
+    backfill: BatchedBackfill = migration.step
+    with engine.begin() as connection:
+        connection.exec_driver_sql(_PROGRESS_DDL)
+        cursor = connection.execute(
+            text("SELECT cursor FROM schema_migration_progress WHERE version = :version"),
+            {"version": migration.version},
+        ).scalar()
+    if cursor is not None:
+        logger.info("迁移 %s 从上次中断处继续：%s", migration.version, cursor)
+    while True:
+        with engine.begin() as connection:
+            cursor = backfill.run_batch(connection, cursor)
+            if cursor is None:
+                connection.execute(
+                    text("DELETE FROM schema_migration_progress WHERE version = :version"),
+                    {"version": migration.version},
+                )
+                _set_user_version(connection, migration.version)
+                return
+            connection.execute(
+                text(
+                    "INSERT INTO schema_migration_progress (version, cursor) VALUES (:version, :cursor)"
+                    " ON CONFLICT(version) DO UPDATE SET cursor = excluded.cursor,"
+                    " updated_at = CURRENT_TIMESTAMP"
+                ),
+                {"version": migration.version, "cursor": cursor},
+            )
+
+
+def migrate(engine: Engine) -> List[int]:
+    """把数据库升级到最新版本，返回本次应用的版本号列表。"""
+    with engine.connect() as connection:
+        current = get_user_version(connection)
+        if current >= LATEST_VERSION:
+            return []
+        fresh = current == 0 and not _table_exists(connection, "goods")
+
+    if fresh:
+        # 全新数据库：模型即最新结构（商品全文索引由 goods 表的 after_create 事件创建）
+        with engine.begin() as connection:
+            Base.metadata.create_all(bind=connection)
+            _set_user_version(connection, LATEST_VERSION)
+        logger.info("已创建数据库结构，版本 %s", LATEST_VERSION)
+        return [LATEST_VERSION]
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        logger.info("应用数据库迁移 %s：%s", migration.version, migration.description)
+        if isinstance(migration.step, BatchedBackfill):
+            _run_backfill(engine, migration)
+        else:
+            with engine.begin() as connection:
+                migration.step(connection)
+                _set_user_version(connection, migration.version)
+        applied.append(migration.version)
+    return applied
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import Column, Integer, ForeignKey, Numeric, String, Date
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, String, Date, Index, func, literal_column, text
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -17,9 +17,43 @@ class Stock(Base):
     batch_no = Column(String(50), nullable=True, comment="批次号")
     location = Column(String(100), nullable=True, comment="库位")
     expire_date = Column(Date, nullable=True, comment="有效期")
+    # 行版本号：每次修改数量时加 1，扣减时校验，发现并发写入造成的丢失更新
+    version = Column(Integer, nullable=False, default=0, server_default="0", comment="行版本号")
 
     goods = relationship("Goods", backref="stocks")
 
+    __table_args__ = (
+        # 入库定位 / 指定批次出库：按 (商品, 批次, 库位) 查找
+        Index("ix_stock_goods_batch_location", "goods_id", "batch_no", "location"),
+        # 出库分配只关心有货的行，用部分索引避免扫描已扣完的历史批次；
+        # 附带数量、批次、库位与行版本号使候选行查询与可用量汇总都只读索引
+        Index(
+            "ix_stock_fifo",
+            "goods_id",
+            "id",
+            "quantity",
+            "batch_no",
+            "location",
+            "version",
+            sqlite_where=text("quantity > 0"),
+        ),
+        # 先到期先出：无有效期的批次排在最后，表达式需与 stock_allocation 中的排序键一致；
+        # 与 ix_stock_fifo 一样附带候选行查询读取的列。SQLite 计算过滤条件时仍要读原始的
+        # expire_date 列（不会直接取用索引中的表达式值），因此也一并放入索引
+        Index(
+            "ix_stock_fefo",
+            "goods_id",
+            func.coalesce(literal_column("expire_date"), literal_column("'9999-12-31'")),
+            "id",
+            "quantity",
+            "batch_no",
+            "location",
+            "version",
+            "expire_date",
+            sqlite_where=text("quantity > 0"),
+        ),
+    )
+
     def is_expired(self, today: date | None = None) -> bool:
         if not self.expire_date:
             return False
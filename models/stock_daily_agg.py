@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, Date, Index
+
+from .base import Base
+
+
+class StockDailyAgg(Base):
+    """商品每日出入库汇总表：入库/出库单过账时增量维护，期间报表只读此表。"""
+
+    __tablename__ = "stock_daily_agg"
+
+    goods_id = Column(Integer, ForeignKey("goods.id"), primary_key=True)
+    day = Column(Date, primary_key=True, comment="业务日期")
+    qty_in = Column(Numeric(18, 4), nullable=False, default=0, comment="入库数量")
+    qty_out = Column(Numeric(18, 4), nullable=False, default=0, comment="出库数量（正数）")
+    value_in = Column(Numeric(18, 4), nullable=False, default=0, comment="入库金额")
+    value_out = Column(Numeric(18, 4), nullable=False, default=0, comment="出库金额")
+
+    __table_args__ = (
+        # 期间报表按日期范围扫描全部商品
+        Index("ix_stock_daily_agg_day", "day", "goods_id"),
+    )
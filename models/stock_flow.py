@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, ForeignKey, String, Numeric, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, String, Numeric, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from .base import Base
@@ -12,7 +12,7 @@ class StockFlow(Base):
     __tablename__ = "stock_flow"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    goods_id = Column(Integer, ForeignKey("goods.id"), nullable=False, index=True)
+    goods_id = Column(Integer, ForeignKey("goods.id"), nullable=False)
     change_type = Column(String(10), nullable=False, comment="in/out")
     change_qty = Column(Numeric(18, 4), nullable=False)
     ref_order_type = Column(String(20), nullable=False, comment="stock_in/stock_out")
@@ -21,3 +21,10 @@ class StockFlow(Base):
 
     goods = relationship("Goods")
 
+    __table_args__ = (
+        # 商品流水历史 / 历史时点结存 / 对账：按商品取一段时间的流水，只读索引即可求和
+        Index("ix_stock_flow_goods_time", "goods_id", "created_at", "change_qty"),
+        # 生成检查点 / 全部商品的时点结存：按时间范围扫描流水
+        Index("ix_stock_flow_time", "created_at", "goods_id", "change_qty"),
+    )
+
@@ -8,6 +8,7 @@ from sqlalchemy import (
     ForeignKey,
     Numeric,
     Text,
+    Index,
 )
 from sqlalchemy.orm import relationship
 
@@ -30,6 +31,11 @@ class StockOut(Base):
     user = relationship("User", backref="stock_out_orders")
     items = relationship("StockOutItem", back_populates="stock_out", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # 单据列表按日期范围倒序分页、明细导出按日期范围合并：索引覆盖列表所需列，无需回表
+        Index("ix_stock_out_date_list", "date", "order_no", "customer", "out_type", "user_id"),
+    )
+
 
 class StockOutItem(Base):
     """出库单明细表。"""
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime
+
+from .base import Base
+
+
+class StockSnapshotRun(Base):
+    """库存结存检查点：记录一次结存的时间点。
+
+    检查点 as_of 的结存数量 = 所有 created_at < as_of 的库存流水之和。
+    """
+
+    __tablename__ = "stock_snapshot_run"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    as_of = Column(DateTime, nullable=False, unique=True, index=True, comment="结存时间点")
+    goods_count = Column(Integer, nullable=False, default=0, comment="有结存的商品数")
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+
+class StockSnapshot(Base):
+    """各商品在检查点时刻的结存数量；结存为 0 的商品不保存。"""
+
+    __tablename__ = "stock_snapshot"
+
+    run_id = Column(Integer, ForeignKey("stock_snapshot_run.id"), primary_key=True)
+    goods_id = Column(Integer, ForeignKey("goods.id"), primary_key=True)
+    quantity = Column(Numeric(18, 4), nullable=False)
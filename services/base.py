@@ -1,9 +1,29 @@
+import random
+import sqlite3
+import time
 from contextlib import contextmanager
-from typing import Iterator
+from decimal import Decimal
+from typing import Callable, Iterator, Sequence, TypeVar
 
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 
-from models.base import SessionLocal
+from models.base import SessionLocal, WriteSessionLocal
+
+T = TypeVar("T")
+
+# SQLite 单条语句的绑定参数数量有限，IN 查询按此大小分块
+IN_CLAUSE_CHUNK = 500
+
+# 写事务遇到锁冲突时的重试：最多尝试次数，以及指数退避的初始/最大等待秒数。
+# 每次尝试本身已在 busy_timeout 内等待写锁，这里只处理等待超时与版本冲突。
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BASE_DELAY = 0.05
+WRITE_RETRY_MAX_DELAY = 1.0
+
+
+class ConcurrentUpdateError(Exception):
+    """写入时发现数据已被其他事务修改（行版本号不符），整个事务需要重做。"""
 
 
 @contextmanager
@@ -19,3 +39,57 @@ def get_session() -> Iterator[Session]:
     finally:
         session.close()
 
+
+def _is_busy(exc: OperationalError) -> bool:
+    orig = exc.orig
+    code = getattr(orig, "sqlite_errorcode", None)
+    if code is not None:
+        # 扩展错误码的低 8 位为主错误码（SQLITE_BUSY_SNAPSHOT 等同样视为 BUSY）
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "database is locked" in str(orig)
+
+
+def run_write_transaction(
+    work: Callable[[Session], T],
+    session_factory: sessionmaker = WriteSessionLocal,
+    attempts: int = WRITE_RETRY_ATTEMPTS,
+) -> T:
+    """在 BEGIN IMMEDIATE 写事务中执行 work(session) 并提交，返回 work 的结果。
+
+    遇到 SQLITE_BUSY（等待写锁超时）或 ConcurrentUpdateError 时回滚，
+    按指数退避（带随机抖动）重做整个事务，最多 attempts 次；其他异常回滚后直接抛出。
+    work 可能被执行多次，不应有事务之外的副作用。
+    """
+    attempt = 1
+    while True:
+        session: Session = session_factory()
+        try:
+            result = work(session)
+            session.commit()
+            return result
+        except (OperationalError, ConcurrentUpdateError) as exc:
+            session.rollback()
+            retryable = isinstance(exc, ConcurrentUpdateError) or _is_busy(exc)
+            if not retryable or attempt >= attempts:
+                raise
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        delay = min(WRITE_RETRY_MAX_DELAY, WRITE_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        time.sleep(delay * random.uniform(0.5, 1.0))
+        attempt += 1
+
+
+def chunked(values: Sequence[T], size: int = IN_CLAUSE_CHUNK) -> Iterator[Sequence[T]]:
+    """把序列按固定大小切块，用于拼接 IN 查询或分批写入。"""
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def to_decimal(value) -> Decimal:
+    """把界面/调用方传入的数量转换为 Decimal，避免与 Numeric 列混算出错。"""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
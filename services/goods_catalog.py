@@ -0,0 +1,213 @@
+import sys
+import threading
+import time
+from decimal import Decimal
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models.goods import Goods
+from .base import chunked
+
+
+class GoodsRecord:
+    """缓存中的商品信息，只保留单据与列表常用的字段。"""
+
+    __slots__ = ("id", "code", "name", "category", "spec", "unit", "min_stock", "is_active")
+
+    def __init__(
+        self,
+        id: int,
+        code: str,
+        name: str,
+        category: Optional[str],
+        spec: Optional[str],
+        unit: Optional[str],
+        min_stock: Optional[Decimal],
+        is_active: bool,
+    ) -> None:
+        self.id = id
+        self.code = code
+        self.name = name
+        self.category = category
+        self.spec = spec
+        self.unit = unit
+        self.min_stock = min_stock
+        self.is_active = is_active
+
+    def __repr__(self) -> str:
+        return f"GoodsRecord(id={self.id!r}, code={self.code!r}, name={self.name!r})"
+
+
+_RECORD_COLUMNS = (
+    Goods.id,
+    Goods.code,
+    Goods.name,
+    Goods.category,
+    Goods.spec,
+    Goods.unit,
+    Goods.min_stock,
+    Goods.is_active,
+)
+
+
+class CatalogStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class GoodsCatalog:
+    """进程内的商品目录缓存（读穿透）。
+
+    按 id 缓存商品记录，并维护 编码 -> id 的索引与分类列表；未命中时批量查询并写入缓存。
+    本进程内经 GoodsService 修改商品会立即失效对应条目；其他工作站的修改
+    在 ttl 秒后整体过期时才会看到（商品资料在一个班次内基本不变）。
+    """
+
+    def __init__(self, ttl: float = 600.0) -> None:
+        self.ttl = ttl
+        self._by_id: dict[int, GoodsRecord] = {}
+        self._by_code: dict[str, int] = {}
+        self._categories: Optional[List[str]] = None
+        self._loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 查询 ----------
+    def get_many(self, session: Session, goods_ids: Iterable[int]) -> dict[int, GoodsRecord]:
+        """按 id 批量取商品记录，返回 {id: 记录}，不存在的 id 不在结果中。"""
+        wanted = set(goods_ids)
+        with self._lock:
+            self._expire_if_stale()
+            found = {gid: self._by_id[gid] for gid in wanted if gid in self._by_id}
+            self._count(len(found), len(wanted) - len(found))
+        missing = sorted(wanted - found.keys())
+        for chunk in chunked(missing):
+            found.update(self._load(session, Goods.id.in_(chunk)))
+        return found
+
+    def get(self, session: Session, goods_id: int) -> Optional[GoodsRecord]:
+        return self.get_many(session, [goods_id]).get(goods_id)
+
+    def resolve_codes(self, session: Session, codes: Iterable[str]) -> dict[str, int]:
+        """批量把商品编码解析为 id，返回 {编码: id}，不存在的编码不在结果中。"""
+        wanted = set(codes)
+        with self._lock:
+            self._expire_if_stale()
+            resolved = {code: self._by_code[code] for code in wanted if code in self._by_code}
+            self._count(len(resolved), len(wanted) - len(resolved))
+        missing = sorted(wanted - resolved.keys())
+        for chunk in chunked(missing):
+            for record in self._load(session, Goods.code.in_(chunk)).values():
+                resolved[record.code] = record.id
+        return resolved
+
+    def verify_codes(self, session: Session, resolved: dict[str, int]) -> dict[str, int]:
+        """在写事务中按商品表核对 {编码: id}（通常来自 resolve_codes），返回核对后的结果。
+
+        缓存要到 ttl 后才过期，其间其他工作站可能已修改或复用了编码。过账前在同一事务中
+        按 id 批量查一次编码：不一致的条目失效后按编码重新查询，已不存在的编码不在结果中。
+        """
+        current: dict[int, str] = {}
+        for chunk in chunked(sorted(set(resolved.values()))):
+            rows = session.execute(select(Goods.id, Goods.code).where(Goods.id.in_(chunk)))
+            current.update({gid: code for gid, code in rows})
+        verified = {code: gid for code, gid in resolved.items() if current.get(gid) == code}
+        stale = sorted(resolved.keys() - verified.keys())
+        for code in stale:
+            self.invalidate(resolved[code])
+        for chunk in chunked(stale):
+            for record in self._load(session, Goods.code.in_(chunk)).values():
+                verified[record.code] = record.id
+        return verified
+
+    def categories(self, session: Session) -> List[str]:
+        """启用商品的分类列表（去重、排序）。"""
+        with self._lock:
+            self._expire_if_stale()
+            if self._categories is not None:
+                self._count(1, 0)
+                return list(self._categories)
+            self._count(0, 1)
+        values = sorted(
+            session.scalars(
+                select(Goods.category)
+                .where(Goods.is_active.is_(True), Goods.category.is_not(None))
+                .distinct()
+            )
+        )
+        with self._lock:
+            self._categories = values
+        return list(values)
+
+    def stats(self) -> CatalogStats:
+        with self._lock:
+            return CatalogStats(self.hits, self.misses, len(self._by_id))
+
+    # ---------- 失效 ----------
+    def invalidate(self, goods_id: Optional[int] = None) -> None:
+        """移除指定商品（None 表示清空全部），分类列表随之失效。"""
+        with self._lock:
+            self._categories = None
+            if goods_id is None:
+                self._clear()
+                return
+            record = self._by_id.pop(goods_id, None)
+            if record is not None and self._by_code.get(record.code) == goods_id:
+                del self._by_code[record.code]
+
+    def invalidate_on_commit(self, session: Session, goods_id: Optional[int] = None) -> None:
+        """立即失效，并在会话提交后再失效一次。
+
+        提交前其他会话仍可能读到旧数据并写回缓存，提交后的失效保证缓存不会停留在旧值上。
+        """
+        self.invalidate(goods_id)
+        event.listen(session, "after_commit", lambda _session: self.invalidate(goods_id), once=True)
+
+    # ---------- 内部 ----------
+    def _load(self, session: Session, condition) -> dict[int, GoodsRecord]:
+        records = {}
+        for gid, code, name, category, spec, unit, min_stock, is_active in session.execute(
+            select(*_RECORD_COLUMNS).where(condition)
+        ):
+            # 分类、规格、单位取值重复度高，驻留后所有记录共用同一个字符串对象
+            records[gid] = GoodsRecord(
+                gid,
+                code,
+                name,
+                category and sys.intern(category),
+                spec and sys.intern(spec),
+                unit and sys.intern(unit),
+                min_stock,
+                is_active,
+            )
+        with self._lock:
+            for record in records.values():
+                self._by_id[record.id] = record
+                self._by_code[record.code] = record.id
+        return records
+
+    def _count(self, hits: int, misses: int) -> None:
+        self.hits += hits
+        self.misses += misses
+
+    def _expire_if_stale(self) -> None:
+        if time.monotonic() - self._loaded_at >= self.ttl:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._by_id.clear()
+        self._by_code.clear()
+        self._categories = None
+        self._loaded_at = time.monotonic()
+
+
+GOODS_CATALOG = GoodsCatalog()
@@ -0,0 +1,234 @@
+import math
+from itertools import islice
+from time import perf_counter
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models.goods import goods_fts_triggers_suspended
+from .goods_catalog import GOODS_CATALOG
+from .goods_stock_total_service import GoodsStockTotalService
+from .import_readers import ImportProgress, RowError, map_headers, open_table, parse_number
+from .pagination import COUNT_CACHE
+
+# 每批校验并写入的行数
+IMPORT_BATCH_SIZE = 20_000
+
+# 表头别名 -> 字段名；每个字段的第一个别名用于错误提示
+GOODS_IMPORT_COLUMNS = {
+    "编码": "code",
+    "商品编码": "code",
+    "code": "code",
+    "名称": "name",
+    "商品名称": "name",
+    "name": "name",
+    "分类": "category",
+    "category": "category",
+    "规格": "spec",
+    "spec": "spec",
+    "单位": "unit",
+    "unit": "unit",
+    "采购价": "buy_price",
+    "buy_price": "buy_price",
+    "销售价": "sell_price",
+    "sell_price": "sell_price",
+    "最低库存": "min_stock",
+    "min_stock": "min_stock",
+    "备注": "remark",
+    "remark": "remark",
+}
+
+# 文本字段的显示名与最大长度（与 Goods 模型一致），备注不限长度
+_TEXT_FIELDS = {
+    "code": ("编码", 50),
+    "name": ("名称", 200),
+    "category": ("分类", 100),
+    "spec": ("规格", 200),
+    "unit": ("单位", 20),
+    "remark": ("备注", None),
+}
+_NUMBER_FIELDS = {"buy_price": "采购价", "sell_price": "销售价", "min_stock": "最低库存"}
+
+# 每批数据先写入临时表，再以整批语句写入 goods 并维护 goods_fts
+_STAGE = "goods_import_stage"
+
+
+class GoodsImportResult(NamedTuple):
+    total_rows: int  # 文件中的数据行数（不含空行）
+    inserted: int
+    updated: int
+    errors: List[RowError]
+    elapsed: float
+
+    @property
+    def imported(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.elapsed if self.elapsed else 0.0
+
+
+def _validate_batch(
+    rows: List[tuple],
+    columns: dict[str, int],
+    seen_codes: dict[str, int],
+    errors: List[RowError],
+) -> List[tuple]:
+    """按列校验一批行，返回可写入的行（按 columns 的字段顺序）；有问题的行记入 errors 并跳过。"""
+    problems: dict[int, List[str]] = {}
+    values: List[list] = []
+    for field, index in columns.items():
+        data = [values[index] for _, values in rows]
+        if field in _TEXT_FIELDS:
+            label, limit = _TEXT_FIELDS[field]
+            if limit is not None and max(map(len, data)) > limit:
+                for k in [k for k, text in enumerate(data) if len(text) > limit]:
+                    problems.setdefault(k, []).append(f"{label}超过 {limit} 个字符")
+            data = [text or None for text in data]
+        else:
+            label = _NUMBER_FIELDS[field]
+            try:
+                numbers = [float(text) if text else None for text in data]
+                # 与 parse_number 的规则一致：NaN、无穷大与负数都不合法
+                valid = all(math.isfinite(n) and n >= 0 for n in numbers if n is not None)
+            except ValueError:
+                valid = False
+            if not valid:
+                # 整列快速转换失败时再逐个解析，定位出错的行
+                numbers = []
+                for k, text in enumerate(data):
+                    try:
+                        numbers.append(parse_number(text, label))
+                    except ValueError as exc:
+                        problems.setdefault(k, []).append(str(exc))
+                        numbers.append(None)
+            data = numbers
+        values.append(data)
+
+    codes = values[0]
+    for k, name in enumerate(values[1]):
+        if not name:
+            problems.setdefault(k, []).append("名称不能为空")
+    accepted = []
+    for k, row in enumerate(zip(*values)):
+        line = rows[k][0]
+        code = codes[k] or ""
+        if not code:
+            problems.setdefault(k, []).insert(0, "编码不能为空")
+        elif code in seen_codes:
+            problems.setdefault(k, []).insert(0, f"编码与第 {seen_codes[code]} 行重复")
+        if k in problems:
+            errors.append(RowError(line, code, "；".join(problems[k])))
+            continue
+        seen_codes[code] = line
+        accepted.append(row)
+    return accepted
+
+
+def _upsert_batch(connection: Connection, fields: List[str], rows: List[tuple]) -> int:
+    """把一批行 upsert 到 goods 并同步 goods_fts，返回其中已存在（被更新）的行数。"""
+    names = ", ".join(fields)
+    connection.exec_driver_sql(f"DELETE FROM {_STAGE}")
+    connection.exec_driver_sql(
+        f"INSERT INTO {_STAGE} ({names}) VALUES ({', '.join('?' * len(fields))})", rows
+    )
+    # 已存在的商品：先按旧值从全文索引中删除
+    existing = connection.exec_driver_sql(
+        f"SELECT count(*) FROM goods JOIN {_STAGE} s ON s.code = goods.code"
+    ).scalar()
+    connection.exec_driver_sql(
+        f"""
+        INSERT INTO goods_fts(goods_fts, rowid, code, name, category, spec)
+        SELECT 'delete', g.id, g.code, g.name, g.category, g.spec
+        FROM goods g JOIN {_STAGE} s ON s.code = g.code
+        """
+    )
+    # 文件中留空的可选列不覆盖已有值；启用状态保持不变
+    updates = ", ".join(
+        f"{f} = excluded.{f}" if f == "name" else f"{f} = coalesce(excluded.{f}, goods.{f})"
+        for f in fields
+        if f != "code"
+    )
+    # INSERT ... SELECT 与 ON CONFLICT 连用时 SELECT 必须带 WHERE，否则语法有歧义
+    connection.exec_driver_sql(
+        f"""
+        INSERT INTO goods ({names}, is_active)
+        SELECT {names}, 1 FROM {_STAGE} WHERE true
+        ON CONFLICT(code) DO UPDATE SET {updates}
+        """
+    )
+    connection.exec_driver_sql(
+        f"""
+        INSERT INTO goods_fts(rowid, code, name, category, spec)
+        SELECT g.id, g.code, g.name, g.category, g.spec
+        FROM goods g JOIN {_STAGE} s ON s.code = g.code
+        """
+    )
+    if "min_stock" in fields:
+        # 最低库存可能变化，重算本批商品的库存预警标记
+        GoodsStockTotalService.refresh_flags(
+            connection,
+            text(f"goods_id IN (SELECT g.id FROM goods g JOIN {_STAGE} s ON s.code = g.code)"),
+        )
+    return existing
+
+
+class GoodsImportService:
+    """从 CSV / xlsx 批量导入商品。"""
+
+    @staticmethod
+    def import_file(
+        session: Session,
+        filepath: str,
+        progress: Optional[ImportProgress] = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> GoodsImportResult:
+        """流式读取文件，按批校验后以 INSERT ... ON CONFLICT(code) DO UPDATE 写入。
+
+        第一行为表头，至少包含 编码、名称 两列（也可用英文列名）。已存在的编码更新为文件中的值，
+        留空的可选列保留原值。所有批次在调用方的同一事务中写入，出错的行只记入结果中的
+        errors，不影响其他行。progress 中抛出 ImportCancelled 可中止导入（调用方回滚）。
+        """
+        started = perf_counter()
+        source = open_table(filepath)
+        columns = map_headers(source.headers, GOODS_IMPORT_COLUMNS, ["code", "name"])
+        # 编码、名称固定排在前两列
+        columns = {
+            "code": columns["code"],
+            "name": columns["name"],
+            **{f: i for f, i in columns.items() if f not in ("code", "name")},
+        }
+        fields = list(columns)
+
+        errors: List[RowError] = []
+        seen_codes: dict[str, int] = {}
+        total_rows = written = updated = 0
+        connection = session.connection()
+        # 临时表随连接留在连接池中，先删除可能残留的旧表（列可能不同）
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{_STAGE}")
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE {_STAGE} ("
+            + ", ".join(f"{f} TEXT PRIMARY KEY" if f == "code" else f for f in fields)
+            + ")"
+        )
+        try:
+            with goods_fts_triggers_suspended(connection):
+                while batch := list(islice(source.rows, batch_size)):
+                    total_rows += len(batch)
+                    rows = _validate_batch(batch, columns, seen_codes, errors)
+                    if rows:
+                        updated += _upsert_batch(connection, fields, rows)
+                        written += len(rows)
+                    if progress is not None:
+                        progress(total_rows, max(source.total, total_rows))
+        finally:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{_STAGE}")
+
+        COUNT_CACHE.invalidate("goods")
+        GOODS_CATALOG.invalidate_on_commit(session)
+        return GoodsImportResult(
+            total_rows, written - updated, updated, errors, perf_counter() - started
+        )
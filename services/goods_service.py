@@ -1,10 +1,14 @@
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import Session
 
-from models.goods import Goods
-from .base import get_session
+from models.goods import GOODS_FTS, Goods, goods_fts_match, use_goods_fts
+from models.goods_stock_total import GoodsStockTotal
+from .base import chunked, get_session
+from .goods_catalog import GOODS_CATALOG
+from .goods_stock_total_service import GoodsStockTotalService
+from .pagination import COUNT_CACHE, KeysetPage, decode_cursor, encode_cursor, resolve_total
 
 
 class GoodsService:
@@ -54,6 +58,8 @@ class GoodsService:
         )
         session.add(goods)
         session.flush()
+        COUNT_CACHE.invalidate("goods")
+        GOODS_CATALOG.invalidate_on_commit(session, goods.id)
         return goods
 
     @staticmethod
@@ -72,10 +78,16 @@ class GoodsService:
             )
             if exists:
                 raise ValueError(f"商品编码已存在: {new_code}")
+        old_min_stock = goods.min_stock
         for key, value in fields.items():
             if hasattr(goods, key):
                 setattr(goods, key, value)
         session.flush()
+        if goods.min_stock != old_min_stock:
+            # 最低库存变化后重算该商品的预警标记
+            GoodsStockTotalService.refresh_flags(session, GoodsStockTotal.goods_id == goods_id)
+        COUNT_CACHE.invalidate("goods")
+        GOODS_CATALOG.invalidate_on_commit(session, goods_id)
         return goods
 
     @staticmethod
@@ -86,6 +98,8 @@ class GoodsService:
         # 逻辑删除，避免破坏已有单据和库存
         goods.is_active = False
         session.flush()
+        COUNT_CACHE.invalidate("goods")
+        GOODS_CATALOG.invalidate_on_commit(session, goods_id)
 
     @staticmethod
     def list(
@@ -95,10 +109,19 @@ class GoodsService:
         page: int = 1,
         page_size: int = 50,
     ) -> Tuple[List[Goods], int]:
-        """返回 (数据列表, 总条数)。"""
+        """返回 (数据列表, 总条数)。
+
+        关键字足够长时走 goods_fts 全文索引并按相关度排序，否则按编码排序。
+        """
         stmt = select(Goods).where(Goods.is_active.is_(True))
         count_stmt = select(func.count()).select_from(Goods).where(Goods.is_active.is_(True))
-        if keyword:
+        order_by = (Goods.code,)
+        if keyword and use_goods_fts(keyword):
+            match = goods_fts_match(keyword)
+            stmt = stmt.join(GOODS_FTS, GOODS_FTS.c.rowid == Goods.id).where(match)
+            count_stmt = count_stmt.join(GOODS_FTS, GOODS_FTS.c.rowid == Goods.id).where(match)
+            order_by = (GOODS_FTS.c.rank, Goods.code)
+        elif keyword:
             kw = f"%{keyword}%"
             stmt = stmt.where((Goods.code.like(kw)) | (Goods.name.like(kw)))
             count_stmt = count_stmt.where((Goods.code.like(kw)) | (Goods.name.like(kw)))
@@ -109,10 +132,78 @@ class GoodsService:
         total = int(session.scalar(count_stmt) or 0)
 
         stmt = (
-            stmt.order_by(Goods.code)
+            stmt.order_by(*order_by)
             .offset((page - 1) * page_size)
             .limit(page_size)
         )
         rows = session.execute(stmt).scalars().all()
         return rows, total
 
+    @staticmethod
+    def list_page(
+        session: Session,
+        keyword: Optional[str] = None,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        page_size: int = 50,
+        count: str = "none",
+    ) -> KeysetPage:
+        """游标分页：按 (编码, id) 从上一页最后一行之后继续取，深分页同样只是一次索引定位。
+
+        count 取值见 pagination.COUNT_MODES；关键字仅作过滤，结果始终按编码排序。
+        """
+        conditions = [Goods.is_active.is_(True)]
+        if keyword:
+            conditions.append(GoodsService.keyword_condition(keyword, Goods.id))
+        if category:
+            conditions.append(Goods.category == category)
+
+        stmt = select(Goods).where(*conditions)
+        if cursor:
+            last_code, last_id = decode_cursor(cursor, 2)
+            stmt = stmt.where(tuple_(Goods.code, Goods.id) > tuple_(last_code, last_id))
+        stmt = stmt.order_by(Goods.code, Goods.id).limit(page_size + 1)
+        rows = session.execute(stmt).scalars().all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor((rows[-1].code, rows[-1].id))
+        total = resolve_total(
+            count,
+            "goods",
+            (keyword, category),
+            lambda: int(
+                session.scalar(select(func.count()).select_from(Goods).where(*conditions)) or 0
+            ),
+        )
+        return KeysetPage(rows, next_cursor, total)
+
+    @staticmethod
+    def resolve_codes(session: Session, codes: Iterable[str]) -> dict[str, int]:
+        """批量把商品编码解析为 id，返回 {编码: id}，不存在的编码不在结果中。
+
+        只查询 (code, id) 两列，按块拼接 IN 条件，不加载 ORM 对象；
+        需要经常重复解析时使用 goods_catalog.GOODS_CATALOG.resolve_codes。
+        """
+        resolved: dict[str, int] = {}
+        for chunk in chunked(sorted(set(codes))):
+            for code, goods_id in session.execute(
+                select(Goods.code, Goods.id).where(Goods.code.in_(chunk))
+            ):
+                resolved[code] = goods_id
+        return resolved
+
+    @staticmethod
+    def keyword_condition(keyword: str, goods_id_column):
+        """把商品关键字转换为对 goods_id_column 的过滤条件（全文索引或 LIKE）。"""
+        if use_goods_fts(keyword):
+            return goods_id_column.in_(
+                select(GOODS_FTS.c.rowid).where(goods_fts_match(keyword)).correlate(None)
+            )
+        kw = f"%{keyword}%"
+        return goods_id_column.in_(
+            select(Goods.id)
+            .where((Goods.code.like(kw)) | (Goods.name.like(kw)))
+            .correlate(None)
+        )
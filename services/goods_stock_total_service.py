@@ -0,0 +1,102 @@
+from decimal import Decimal
+from typing import Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, true, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.goods import Goods
+from models.goods_stock_total import GoodsStockTotal
+from models.stock import Stock
+from .base import chunked, to_decimal
+
+_TOTAL = GoodsStockTotal.__table__
+
+# 与部分索引 ix_goods_stock_total_below_min 的条件一致，预警查询才能只读该索引
+BELOW_MIN = _TOTAL.c.below_min == true()
+
+_accumulate = sqlite_insert(_TOTAL)
+_ACCUMULATE = _accumulate.on_conflict_do_update(
+    index_elements=[_TOTAL.c.goods_id],
+    set_={"qty": _TOTAL.c.qty + _accumulate.excluded.qty},
+)
+
+# 合计低于商品最低库存时为真；未设置最低库存（NULL）时比较结果为 NULL，按假处理
+_BELOW_MIN_VALUE = func.coalesce(
+    _TOTAL.c.qty
+    < select(Goods.min_stock).where(Goods.id == _TOTAL.c.goods_id).scalar_subquery(),
+    False,
+)
+
+
+class GoodsStockTotalService:
+    """维护 goods_stock_total 商品库存合计表及其预警标记。"""
+
+    @staticmethod
+    def record_in(session: Session, items: Iterable[Mapping]) -> None:
+        """入库单过账时累加各商品的库存合计。"""
+        GoodsStockTotalService._accumulate(session, items, 1)
+
+    @staticmethod
+    def record_out(session: Session, items: Iterable[Mapping]) -> None:
+        """出库单过账时扣减各商品的库存合计。"""
+        GoodsStockTotalService._accumulate(session, items, -1)
+
+    @staticmethod
+    def refresh_flags(session: Session, condition=None) -> None:
+        """按当前合计与最低库存重算预警标记；condition 为对 goods_stock_total 的过滤条件，None 表示全部。
+
+        修改商品最低库存后调用；合计本身不变。
+        """
+        stmt = update(_TOTAL).values(below_min=_BELOW_MIN_VALUE)
+        if condition is not None:
+            stmt = stmt.where(condition)
+        session.execute(stmt)
+
+    @staticmethod
+    def warning_goods_ids():
+        """库存低于最低库存的商品 id 子查询（只读部分索引）。"""
+        return select(_TOTAL.c.goods_id).where(BELOW_MIN).correlate(None)
+
+    @staticmethod
+    def rebuild(session: Session, goods_ids: Optional[Sequence[int]] = None) -> int:
+        """由库存表重建指定商品（默认全部）的合计与预警标记，返回重建后的合计行数。
+
+        在调用方的事务中执行：先删除这些商品的合计行，再以 INSERT ... SELECT 按商品分组写回。
+        """
+        if goods_ids is None:
+            return GoodsStockTotalService._rebuild(session, None)
+        return sum(
+            GoodsStockTotalService._rebuild(session, chunk)
+            for chunk in chunked(sorted(set(goods_ids)))
+        )
+
+    @staticmethod
+    def _rebuild(session: Session, goods_ids: Optional[Sequence[int]]) -> int:
+        total_filter = [] if goods_ids is None else [_TOTAL.c.goods_id.in_(goods_ids)]
+        stock_filter = [] if goods_ids is None else [Stock.goods_id.in_(goods_ids)]
+        session.execute(delete(_TOTAL).where(*total_filter))
+        result = session.execute(
+            insert(_TOTAL).from_select(
+                ["goods_id", "qty", "below_min"],
+                select(Stock.goods_id, func.sum(Stock.quantity), False)
+                .where(*stock_filter)
+                .group_by(Stock.goods_id),
+            )
+        )
+        GoodsStockTotalService.refresh_flags(session, *total_filter)
+        return result.rowcount
+
+    @staticmethod
+    def _accumulate(session: Session, items: Iterable[Mapping], sign: int) -> None:
+        totals: dict[int, Decimal] = {}
+        for item in items:
+            qty = abs(to_decimal(item["quantity"])) * sign
+            totals[item["goods_id"]] = totals.get(item["goods_id"], Decimal(0)) + qty
+        if not totals:
+            return
+        session.execute(
+            _ACCUMULATE,
+            [{"goods_id": gid, "qty": qty, "below_min": False} for gid, qty in totals.items()],
+        )
+        GoodsStockTotalService.refresh_flags(session, _TOTAL.c.goods_id.in_(list(totals)))
@@ -0,0 +1,146 @@
+import csv
+import math
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Sequence, Tuple
+
+from .report_writers import CsvStreamWriter
+
+# 支持导入的文件格式：扩展名 -> 文件对话框过滤器
+IMPORT_FORMATS = {
+    ".csv": "CSV 文件 (*.csv)",
+    ".xlsx": "Excel 文件 (*.xlsx)",
+}
+IMPORT_FILE_FILTER = "数据文件 (*.csv *.xlsx);;" + ";;".join(IMPORT_FORMATS.values())
+
+# 进度回调：(已处理行数, 预计总行数)；回调中抛出 ImportCancelled 即可中止导入
+ImportProgress = Callable[[int, int], None]
+
+ERROR_REPORT_HEADERS = ["行号", "关键字", "错误"]
+
+
+class ImportCancelled(Exception):
+    """导入被用户取消。"""
+
+
+class RowError(NamedTuple):
+    """导入文件中某一行的错误；line 为文件中的行号（表头为第 1 行）。"""
+
+    line: int
+    key: str
+    message: str
+
+
+class TableSource(NamedTuple):
+    headers: List[str]
+    # (行号, 单元格文本列表)：文本已去掉首尾空白，不足表头列数的补空串，整行为空的行已跳过
+    rows: Iterator[Tuple[int, List[str]]]
+    # 预计数据行数（不含表头），用于显示进度
+    total: int
+
+
+def _count_csv_lines(path: Path) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            count += chunk.count(b"\n")
+    return count
+
+
+def _csv_rows(path: Path, width: int) -> Iterator[Tuple[int, List[str]]]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for line, values in enumerate(reader, start=2):
+            values = [value.strip() for value in values]
+            if any(values):
+                if len(values) < width:
+                    values += [""] * (width - len(values))
+                yield line, values
+
+
+def _xlsx_rows(workbook, width: int) -> Iterator[Tuple[int, List[str]]]:
+    sheet = workbook.worksheets[0]
+    try:
+        for line, values in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+            values = [cell_text(value) for value in values]
+            if any(values):
+                if len(values) < width:
+                    values += [""] * (width - len(values))
+                yield line, values
+    finally:
+        # 只读模式下工作簿一直占用文件句柄，读完即关闭
+        workbook.close()
+
+
+def open_table(filepath: str) -> TableSource:
+    """打开 CSV（UTF-8，可带 BOM）或 xlsx（第一个工作表）文件，第一行为表头，逐行流式读取。"""
+    path = Path(filepath)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            headers = [cell_text(h) for h in next(csv.reader(f), [])]
+        return TableSource(
+            headers,
+            _csv_rows(path, len(headers)),
+            max(_count_csv_lines(path) - 1, 0),
+        )
+    if suffix == ".xlsx":
+        from openpyxl import load_workbook  # 依赖较重，仅在导入时加载
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        sheet = workbook.worksheets[0]
+        headers = [cell_text(h) for h in next(sheet.iter_rows(max_row=1, values_only=True), ())]
+        return TableSource(
+            headers,
+            _xlsx_rows(workbook, len(headers)),
+            max((sheet.max_row or 1) - 1, 0),
+        )
+    raise ValueError(f"不支持的导入文件格式：{path.suffix or path.name}")
+
+
+def map_headers(
+    headers: Sequence[str],
+    aliases: Mapping[str, str],
+    required: Sequence[str],
+) -> Dict[str, int]:
+    """按表头别名（中文或英文列名）返回 {字段名: 列下标}，缺少必需列时抛出 ValueError。"""
+    columns: Dict[str, int] = {}
+    for index, header in enumerate(headers):
+        field = aliases.get(header) or aliases.get(header.lower())
+        if field and field not in columns:
+            columns[field] = index
+    missing = [field for field in required if field not in columns]
+    if missing:
+        labels = {field: name for name, field in reversed(list(aliases.items()))}
+        raise ValueError("导入文件缺少必需的列：" + "、".join(labels[f] for f in missing))
+    return columns
+
+
+def cell_text(value) -> str:
+    """把单元格的值转为去掉首尾空白的字符串；Excel 中的整数值不带 “.0”。"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def parse_number(text: str, label: str) -> float | None:
+    """解析非负数字，空白返回 None，格式错误时抛出 ValueError。"""
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        raise ValueError(f"{label}不是有效数字: {text}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{label}不是有效数字: {text}")
+    if number < 0:
+        raise ValueError(f"{label}不能为负数: {text}")
+    return number
+
+
+def write_error_report(filepath: str, errors: Sequence[RowError]) -> None:
+    """把导入错误写成 CSV（行号、关键字、错误）。"""
+    with CsvStreamWriter(filepath, ERROR_REPORT_HEADERS) as writer:
+        writer.write_rows(errors)
@@ -0,0 +1,369 @@
+import hashlib
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.base import WriteSessionLocal
+from models.import_checkpoint import ImportCheckpoint
+from .base import run_write_transaction
+from .goods_catalog import GOODS_CATALOG
+from .import_readers import ImportProgress, RowError, map_headers, open_table, parse_number
+from .stock_allocation import DEFAULT_STRATEGY
+from .stock_in_service import StockInItemData, StockInService
+from .stock_out_service import StockOutItemData, StockOutService
+
+# 导入类型 -> 显示名
+ORDER_IMPORT_KINDS = {"stock_in": "入库", "stock_out": "出库"}
+
+# 每个写事务提交的单据数；断点随每批一起提交
+ORDER_BATCH_SIZE = 200
+
+# 表头别名 -> 字段名；每个字段的第一个别名用于错误提示
+ORDER_IMPORT_COLUMNS = {
+    "单号": "order_no",
+    "order_no": "order_no",
+    "日期": "date",
+    "date": "date",
+    "供应商": "partner",
+    "客户": "partner",
+    "supplier": "partner",
+    "customer": "partner",
+    "商品编码": "code",
+    "编码": "code",
+    "code": "code",
+    "数量": "quantity",
+    "quantity": "quantity",
+    "单价": "price",
+    "price": "price",
+    "批次": "batch_no",
+    "batch_no": "batch_no",
+    "库位": "location",
+    "location": "location",
+    "出库类型": "out_type",
+    "out_type": "out_type",
+    "备注": "remark",
+    "remark": "remark",
+}
+
+
+class _OrderLine(NamedTuple):
+    line: int
+    code: str
+    quantity: float
+    price: Optional[float]
+    batch_no: Optional[str]
+    location: Optional[str]
+
+
+class _Order:
+    """文件中连续的同一单号的明细行；单据级字段取自第一行。"""
+
+    __slots__ = (
+        "order_no",
+        "first_line",
+        "last_line",
+        "line_count",
+        "date",
+        "partner",
+        "out_type",
+        "remark",
+        "lines",
+        "errors",
+    )
+
+    def __init__(self, order_no: str, first_line: int) -> None:
+        self.order_no = order_no
+        self.first_line = first_line
+        self.last_line = first_line
+        self.line_count = 1
+        self.date: Optional[datetime] = None
+        self.partner: Optional[str] = None
+        self.out_type = "sale"
+        self.remark: Optional[str] = None
+        self.lines: List[_OrderLine] = []
+        self.errors: List[RowError] = []
+
+
+class OrderImportResult(NamedTuple):
+    total_lines: int  # 文件中的数据行数（不含空行）
+    orders_posted: int
+    orders_failed: int
+    orders_skipped: int  # 断点之前已处理过的单据
+    errors: List[RowError]
+    elapsed: float
+    resumed_from: int  # 断点所在行号，0 表示从头导入
+    completed_before: bool = False  # 该文件此前已全部导入过，本次未做任何处理
+
+    @property
+    def orders_per_second(self) -> float:
+        return self.orders_posted / self.elapsed if self.elapsed else 0.0
+
+
+def file_fingerprint(filepath: str) -> str:
+    """文件内容的 SHA-256，用于识别同一个导入文件（改名或换目录后仍能续导）。"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_date(text: str) -> Optional[datetime]:
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text.replace("/", "-"))
+    except ValueError:
+        raise ValueError(f"日期格式应为 YYYY-MM-DD：{text}") from None
+
+
+def _iter_orders(rows: Iterator, columns: dict[str, int], now: datetime) -> Iterator[_Order]:
+    """按单号把连续的明细行分组并逐行校验；同一单号的明细必须连续。"""
+    index = columns["order_no"]
+    started: dict[str, int] = {}
+
+    def get(values: List[str], field: str) -> str:
+        return values[columns[field]] if field in columns else ""
+
+    for order_no, group in groupby(rows, key=lambda row: row[1][index]):
+        group = list(group)
+        order = _Order(order_no, group[0][0])
+        order.last_line = group[-1][0]
+        order.line_count = len(group)
+        if not order_no:
+            order.errors.extend(RowError(line, "", "单号不能为空") for line, _ in group)
+            yield order
+            continue
+        if order_no in started:
+            order.errors.append(
+                RowError(
+                    order.first_line,
+                    order_no,
+                    f"同一单号的明细必须连续，该单号已在第 {started[order_no]} 行出现",
+                )
+            )
+            yield order
+            continue
+        started[order_no] = order.first_line
+
+        first = group[0][1]
+        try:
+            order.date = _parse_date(get(first, "date")) or now
+        except ValueError as exc:
+            order.errors.append(RowError(order.first_line, order_no, str(exc)))
+        order.partner = get(first, "partner") or None
+        order.out_type = get(first, "out_type") or "sale"
+        order.remark = get(first, "remark") or None
+        for line, values in group:
+            problems = []
+            code = get(values, "code")
+            if not code:
+                problems.append("商品编码不能为空")
+            quantity = price = None
+            try:
+                quantity = parse_number(get(values, "quantity"), "数量")
+                if not quantity:
+                    problems.append("数量必须大于 0")
+            except ValueError as exc:
+                problems.append(str(exc))
+            try:
+                price = parse_number(get(values, "price"), "单价")
+            except ValueError as exc:
+                problems.append(str(exc))
+            if problems:
+                order.errors.append(RowError(line, order_no, "；".join(problems)))
+                continue
+            order.lines.append(
+                _OrderLine(
+                    line,
+                    code,
+                    quantity,
+                    price,
+                    get(values, "batch_no") or None,
+                    get(values, "location") or None,
+                )
+            )
+        yield order
+
+
+def _post_order(
+    session: Session,
+    kind: str,
+    order: _Order,
+    goods_ids: dict[str, int],
+    strategy: str,
+    user_id: Optional[int],
+) -> None:
+    items = [
+        {
+            "goods_id": goods_ids[line.code],
+            "quantity": line.quantity,
+            "price": line.price,
+            "batch_no": line.batch_no,
+            "location": line.location,
+        }
+        for line in order.lines
+    ]
+    if kind == "stock_in":
+        StockInService.create_stock_in(
+            session,
+            order_no=order.order_no,
+            supplier=order.partner,
+            date=order.date,
+            user_id=user_id,
+            items=[StockInItemData(**item) for item in items],
+            remark=order.remark,
+        )
+    else:
+        StockOutService.create_stock_out(
+            session,
+            order_no=order.order_no,
+            customer=order.partner,
+            date=order.date,
+            user_id=user_id,
+            out_type=order.out_type,
+            items=[StockOutItemData(**item) for item in items],
+            remark=order.remark,
+            strategy=strategy,
+        )
+
+
+class _BatchOutcome(NamedTuple):
+    posted: int
+    failed: int
+    errors: List[RowError]
+
+
+class OrderImportService:
+    """从 CSV / xlsx 批量导入入库单或出库单（每行一条明细，按单号分组）。"""
+
+    @staticmethod
+    def import_file(
+        filepath: str,
+        kind: str,
+        progress: Optional[ImportProgress] = None,
+        strategy: str = DEFAULT_STRATEGY,
+        user_id: Optional[int] = None,
+        batch_orders: int = ORDER_BATCH_SIZE,
+        session_factory: sessionmaker = WriteSessionLocal,
+    ) -> OrderImportResult:
+        """流式读取文件，按单号分组后逐批过账，可从中断处续导。
+
+        表头至少包含 单号、商品编码、数量；可选 日期、供应商/客户、单价、批次、库位、
+        出库类型、备注，单据级字段取自该单第一行，日期留空时取导入时间。
+        每批 batch_orders 张单据在一个 BEGIN IMMEDIATE 写事务中提交，每张单据使用独立的
+        SAVEPOINT：任一明细有误或过账失败（单号重复、库存不足等）时整单不入账，
+        记入 errors 并继续下一单。文件断点与该批单据一同提交，进程崩溃或在 progress
+        中抛出 ImportCancelled 后，再次导入同一文件会跳过已提交的单据。
+        """
+        if kind not in ORDER_IMPORT_KINDS:
+            raise ValueError(f"未知的导入类型：{kind}")
+        started = perf_counter()
+        fingerprint = file_fingerprint(filepath)
+        source = open_table(filepath)
+        columns = map_headers(
+            source.headers, ORDER_IMPORT_COLUMNS, ["order_no", "code", "quantity"]
+        )
+        filename = Path(filepath).name
+
+        resumed_from, completed_before = run_write_transaction(
+            lambda session: OrderImportService._load_checkpoint(session, kind, fingerprint),
+            session_factory,
+        )
+        if completed_before:
+            return OrderImportResult(0, 0, 0, 0, [], perf_counter() - started, resumed_from, True)
+
+        errors: List[RowError] = []
+        posted = failed = skipped = 0
+        lines = 0
+        batch: List[_Order] = []
+
+        def flush(completed: bool) -> None:
+            nonlocal posted, failed
+            outcome = run_write_transaction(
+                lambda session: OrderImportService._post_batch(
+                    session, kind, fingerprint, filename, batch, strategy, user_id, completed
+                ),
+                session_factory,
+            )
+            posted += outcome.posted
+            failed += outcome.failed
+            errors.extend(outcome.errors)
+            batch.clear()
+            if progress is not None:
+                progress(lines, max(source.total, lines))
+
+        for order in _iter_orders(source.rows, columns, datetime.now()):
+            lines += order.line_count
+            if order.last_line <= resumed_from:
+                skipped += 1
+                continue
+            batch.append(order)
+            if len(batch) >= batch_orders:
+                flush(completed=False)
+        flush(completed=True)
+
+        return OrderImportResult(
+            lines, posted, failed, skipped, errors, perf_counter() - started, resumed_from
+        )
+
+    @staticmethod
+    def _load_checkpoint(session: Session, kind: str, fingerprint: str) -> tuple[int, bool]:
+        """返回 (断点行号, 是否已全部导入)。"""
+        checkpoint = session.get(ImportCheckpoint, (kind, fingerprint))
+        if checkpoint is None:
+            return 0, False
+        return checkpoint.last_line, checkpoint.completed
+
+    @staticmethod
+    def _post_batch(
+        session: Session,
+        kind: str,
+        fingerprint: str,
+        filename: str,
+        orders: List[_Order],
+        strategy: str,
+        user_id: Optional[int],
+        completed: bool,
+    ) -> _BatchOutcome:
+        """在当前写事务中过账一批单据并推进断点。"""
+        codes = {line.code for order in orders for line in order.lines}
+        # 缓存可能落后于其他工作站的修改，过账前在本事务中核对编码与 id 的对应关系
+        goods_ids = GOODS_CATALOG.verify_codes(session, GOODS_CATALOG.resolve_codes(session, codes))
+        errors: List[RowError] = []
+        posted = 0
+        for order in orders:
+            order_errors = list(order.errors)
+            order_errors.extend(
+                RowError(line.line, order.order_no, f"商品编码不存在：{line.code}")
+                for line in order.lines
+                if line.code not in goods_ids
+            )
+            if not order_errors:
+                try:
+                    with session.begin_nested():
+                        _post_order(session, kind, order, goods_ids, strategy, user_id)
+                    posted += 1
+                    continue
+                except ValueError as exc:
+                    order_errors.append(RowError(order.first_line, order.order_no, str(exc)))
+            errors.extend(order_errors)
+
+        checkpoint = session.get(ImportCheckpoint, (kind, fingerprint))
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(
+                kind=kind, fingerprint=fingerprint, last_line=0, orders_posted=0, orders_failed=0
+            )
+            session.add(checkpoint)
+        checkpoint.filename = filename
+        if orders:
+            checkpoint.last_line = orders[-1].last_line
+            checkpoint.last_order_no = orders[-1].order_no
+        checkpoint.orders_posted += posted
+        checkpoint.orders_failed += len(orders) - posted
+        checkpoint.completed = completed
+        return _BatchOutcome(posted, len(orders) - posted, errors)
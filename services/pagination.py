@@ -0,0 +1,79 @@
+import base64
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# 总条数的获取方式：none 不统计；cached 使用带过期时间的缓存值；exact 每次精确 COUNT
+COUNT_MODES = ("none", "cached", "exact")
+
+
+class KeysetPage(NamedTuple):
+    """游标分页结果。next_cursor 为 None 表示已经是最后一页。"""
+
+    rows: List[Any]
+    next_cursor: Optional[str]
+    total: Optional[int]
+
+
+def encode_cursor(values: Tuple[Any, ...]) -> str:
+    """把最后一行的排序键编码为不透明的游标字符串。"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("无效的分页游标") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return tuple(values)
+
+
+class CountCache:
+    """按 (命名空间, 查询条件) 缓存总条数，过期或数据变更后重新统计。"""
+
+    def __init__(self, ttl: float = 30.0) -> None:
+        self.ttl = ttl
+        self._values: Dict[Tuple[str, Any], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, namespace: str, key: Any, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get((namespace, key))
+        if cached and now - cached[0] < self.ttl:
+            return cached[1]
+        value = compute()
+        with self._lock:
+            self._values[(namespace, key)] = (now, value)
+        return value
+
+    def invalidate(self, namespace: str | None = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._values.clear()
+            else:
+                for key in [k for k in self._values if k[0] == namespace]:
+                    del self._values[key]
+
+
+COUNT_CACHE = CountCache()
+
+
+def resolve_total(
+    mode: str,
+    namespace: str,
+    key: Any,
+    compute: Callable[[], int],
+) -> Optional[int]:
+    """按 COUNT_MODES 中的方式返回总条数。"""
+    if mode == "none":
+        return None
+    if mode == "cached":
+        return COUNT_CACHE.get_or_compute(namespace, key, compute)
+    if mode == "exact":
+        return compute()
+    raise ValueError(f"未知的统计方式: {mode}")
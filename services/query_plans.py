@@ -0,0 +1,164 @@
+"""热点查询的执行计划检查。
+
+用 EXPLAIN QUERY PLAN 检查入库定位、出库分配、单据列表、流水历史等热点查询，
+出现整表扫描（SCAN 某张表）或需要临时排序（TEMP B-TREE FOR ORDER BY）即视为退化。
+扫描部分索引只读取符合索引条件的行（如库存预警），不算整表扫描。
+索引或查询改动后运行 python manage.py check-plans，有退化时退出码为 1。
+"""
+
+import re
+from datetime import date, datetime
+from typing import List, NamedTuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from models.base import Base
+from models.stock import Stock
+from models.stock_flow import StockFlow
+from models.stock_in import StockIn
+from models.stock_out import StockOut
+from .goods_stock_total_service import GoodsStockTotalService
+from .report_service import ReportService
+from .stock_allocation import IN_STOCK, get_strategy
+from .stock_snapshot_service import StockSnapshotService
+
+_FULL_SCAN = re.compile(r"^SCAN (\w+)")
+_SCAN_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+# 构造查询用的示例参数，只影响执行计划的形状，不要求数据存在
+_SAMPLE_GOODS = [1, 2, 3]
+_SAMPLE_START = datetime(2024, 1, 1)
+_SAMPLE_END = datetime(2024, 1, 31, 23, 59, 59)
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    plan: List[str]
+    problems: List[str]
+
+
+def _hot_queries() -> list:
+    """(名称, 查询语句, 是否要求无临时排序)。"""
+    items = [
+        {"goods_id": gid, "quantity": 1, "price": None, "batch_no": None, "location": None}
+        for gid in _SAMPLE_GOODS
+    ]
+    today = date(2024, 1, 15)
+    queries = [
+        (
+            "入库：按 (商品, 批次, 库位) 定位库存行",
+            select(Stock.id, Stock.goods_id, Stock.batch_no, Stock.location).where(
+                Stock.goods_id.in_(_SAMPLE_GOODS)
+            ),
+            False,
+        ),
+        (
+            "出库：可用库存汇总",
+            select(Stock.goods_id, func.sum(Stock.quantity))
+            .where(Stock.goods_id.in_(_SAMPLE_GOODS), IN_STOCK)
+            .group_by(Stock.goods_id),
+            False,
+        ),
+    ]
+    for strategy in ("fifo", "fefo"):
+        allocation = get_strategy(strategy)
+        queries.append(
+            (
+                f"出库：{allocation.label}候选库存行",
+                select(
+                    Stock.id,
+                    Stock.goods_id,
+                    Stock.quantity,
+                    Stock.batch_no,
+                    Stock.location,
+                    Stock.version,
+                )
+                .where(Stock.goods_id.in_(_SAMPLE_GOODS), *allocation.stock_filter(items, today))
+                .order_by(*allocation.order_by()),
+                True,
+            )
+        )
+    queries += [
+        (
+            "入库单列表：按日期倒序",
+            select(StockIn.order_no, StockIn.supplier, StockIn.date, StockIn.user_id)
+            .where(StockIn.date.between(_SAMPLE_START, _SAMPLE_END))
+            .order_by(StockIn.date.desc())
+            .limit(200),
+            True,
+        ),
+        (
+            "出库单列表：按日期倒序",
+            select(StockOut.order_no, StockOut.customer, StockOut.date, StockOut.out_type, StockOut.user_id)
+            .where(StockOut.date.between(_SAMPLE_START, _SAMPLE_END))
+            .order_by(StockOut.date.desc())
+            .limit(200),
+            True,
+        ),
+        (
+            "商品流水历史：按时间排序",
+            select(StockFlow.created_at, StockFlow.change_qty)
+            .where(
+                StockFlow.goods_id == _SAMPLE_GOODS[0],
+                StockFlow.created_at.between(_SAMPLE_START, _SAMPLE_END),
+            )
+            .order_by(StockFlow.created_at),
+            True,
+        ),
+        (
+            "出入库明细导出：UNION ALL 按日期合并",
+            ReportService.inout_detail_statement(_SAMPLE_START, _SAMPLE_END),
+            True,
+        ),
+        (
+            "库存预警：低于最低库存的商品的库存行",
+            select(Stock)
+            .where(Stock.goods_id.in_(GoodsStockTotalService.warning_goods_ids()))
+            .order_by(Stock.goods_id, Stock.id)
+            .limit(51),
+            True,
+        ),
+        (
+            "历史时点结存：指定商品",
+            StockSnapshotService.balance_statement(_SAMPLE_END, None, _SAMPLE_GOODS),
+            False,
+        ),
+    ]
+    return queries
+
+
+def explain(session: Session, stmt) -> List[str]:
+    """返回查询的执行计划（每个节点一行）。"""
+    bind = session.get_bind()
+    sql = str(stmt.compile(bind, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def check_hot_query_plans(session: Session) -> List[PlanCheck]:
+    """检查所有热点查询的执行计划，返回每个查询的计划与发现的问题。"""
+    tables = set(Base.metadata.tables)
+    partial_indexes = {
+        index.name
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+        if index.dialect_options["sqlite"]["where"] is not None
+    }
+    results = []
+    for name, stmt, require_index_order in _hot_queries():
+        plan = explain(session, stmt)
+        problems = []
+        for line in plan:
+            match = _FULL_SCAN.match(line)
+            index = _SCAN_INDEX.search(line)
+            if (
+                match
+                and match.group(1) in tables
+                and not (index and index.group(1) in partial_indexes)
+            ):
+                problems.append(f"整表扫描：{line}")
+            if require_index_order and _TEMP_SORT in line:
+                problems.append(f"临时排序：{line}")
+        results.append(PlanCheck(name, plan, problems))
+    return results
@@ -0,0 +1,232 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from time import perf_counter
+from typing import List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models.base import create_sqlite_engine
+from models.goods import Goods
+from models.stock import Stock
+from models.stock_flow import StockFlow
+from .base import chunked, to_decimal
+from .goods_stock_total_service import GoodsStockTotalService
+from .pagination import COUNT_CACHE
+
+# 数量列为 Numeric(18, 4)，对账时按 4 位小数比较，忽略 SQLite 浮点求和的尾差
+_QUANTUM = Decimal("0.0001")
+# 每个工作进程分得的商品 id 区间数，区间切得更细可以平衡各进程的负载
+_PARTITIONS_PER_WORKER = 4
+
+# 按主键调整库存数量（delta 可正可负），配合 executemany 一次写回全部修正
+_ADJUST_STOCK = (
+    update(Stock.__table__)
+    .where(Stock.__table__.c.id == bindparam("stock_id"))
+    .values(
+        quantity=Stock.__table__.c.quantity
+        + bindparam("delta", type_=Stock.__table__.c.quantity.type),
+        version=Stock.__table__.c.version + 1,
+    )
+)
+
+
+class Discrepancy(NamedTuple):
+    """库存表与流水不一致的商品。"""
+
+    goods_id: int
+    expected: Decimal  # 流水合计
+    actual: Decimal  # 库存表合计
+
+    @property
+    def diff(self) -> Decimal:
+        return self.expected - self.actual
+
+
+class ReconcileReport(NamedTuple):
+    """一次对账的结果与吞吐统计。"""
+
+    discrepancies: List[Discrepancy]
+    goods_checked: int
+    flow_rows: int
+    partitions: int
+    workers: int
+    elapsed: float
+    fixed: int = 0
+
+    @property
+    def flow_rows_per_second(self) -> float:
+        return self.flow_rows / self.elapsed if self.elapsed else 0.0
+
+
+def _quantize(value) -> Decimal:
+    return to_decimal(value or 0).quantize(_QUANTUM)
+
+
+def _balances(connection, goods_filter_flow, goods_filter_stock) -> Tuple[dict, dict, int]:
+    """返回 (流水合计, 库存合计, 扫描的流水行数)。"""
+    expected: dict[int, Decimal] = {}
+    flow_rows = 0
+    stmt = (
+        select(StockFlow.goods_id, func.sum(StockFlow.change_qty), func.count())
+        .where(goods_filter_flow)
+        .group_by(StockFlow.goods_id)
+    )
+    for goods_id, total, rows in connection.execute(stmt):
+        expected[goods_id] = _quantize(total)
+        flow_rows += rows
+    stmt = (
+        select(Stock.goods_id, func.sum(Stock.quantity))
+        .where(goods_filter_stock)
+        .group_by(Stock.goods_id)
+    )
+    actual = {goods_id: _quantize(total) for goods_id, total in connection.execute(stmt)}
+    return expected, actual, flow_rows
+
+
+def _diff(expected: dict, actual: dict) -> List[Discrepancy]:
+    result = []
+    for goods_id in sorted(expected.keys() | actual.keys()):
+        exp = expected.get(goods_id, Decimal(0))
+        act = actual.get(goods_id, Decimal(0))
+        if exp != act:
+            result.append(Discrepancy(goods_id, exp, act))
+    return result
+
+
+def _reconcile_range(db_path: str, low: int, high: int) -> Tuple[List[Discrepancy], int, int]:
+    """工作进程：只读地核对 [low, high] 区间内商品的库存，返回 (差异, 商品数, 流水行数)。"""
+    engine = create_sqlite_engine(db_path, pragmas={"query_only": 1, "busy_timeout": 5000})
+    try:
+        with engine.connect() as connection:
+            expected, actual, flow_rows = _balances(
+                connection,
+                StockFlow.goods_id.between(low, high),
+                Stock.goods_id.between(low, high),
+            )
+    finally:
+        engine.dispose()
+    return _diff(expected, actual), len(expected.keys() | actual.keys()), flow_rows
+
+
+def _partitions(low: int, high: int, count: int) -> List[Tuple[int, int]]:
+    step = max(1, -(-(high - low + 1) // count))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+class ReconcileService:
+    """库存表与库存流水的对账与修复。
+
+    库存表由入库/出库原地增减维护，这里以流水合计为准逐商品核对。
+    商品 id 区间分给多个进程并行只读核对；修复在主进程的单个事务内完成。
+    """
+
+    @staticmethod
+    def reconcile(
+        session: Session,
+        workers: int | None = None,
+        fix: bool = False,
+    ) -> ReconcileReport:
+        """对账；fix=True 时把库存表修正为流水合计。"""
+        started = perf_counter()
+        workers = workers or os.cpu_count() or 1
+        db_path = session.get_bind().url.database
+        low, high = session.execute(select(func.min(Goods.id), func.max(Goods.id))).one()
+        flow_low, flow_high = session.execute(
+            select(func.min(StockFlow.goods_id), func.max(StockFlow.goods_id))
+        ).one()
+        bounds = [value for value in (low, high, flow_low, flow_high) if value is not None]
+        if not bounds:
+            return ReconcileReport([], 0, 0, 0, workers, perf_counter() - started)
+
+        ranges = _partitions(min(bounds), max(bounds), workers * _PARTITIONS_PER_WORKER)
+        discrepancies: List[Discrepancy] = []
+        goods_checked = flow_rows = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_reconcile_range, db_path, lo, hi) for lo, hi in ranges]
+            for future in futures:
+                found, goods, rows = future.result()
+                discrepancies.extend(found)
+                goods_checked += goods
+                flow_rows += rows
+
+        fixed = 0
+        if fix and discrepancies:
+            fixed = ReconcileService.apply_fixes(session, [d.goods_id for d in discrepancies])
+        return ReconcileReport(
+            discrepancies,
+            goods_checked,
+            flow_rows,
+            len(ranges),
+            workers,
+            perf_counter() - started,
+            fixed,
+        )
+
+    @staticmethod
+    def apply_fixes(session: Session, goods_ids: Sequence[int]) -> int:
+        """在当前事务内把指定商品的库存修正为流水合计，返回实际修正的商品数。
+
+        修正前在事务内重新核对一次，跳过期间已被正常过账修正或不再有差异的商品。
+        差额为正时计入无批次/库位的库存行（不存在则新建）；
+        差额为负时按先进先出从有货的行扣减，不足部分记到无批次/库位的行上。
+        """
+        discrepancies: List[Discrepancy] = []
+        for chunk in chunked(sorted(set(goods_ids))):
+            expected, actual, _ = _balances(
+                session,
+                StockFlow.goods_id.in_(chunk),
+                Stock.goods_id.in_(chunk),
+            )
+            discrepancies.extend(_diff(expected, actual))
+        if not discrepancies:
+            return 0
+
+        # 每个商品的无批次/库位库存行
+        plain_rows: dict[int, int] = {}
+        # 每个商品有货的行，按 id（即入库先后）排序
+        stocked: dict[int, list] = {}
+        ids = [d.goods_id for d in discrepancies]
+        for chunk in chunked(ids):
+            stmt = (
+                select(Stock.id, Stock.goods_id, Stock.quantity, Stock.batch_no, Stock.location)
+                .where(Stock.goods_id.in_(chunk))
+                .order_by(Stock.goods_id, Stock.id)
+            )
+            for stock_id, goods_id, quantity, batch_no, location in session.execute(stmt):
+                if batch_no is None and location is None:
+                    plain_rows.setdefault(goods_id, stock_id)
+                if quantity > 0:
+                    stocked.setdefault(goods_id, []).append((stock_id, to_decimal(quantity)))
+
+        adjustments: dict[int, Decimal] = {}
+        inserts = []
+        for item in discrepancies:
+            remain = item.diff
+            if remain < 0:
+                for stock_id, quantity in stocked.get(item.goods_id, []):
+                    if remain >= 0:
+                        break
+                    take = min(quantity, -remain)
+                    adjustments[stock_id] = adjustments.get(stock_id, Decimal(0)) - take
+                    remain += take
+            if remain == 0:
+                continue
+            stock_id = plain_rows.get(item.goods_id)
+            if stock_id is None:
+                inserts.append({"goods_id": item.goods_id, "quantity": remain})
+            else:
+                adjustments[stock_id] = adjustments.get(stock_id, Decimal(0)) + remain
+
+        if adjustments:
+            session.execute(
+                _ADJUST_STOCK,
+                [{"stock_id": stock_id, "delta": qty} for stock_id, qty in adjustments.items()],
+            )
+        if inserts:
+            session.execute(insert(Stock), inserts)
+        # 修正后的商品按库存表重算合计与预警标记
+        GoodsStockTotalService.rebuild(session, ids)
+        COUNT_CACHE.invalidate("stock")
+        return len(discrepancies)
@@ -0,0 +1,282 @@
+import csv
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import types as sqltypes
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+# Excel 单个工作表最多 1,048,576 行（含表头）
+EXCEL_MAX_ROWS = 1_048_576
+# 流式读取时每批从游标取出的行数
+STREAM_CHUNK_SIZE = 2000
+# Parquet 每个行组包含的行数
+PARQUET_ROW_GROUP_SIZE = 50_000
+# 每写出多少行回调一次进度
+PROGRESS_INTERVAL = 2000
+
+# 进度回调：(已写出行数, 总行数)，总行数未知时为 0；回调中抛出 ExportCancelled 即可中止导出
+ProgressCallback = Callable[[int, int], None]
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消。"""
+
+
+def stream_rows(
+    session: Session, stmt: Executable, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[Row]:
+    """按批次迭代查询结果，不一次性把整个结果集载入内存。"""
+    result = session.execute(stmt, execution_options={"yield_per": chunk_size})
+    for partition in result.partitions():
+        yield from partition
+
+
+def _batches(rows: Iterable[Sequence], size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ExcelStreamWriter:
+    """基于 openpyxl write_only 模式的流式 xlsx 写入器。
+
+    行数据直接写入临时文件，内存占用与总行数无关；单个工作表写满后
+    自动续写到 “Sheet1 (2)”、“Sheet1 (3)” …，每个工作表都带表头。
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        headers: Sequence[str],
+        sheet_title: str = "Sheet1",
+        max_rows: int = EXCEL_MAX_ROWS,
+    ) -> None:
+        from openpyxl import Workbook  # 报表依赖较重，仅在导出时加载
+
+        if max_rows < 2:
+            raise ValueError("每个工作表至少需要容纳表头和一行数据")
+        self.filepath = filepath
+        self.headers = list(headers)
+        self.sheet_title = sheet_title
+        self.max_rows = max_rows
+        self.rows_written = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheet_count = 0
+
+    def _new_sheet(self) -> None:
+        self._sheet_count += 1
+        title = self.sheet_title
+        if self._sheet_count > 1:
+            title = f"{self.sheet_title} ({self._sheet_count})"
+        self._sheet = self._workbook.create_sheet(title)
+        self._sheet.append(self.headers)
+        self._sheet_rows = 1
+
+    def write_rows(self, rows: Iterable[Sequence]) -> int:
+        """追加多行数据，返回本次写入的行数。"""
+        count = 0
+        for row in rows:
+            if self._sheet is None or self._sheet_rows >= self.max_rows:
+                self._new_sheet()
+            self._sheet.append(list(row))
+            self._sheet_rows += 1
+            count += 1
+        self.rows_written += count
+        return count
+
+    def close(self) -> None:
+        """保存文件；没有任何数据时也会输出只含表头的工作表。"""
+        if self._sheet is None:
+            self._new_sheet()
+        self._workbook.save(self.filepath)
+
+    def discard(self) -> None:
+        """放弃导出：关闭各工作表的写入流并删除 openpyxl 的临时文件，不保存工作簿。"""
+        for sheet in self._workbook.worksheets:
+            if sheet._rows is not None:
+                sheet._rows.close()
+            if sheet._writer is not None:
+                sheet._writer.close()
+                sheet._writer.cleanup()
+        self._workbook = None
+        self._sheet = None
+
+    def __enter__(self) -> "ExcelStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class CsvStreamWriter:
+    """流式 CSV 写入器：UTF-8 带 BOM，Excel 双击打开不会乱码。"""
+
+    def __init__(self, filepath: str, headers: Sequence[str]) -> None:
+        self.filepath = filepath
+        self.rows_written = 0
+        self._file = open(filepath, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(headers)
+
+    def write_rows(self, rows: Iterable[Sequence]) -> int:
+        """追加多行数据，返回本次写入的行数。"""
+        count = 0
+        for batch in _batches(rows, STREAM_CHUNK_SIZE):
+            self._writer.writerows(batch)
+            count += len(batch)
+        self.rows_written += count
+        return count
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CsvStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _arrow_type(pa, column_type: sqltypes.TypeEngine):
+    """把 SQLAlchemy 列类型映射为 Arrow 类型，未知类型一律按字符串处理。"""
+    if isinstance(column_type, sqltypes.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, sqltypes.Date):
+        return pa.date32()
+    if isinstance(column_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(column_type, sqltypes.Float):
+        return pa.float64()
+    if isinstance(column_type, sqltypes.Numeric):
+        precision = column_type.precision or 38
+        scale = column_type.scale if column_type.scale is not None else 10
+        return pa.decimal128(precision, scale)
+    return pa.string()
+
+
+class ParquetStreamWriter:
+    """流式 Parquet 写入器：按行组把数据转成列式数组写出，供下游分析使用。
+
+    依赖 pyarrow（可选依赖），列类型由查询语句的列类型推导。
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        headers: Sequence[str],
+        column_types: Sequence[sqltypes.TypeEngine],
+    ) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("导出 Parquet 需要先安装 pyarrow：pip install pyarrow") from exc
+
+        if len(headers) != len(column_types):
+            raise ValueError("表头与列类型数量不一致")
+        self._pa = pa
+        self.filepath = filepath
+        self.rows_written = 0
+        self._schema = pa.schema(
+            [(name, _arrow_type(pa, column_type)) for name, column_type in zip(headers, column_types)]
+        )
+        self._writer = pq.ParquetWriter(filepath, self._schema)
+
+    def write_rows(self, rows: Iterable[Sequence]) -> int:
+        """追加多行数据，返回本次写入的行数。"""
+        pa = self._pa
+        count = 0
+        for batch in _batches(rows, PARQUET_ROW_GROUP_SIZE):
+            columns = zip(*batch)
+            table = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+                schema=self._schema,
+            )
+            self._writer.write_table(table)
+            count += len(batch)
+        self.rows_written += count
+        return count
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "ParquetStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# 导出格式 -> (文件扩展名, 文件对话框过滤器)
+EXPORT_FORMATS = {
+    "xlsx": (".xlsx", "Excel 文件 (*.xlsx)"),
+    "csv": (".csv", "CSV 文件 (*.csv)"),
+    "parquet": (".parquet", "Parquet 文件 (*.parquet)"),
+}
+DEFAULT_FORMAT = "xlsx"
+
+
+def open_writer(
+    fmt: str,
+    filepath: str,
+    headers: Sequence[str],
+    column_types: Sequence[sqltypes.TypeEngine],
+):
+    """按导出格式创建对应的流式写入器。"""
+    if fmt == "xlsx":
+        return ExcelStreamWriter(filepath, headers)
+    if fmt == "csv":
+        return CsvStreamWriter(filepath, headers)
+    if fmt == "parquet":
+        return ParquetStreamWriter(filepath, headers, column_types)
+    raise ValueError(f"不支持的导出格式：{fmt}")
+
+
+def _report_progress(
+    rows: Iterable[Sequence], total: int, progress: ProgressCallback
+) -> Iterator[Sequence]:
+    written = 0
+    progress(0, total)
+    for row in rows:
+        yield row
+        written += 1
+        if written % PROGRESS_INTERVAL == 0:
+            progress(written, total)
+    progress(written, total)
+
+
+def export_query(
+    session: Session,
+    stmt,
+    filepath: str,
+    headers: Sequence[str],
+    fmt: str = DEFAULT_FORMAT,
+    progress: ProgressCallback | None = None,
+    total: int | None = None,
+) -> int:
+    """把查询结果流式写入文件，返回导出的行数。
+
+    total 是用于计算百分比的总行数，由调用方从代价低的来源取得（如单据明细行数）；
+    这里不对导出语句本身做 COUNT，否则大导出要把数据扫描两遍。未给出时进度只报告已写出行数。
+    导出失败或被取消时删除已写出的部分文件。
+    """
+    column_types = [column.type for column in stmt.selected_columns]
+    rows = stream_rows(session, stmt)
+    if progress is not None:
+        rows = _report_progress(rows, total or 0, progress)
+    try:
+        with open_writer(fmt, filepath, headers, column_types) as writer:
+            return writer.write_rows(rows)
+    except BaseException:
+        Path(filepath).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,94 @@
+from datetime import date
+from typing import Dict, List
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.stock import Stock
+
+# 只分配有货的库存行；写成字面量以匹配部分索引的 WHERE quantity > 0
+IN_STOCK = Stock.quantity > literal_column("0")
+
+# 先到期先出的排序键，必须与 models.stock 中 ix_stock_fefo 的表达式保持一致
+EXPIRE_SORT_KEY = func.coalesce(Stock.expire_date, literal_column("'9999-12-31'"))
+
+
+class AllocationStrategy:
+    """出库分配策略：决定扣减哪些库存行以及扣减顺序。
+
+    每个策略的过滤条件与排序都对应 models.stock 中的一个复合索引，
+    使候选行查询保持为按商品的索引范围扫描，不需要额外排序。
+    """
+
+    name = ""
+    label = ""
+
+    def stock_filter(self, items: List[dict], today: date) -> List[ColumnElement]:
+        """可参与分配的库存行条件（库存充足校验与候选行查询共用）。"""
+        return [IN_STOCK]
+
+    def order_by(self) -> tuple:
+        return (Stock.goods_id, Stock.id)
+
+    def matches(self, item: dict, batch_no: str | None, location: str | None) -> bool:
+        """候选库存行是否可用于某一条出库明细。"""
+        return True
+
+
+class FifoStrategy(AllocationStrategy):
+    """先进先出：按库存行 id 顺序扣减（ix_stock_fifo）。"""
+
+    name = "fifo"
+    label = "先进先出"
+
+
+class FefoStrategy(AllocationStrategy):
+    """先到期先出：按有效期从早到晚扣减，已过期批次不参与分配（ix_stock_fefo）。"""
+
+    name = "fefo"
+    label = "先到期先出"
+
+    def stock_filter(self, items: List[dict], today: date) -> List[ColumnElement]:
+        # 过期批次在索引范围之外，直接由 SQLite 跳过
+        return [IN_STOCK, EXPIRE_SORT_KEY >= today]
+
+    def order_by(self) -> tuple:
+        return (Stock.goods_id, EXPIRE_SORT_KEY, Stock.id)
+
+
+class BatchLocationStrategy(AllocationStrategy):
+    """指定批次/库位：明细填写了批次或库位时只从匹配的库存行扣减（ix_stock_goods_batch_location）。"""
+
+    name = "batch"
+    label = "指定批次/库位"
+
+    def stock_filter(self, items: List[dict], today: date) -> List[ColumnElement]:
+        conditions = [IN_STOCK]
+        batches = {item.get("batch_no") for item in items}
+        if None not in batches:
+            conditions.append(Stock.batch_no.in_(sorted(batches)))
+        locations = {item.get("location") for item in items}
+        if None not in locations:
+            conditions.append(Stock.location.in_(sorted(locations)))
+        return conditions
+
+    def matches(self, item: dict, batch_no: str | None, location: str | None) -> bool:
+        if item.get("batch_no") is not None and item["batch_no"] != batch_no:
+            return False
+        if item.get("location") is not None and item["location"] != location:
+            return False
+        return True
+
+
+STRATEGIES: Dict[str, AllocationStrategy] = {
+    strategy.name: strategy
+    for strategy in (FifoStrategy(), FefoStrategy(), BatchLocationStrategy())
+}
+DEFAULT_STRATEGY = FifoStrategy.name
+
+
+def get_strategy(name: str | None) -> AllocationStrategy:
+    strategy = STRATEGIES.get(name or DEFAULT_STRATEGY)
+    if strategy is None:
+        raise ValueError(f"未知的出库分配策略: {name}")
+    return strategy
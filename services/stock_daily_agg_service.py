@@ -0,0 +1,121 @@
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Mapping
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.stock_daily_agg import StockDailyAgg
+from models.stock_in import StockIn, StockInItem
+from models.stock_out import StockOut, StockOutItem
+from .base import to_decimal
+
+_AGG = StockDailyAgg.__table__
+_MEASURES = ("qty_in", "qty_out", "value_in", "value_out")
+
+
+def _upsert_statement(stmt):
+    """同一 (商品, 日期) 已有汇总行时累加各数量/金额，否则新增。"""
+    return stmt.on_conflict_do_update(
+        index_elements=[_AGG.c.goods_id, _AGG.c.day],
+        set_={name: _AGG.c[name] + stmt.excluded[name] for name in _MEASURES},
+    )
+
+
+_ACCUMULATE = _upsert_statement(sqlite_insert(_AGG))
+
+
+class StockDailyAggService:
+    """维护 stock_daily_agg 每日汇总表。"""
+
+    @staticmethod
+    def record_in(session: Session, day: date, items: Iterable[Mapping]) -> None:
+        """入库单过账时累加当日入库数量与金额。"""
+        StockDailyAggService._accumulate(session, day, items, "qty_in", "value_in")
+
+    @staticmethod
+    def record_out(session: Session, day: date, items: Iterable[Mapping]) -> None:
+        """出库单过账时累加当日出库数量与金额（数量按正数记）。"""
+        StockDailyAggService._accumulate(session, day, items, "qty_out", "value_out")
+
+    @staticmethod
+    def _accumulate(
+        session: Session,
+        day: date,
+        items: Iterable[Mapping],
+        qty_field: str,
+        value_field: str,
+    ) -> None:
+        totals: dict[int, list[Decimal]] = {}
+        for item in items:
+            qty = abs(to_decimal(item["quantity"]))
+            price = item.get("price")
+            value = qty * to_decimal(price) if price is not None else Decimal(0)
+            entry = totals.setdefault(item["goods_id"], [Decimal(0), Decimal(0)])
+            entry[0] += qty
+            entry[1] += value
+        if not totals:
+            return
+        rows = []
+        for goods_id, (qty, value) in totals.items():
+            row = {"goods_id": goods_id, "day": day, **{name: 0 for name in _MEASURES}}
+            row[qty_field] = qty
+            row[value_field] = value
+            rows.append(row)
+        session.execute(_ACCUMULATE, rows)
+
+    @staticmethod
+    def rebuild(session: Session, start: date | None = None, end: date | None = None) -> int:
+        """由出入库明细重建 [start, end] 期间（默认全部）的每日汇总，返回重建后的汇总行数。
+
+        整个重建在调用方的事务中完成：先删除期间内的汇总行，再以一条
+        INSERT ... SELECT 按 (商品, 日期) 分组写回。
+        """
+        in_day = func.date(StockIn.date)
+        out_day = func.date(StockOut.date)
+        zero = literal(0)
+        in_rows = (
+            select(
+                StockInItem.goods_id.label("goods_id"),
+                in_day.label("day"),
+                StockInItem.quantity.label("qty_in"),
+                zero.label("qty_out"),
+                (StockInItem.quantity * func.coalesce(StockInItem.price, 0)).label("value_in"),
+                zero.label("value_out"),
+            )
+            .join(StockIn, StockIn.id == StockInItem.stock_in_id)
+        )
+        out_rows = (
+            select(
+                StockOutItem.goods_id,
+                out_day,
+                zero,
+                func.abs(StockOutItem.quantity),
+                zero,
+                func.abs(StockOutItem.quantity) * func.coalesce(StockOutItem.price, 0),
+            )
+            .join(StockOut, StockOut.id == StockOutItem.stock_out_id)
+        )
+        agg_delete = delete(StockDailyAgg)
+        if start is not None:
+            in_rows = in_rows.where(in_day >= start.isoformat())
+            out_rows = out_rows.where(out_day >= start.isoformat())
+            agg_delete = agg_delete.where(StockDailyAgg.day >= start)
+        if end is not None:
+            in_rows = in_rows.where(in_day <= end.isoformat())
+            out_rows = out_rows.where(out_day <= end.isoformat())
+            agg_delete = agg_delete.where(StockDailyAgg.day <= end)
+
+        movements = union_all(in_rows, out_rows).subquery()
+        grouped = select(
+            movements.c.goods_id,
+            movements.c.day,
+            *(func.sum(movements.c[name]) for name in _MEASURES),
+        ).group_by(movements.c.goods_id, movements.c.day)
+
+        session.execute(agg_delete)
+        result = session.execute(
+            insert(StockDailyAgg).from_select(["goods_id", "day", *_MEASURES], grouped)
+        )
+        return result.rowcount
@@ -1,13 +1,18 @@
 from datetime import datetime
+from decimal import Decimal
 from typing import Iterable, List, TypedDict
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, insert, select, update
 from sqlalchemy.orm import Session
 
-from models.goods import Goods
 from models.stock import Stock
 from models.stock_in import StockIn, StockInItem
 from models.stock_flow import StockFlow
+from .base import chunked, to_decimal
+from .goods_catalog import GOODS_CATALOG
+from .goods_stock_total_service import GoodsStockTotalService
+from .pagination import COUNT_CACHE
+from .stock_daily_agg_service import StockDailyAggService
 
 
 class StockInItemData(TypedDict):
@@ -18,6 +23,20 @@ class StockInItemData(TypedDict):
     location: str | None
 
 
+StockKey = tuple[int, str | None, str | None]
+
+# 按主键累加库存数量，配合 executemany 一次提交所有增量
+_INCREMENT_STOCK = (
+    update(Stock.__table__)
+    .where(Stock.__table__.c.id == bindparam("stock_id"))
+    .values(
+        quantity=Stock.__table__.c.quantity
+        + bindparam("delta", type_=Stock.__table__.c.quantity.type),
+        version=Stock.__table__.c.version + 1,
+    )
+)
+
+
 class StockInService:
     """入库业务逻辑。"""
 
@@ -31,6 +50,8 @@ class StockInService:
         items: Iterable[StockInItemData],
         remark: str | None = None,
     ) -> StockIn:
+        items = list(items)
+
         # 校验单号唯一
         exists = session.scalar(select(StockIn).where(StockIn.order_no == order_no))
         if exists:
@@ -40,13 +61,7 @@ class StockInService:
         goods_ids = {item["goods_id"] for item in items}
         if not goods_ids:
             raise ValueError("入库明细不能为空")
-        found_ids = {
-            gid
-            for (gid,) in session.execute(
-                select(Goods.id).where(Goods.id.in_(goods_ids))
-            )
-        }
-        missing = goods_ids - found_ids
+        missing = goods_ids - GOODS_CATALOG.get_many(session, goods_ids).keys()
         if missing:
             raise ValueError(f"以下商品不存在: {missing}")
 
@@ -60,61 +75,96 @@ class StockInService:
         session.add(stock_in)
         session.flush()
 
-        for item in items:
-            in_item = StockInItem(
-                stock_in_id=stock_in.id,
-                goods_id=item["goods_id"],
-                quantity=item["quantity"],
-                price=item.get("price"),
-                batch_no=item.get("batch_no"),
-                location=item.get("location"),
-            )
-            session.add(in_item)
-
-            # 更新 / 新增库存
-            StockInService._increase_stock(
-                session=session,
-                goods_id=item["goods_id"],
-                quantity=item["quantity"],
-                batch_no=item.get("batch_no"),
-                location=item.get("location"),
-            )
+        # 明细、库存、流水均以批量语句写入，整单只有常数次往返
+        session.execute(
+            insert(StockInItem),
+            [
+                {
+                    "stock_in_id": stock_in.id,
+                    "goods_id": item["goods_id"],
+                    "quantity": item["quantity"],
+                    "price": item.get("price"),
+                    "batch_no": item.get("batch_no"),
+                    "location": item.get("location"),
+                }
+                for item in items
+            ],
+        )
 
-            # 记录库存流水
-            flow = StockFlow(
-                goods_id=item["goods_id"],
-                change_type="in",
-                change_qty=item["quantity"],
-                ref_order_type="stock_in",
-                ref_order_id=stock_in.id,
-            )
-            session.add(flow)
+        # 更新 / 新增库存
+        StockInService._post_stock_increments(session, items)
+        # 同步商品库存合计与预警标记
+        GoodsStockTotalService.record_in(session, items)
 
-        session.flush()
+        # 记录库存流水
+        session.execute(
+            insert(StockFlow),
+            [
+                {
+                    "goods_id": item["goods_id"],
+                    "change_type": "in",
+                    "change_qty": item["quantity"],
+                    "ref_order_type": "stock_in",
+                    "ref_order_id": stock_in.id,
+                }
+                for item in items
+            ],
+        )
+        # 同步累加每日出入库汇总，期间报表只读汇总表
+        StockDailyAggService.record_in(session, date.date(), items)
+        COUNT_CACHE.invalidate("stock")
         return stock_in
 
     @staticmethod
-    def _increase_stock(
+    def _post_stock_increments(
         session: Session,
-        goods_id: int,
-        quantity: float,
-        batch_no: str | None,
-        location: str | None,
+        items: List[StockInItemData],
     ) -> None:
-        stmt = select(Stock).where(
-            Stock.goods_id == goods_id,
-            Stock.batch_no.is_(batch_no) if batch_no is None else Stock.batch_no == batch_no,
-            Stock.location.is_(location) if location is None else Stock.location == location,
-        )
-        stock = session.execute(stmt).scalars().first()
-        if stock:
-            stock.quantity = (stock.quantity or 0) + quantity
-        else:
-            stock = Stock(
-                goods_id=goods_id,
-                quantity=quantity,
-                batch_no=batch_no,
-                location=location,
-            )
-            session.add(stock)
+        """按 (商品, 批次, 库位) 汇总本单增量，已有库存行批量累加，其余批量新增。"""
+        increments: dict[StockKey, Decimal] = {}
+        for item in items:
+            key = (item["goods_id"], item.get("batch_no"), item.get("location"))
+            increments[key] = increments.get(key, Decimal(0)) + to_decimal(item["quantity"])
 
+        existing = StockInService._load_stock_ids(session, list(increments))
+
+        updates = [
+            {"stock_id": existing[key], "delta": qty}
+            for key, qty in increments.items()
+            if key in existing
+        ]
+        inserts = [
+            {
+                "goods_id": key[0],
+                "batch_no": key[1],
+                "location": key[2],
+                "quantity": qty,
+            }
+            for key, qty in increments.items()
+            if key not in existing
+        ]
+        if updates:
+            session.execute(_INCREMENT_STOCK, updates)
+        if inserts:
+            session.execute(insert(Stock), inserts)
+
+    @staticmethod
+    def _load_stock_ids(session: Session, keys: List[StockKey]) -> dict[StockKey, int]:
+        """按商品 id 分块查询，一次取回所有 (商品, 批次, 库位) 对应的库存行 id。
+
+        批次/库位允许为空，无法直接用 row-value IN 匹配，因此只按商品过滤，
+        再在内存中按键挑选；同一个键存在多行时取 id 最小的一行。
+        查询只涉及 ix_stock_goods_batch_location 中的列，不回表、不排序。
+        """
+        wanted = set(keys)
+        goods_ids = sorted({key[0] for key in wanted})
+        found: dict[StockKey, int] = {}
+        for chunk in chunked(goods_ids):
+            stmt = select(Stock.id, Stock.goods_id, Stock.batch_no, Stock.location).where(
+                Stock.goods_id.in_(chunk)
+            )
+            for stock_id, goods_id, batch_no, location in session.execute(stmt):
+                key = (goods_id, batch_no, location)
+                if key in wanted and stock_id < found.get(key, stock_id + 1):
+                    found[key] = stock_id
+        return found
@@ -1,13 +1,19 @@
-from datetime import datetime
-from typing import Iterable, TypedDict
+from datetime import date as date_type, datetime
+from decimal import Decimal
+from typing import Iterable, List, TypedDict
 
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, insert, select, func, update
 from sqlalchemy.orm import Session
 
-from models.goods import Goods
 from models.stock import Stock
 from models.stock_out import StockOut, StockOutItem
 from models.stock_flow import StockFlow
+from .base import ConcurrentUpdateError, chunked, to_decimal
+from .goods_catalog import GOODS_CATALOG
+from .goods_stock_total_service import GoodsStockTotalService
+from .pagination import COUNT_CACHE
+from .stock_daily_agg_service import StockDailyAggService
+from .stock_allocation import DEFAULT_STRATEGY, AllocationStrategy, get_strategy
 
 
 class StockOutItemData(TypedDict):
@@ -18,6 +24,22 @@ class StockOutItemData(TypedDict):
     location: str | None
 
 
+# 按主键扣减库存数量，配合 executemany 一次提交所有扣减；
+# 只有行版本号仍是读取时的值才扣减，否则说明该行已被其他事务修改
+_DECREMENT_STOCK = (
+    update(Stock.__table__)
+    .where(
+        Stock.__table__.c.id == bindparam("stock_id"),
+        Stock.__table__.c.version == bindparam("version"),
+    )
+    .values(
+        quantity=Stock.__table__.c.quantity
+        - bindparam("delta", type_=Stock.__table__.c.quantity.type),
+        version=Stock.__table__.c.version + 1,
+    )
+)
+
+
 class StockOutService:
     """出库业务逻辑。"""
 
@@ -31,7 +53,17 @@ class StockOutService:
         out_type: str,
         items: Iterable[StockOutItemData],
         remark: str | None = None,
+        strategy: str = DEFAULT_STRATEGY,
     ) -> StockOut:
+        """创建出库单并按分配策略扣减库存。
+
+        库存校验与扣减在调用方的同一事务中完成；多个工作站共用数据库时应通过
+        services.base.run_write_transaction 调用（BEGIN IMMEDIATE 写事务，冲突时重试）。
+        """
+        items = list(items)
+        allocation = get_strategy(strategy)
+        today = date.date()
+
         # 校验单号唯一
         exists = session.scalar(select(StockOut).where(StockOut.order_no == order_no))
         if exists:
@@ -41,25 +73,23 @@ class StockOutService:
         if not goods_ids:
             raise ValueError("出库明细不能为空")
 
-        found_ids = {
-            gid
-            for (gid,) in session.execute(
-                select(Goods.id).where(Goods.id.in_(goods_ids))
-            )
-        }
-        missing = goods_ids - found_ids
+        missing = goods_ids - GOODS_CATALOG.get_many(session, goods_ids).keys()
         if missing:
             raise ValueError(f"以下商品不存在: {missing}")
 
-        # 校验库存是否足够（按商品维度汇总）
-        for gid in goods_ids:
-            total_qty = session.scalar(
-                select(func.coalesce(func.sum(Stock.quantity), 0)).where(
-                    Stock.goods_id == gid
-                )
-            ) or 0
-            need_qty = sum(item["quantity"] for item in items if item["goods_id"] == gid)
-            if need_qty > float(total_qty):
+        # 校验库存是否足够（按商品维度汇总，一次分组查询取回全部商品的可用量；
+        # 可用量只统计分配策略允许扣减的库存行，例如 FEFO 不计已过期批次）
+        need: dict[int, Decimal] = {}
+        for item in items:
+            need[item["goods_id"]] = need.get(item["goods_id"], Decimal(0)) + to_decimal(
+                item["quantity"]
+            )
+        available = StockOutService._available_quantities(
+            session, list(need), allocation.stock_filter(items, today)
+        )
+        for gid, need_qty in need.items():
+            total_qty = available.get(gid, Decimal(0))
+            if need_qty > total_qty:
                 raise ValueError(f"商品 {gid} 库存不足，需要 {need_qty}，当前 {total_qty}")
 
         stock_out = StockOut(
@@ -73,60 +103,128 @@ class StockOutService:
         session.add(stock_out)
         session.flush()
 
-        for item in items:
-            out_item = StockOutItem(
-                stock_out_id=stock_out.id,
-                goods_id=item["goods_id"],
-                quantity=item["quantity"],
-                price=item.get("price"),
-                batch_no=item.get("batch_no"),
-                location=item.get("location"),
-            )
-            session.add(out_item)
+        session.execute(
+            insert(StockOutItem),
+            [
+                {
+                    "stock_out_id": stock_out.id,
+                    "goods_id": item["goods_id"],
+                    "quantity": item["quantity"],
+                    "price": item.get("price"),
+                    "batch_no": item.get("batch_no"),
+                    "location": item.get("location"),
+                }
+                for item in items
+            ],
+        )
 
-            StockOutService._decrease_stock(
-                session=session,
-                goods_id=item["goods_id"],
-                quantity=item["quantity"],
-            )
+        StockOutService._decrease_stock(session, items, allocation, today)
+        # 同步商品库存合计与预警标记
+        GoodsStockTotalService.record_out(session, items)
+
+        # 记录库存流水（数量为负）
+        session.execute(
+            insert(StockFlow),
+            [
+                {
+                    "goods_id": item["goods_id"],
+                    "change_type": "out",
+                    "change_qty": -abs(item["quantity"]),
+                    "ref_order_type": "stock_out",
+                    "ref_order_id": stock_out.id,
+                }
+                for item in items
+            ],
+        )
+        # 同步累加每日出入库汇总，期间报表只读汇总表
+        StockDailyAggService.record_out(session, date.date(), items)
+        COUNT_CACHE.invalidate("stock")
+        return stock_out
 
-            # 记录库存流水（数量为负）
-            flow = StockFlow(
-                goods_id=item["goods_id"],
-                change_type="out",
-                change_qty=-abs(item["quantity"]),
-                ref_order_type="stock_out",
-                ref_order_id=stock_out.id,
+    @staticmethod
+    def _available_quantities(
+        session: Session,
+        goods_ids: List[int],
+        conditions: list,
+    ) -> dict[int, Decimal]:
+        """一次 GROUP BY 查询返回各商品的可用库存总量（按块拼接 IN 条件）。"""
+        available: dict[int, Decimal] = {}
+        for chunk in chunked(goods_ids):
+            stmt = (
+                select(Stock.goods_id, func.sum(Stock.quantity))
+                .where(Stock.goods_id.in_(chunk), *conditions)
+                .group_by(Stock.goods_id)
             )
-            session.add(flow)
-
-        session.flush()
-        return stock_out
+            for gid, qty in session.execute(stmt):
+                available[gid] = to_decimal(qty or 0)
+        return available
 
     @staticmethod
     def _decrease_stock(
         session: Session,
-        goods_id: int,
-        quantity: float,
+        items: List[StockOutItemData],
+        allocation: AllocationStrategy,
+        today: date_type,
     ) -> None:
-        """简单 FIFO：按 id 顺序逐条扣减。"""
-        remain = quantity
-        stmt = (
-            select(Stock)
-            .where(Stock.goods_id == goods_id, Stock.quantity > 0)
-            .order_by(Stock.id)
-        )
-        for stock in session.execute(stmt).scalars():
-            if remain <= 0:
-                break
-            can_take = float(stock.quantity)
-            if can_take <= remain:
-                stock.quantity = 0
-                remain -= can_take
-            else:
-                stock.quantity = can_take - remain
-                remain = 0
-        if remain > 0:
-            # 理论上前面检查过不会出现这个情况，这里只是保护
-            raise ValueError(f"库存扣减失败，仍缺少 {remain}")
+        """按分配策略扣减库存。
+
+        一次查询按策略顺序取回本单涉及商品的全部候选库存行，在内存中按明细顺序分配，
+        最后以 executemany 批量写回扣减量。写回时校验行版本号，
+        有任何一行在读取后被修改则抛出 ConcurrentUpdateError，由调用方回滚重做。
+        """
+        goods_ids = sorted({item["goods_id"] for item in items})
+        conditions = allocation.stock_filter(items, today)
+        # 每个商品的候选行：[id, 剩余数量, 批次, 库位]，以及第一条未扣完行的下标
+        rows: dict[int, list[list]] = {gid: [] for gid in goods_ids}
+        heads: dict[int, int] = {gid: 0 for gid in goods_ids}
+        versions: dict[int, int] = {}
+        for chunk in chunked(goods_ids):
+            stmt = (
+                select(
+                    Stock.id,
+                    Stock.goods_id,
+                    Stock.quantity,
+                    Stock.batch_no,
+                    Stock.location,
+                    Stock.version,
+                )
+                .where(Stock.goods_id.in_(chunk), *conditions)
+                .order_by(*allocation.order_by())
+            )
+            for stock_id, gid, qty, batch_no, location, version in session.execute(stmt):
+                rows[gid].append([stock_id, to_decimal(qty), batch_no, location])
+                versions[stock_id] = version
 
+        taken: dict[int, Decimal] = {}
+        for item in items:
+            gid = item["goods_id"]
+            candidates = rows[gid]
+            remain = to_decimal(item["quantity"])
+            index = heads[gid]
+            while remain > 0 and index < len(candidates):
+                row = candidates[index]
+                index += 1
+                if row[1] <= 0 or not allocation.matches(item, row[2], row[3]):
+                    continue
+                take = min(row[1], remain)
+                taken[row[0]] = taken.get(row[0], Decimal(0)) + take
+                row[1] -= take
+                remain -= take
+            while heads[gid] < len(candidates) and candidates[heads[gid]][1] <= 0:
+                heads[gid] += 1
+            if remain > 0:
+                # 按商品汇总的校验无法覆盖批次/库位限制，这里兜底报错并整单回滚
+                raise ValueError(f"商品 {gid} 库存扣减失败，仍缺少 {remain}")
+
+        if taken:
+            result = session.execute(
+                _DECREMENT_STOCK,
+                [
+                    {"stock_id": stock_id, "delta": qty, "version": versions[stock_id]}
+                    for stock_id, qty in taken.items()
+                ],
+            )
+            if result.rowcount != len(taken):
+                raise ConcurrentUpdateError(
+                    f"库存已被其他操作修改（{len(taken) - result.rowcount} 行），请重试"
+                )
@@ -1,10 +1,13 @@
 from typing import List, Optional, Tuple
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import Session, joinedload
 
-from models.goods import Goods
+from models.goods import GOODS_FTS, Goods, goods_fts_match, use_goods_fts
 from models.stock import Stock
+from .goods_service import GoodsService
+from .goods_stock_total_service import GoodsStockTotalService
+from .pagination import KeysetPage, decode_cursor, encode_cursor, resolve_total
 
 
 class StockService:
@@ -19,35 +22,73 @@ class StockService:
         page_size: int = 50,
     ) -> Tuple[List[Stock], int]:
         stmt = select(Stock).options(joinedload(Stock.goods))
-        if keyword:
-            kw = f"%{keyword}%"
-            stmt = stmt.join(Stock.goods).where(
-                (Goods.code.like(kw)) | (Goods.name.like(kw))
-            )
+        order_by = (Stock.goods_id, Stock.id)
 
         if only_warning:
-            # 通过联表筛选库存预警（当前库存总和 < min_stock）
-            sub = (
-                select(
-                    Stock.goods_id,
-                    func.sum(Stock.quantity).label("qty"),
-                )
-                .group_by(Stock.goods_id)
-                .subquery()
-            )
-            stmt = (
-                select(Stock)
-                .join(sub, Stock.goods_id == sub.c.goods_id)
-                .join(Goods, Goods.id == Stock.goods_id)
-                .where(sub.c.qty < Goods.min_stock)
+            # 库存预警（库存合计 < min_stock）只读 goods_stock_total 中已标记的商品
+            stmt = stmt.where(Stock.goods_id.in_(GoodsStockTotalService.warning_goods_ids()))
+
+        if keyword and use_goods_fts(keyword):
+            # 走 goods_fts 全文索引，按商品相关度排序
+            stmt = stmt.join(GOODS_FTS, GOODS_FTS.c.rowid == Stock.goods_id).where(
+                goods_fts_match(keyword)
             )
+            order_by = (GOODS_FTS.c.rank, Stock.goods_id, Stock.id)
+        elif keyword:
+            kw = f"%{keyword}%"
+            stmt = stmt.join(Goods, Goods.id == Stock.goods_id)
+            stmt = stmt.where((Goods.code.like(kw)) | (Goods.name.like(kw)))
 
         total = int(session.scalar(select(func.count()).select_from(stmt.subquery())) or 0)
         stmt = (
-            stmt.order_by(Stock.goods_id, Stock.id)
+            stmt.order_by(*order_by)
             .offset((page - 1) * page_size)
             .limit(page_size)
         )
         rows = session.execute(stmt).scalars().all()
         return rows, total
 
+    @staticmethod
+    def list_stock_page(
+        session: Session,
+        keyword: Optional[str] = None,
+        only_warning: bool = False,
+        cursor: Optional[str] = None,
+        page_size: int = 50,
+        count: str = "none",
+        load_goods: bool = True,
+    ) -> KeysetPage:
+        """游标分页：按 (商品 id, 库存行 id) 从上一页最后一行之后继续取。
+
+        count 取值见 pagination.COUNT_MODES；load_goods=False 时不联表加载商品，
+        由调用方从商品目录缓存（goods_catalog）补充商品信息。
+        """
+        conditions = []
+        if only_warning:
+            # 只读 goods_stock_total 预警部分索引，代价与预警商品数成正比
+            conditions.append(Stock.goods_id.in_(GoodsStockTotalService.warning_goods_ids()))
+        if keyword:
+            conditions.append(GoodsService.keyword_condition(keyword, Stock.goods_id))
+
+        stmt = select(Stock).where(*conditions)
+        if load_goods:
+            stmt = stmt.options(joinedload(Stock.goods))
+        if cursor:
+            last_goods_id, last_id = decode_cursor(cursor, 2)
+            stmt = stmt.where(tuple_(Stock.goods_id, Stock.id) > tuple_(last_goods_id, last_id))
+        stmt = stmt.order_by(Stock.goods_id, Stock.id).limit(page_size + 1)
+        rows = session.execute(stmt).scalars().all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor((rows[-1].goods_id, rows[-1].id))
+        total = resolve_total(
+            count,
+            "stock",
+            (keyword, only_warning),
+            lambda: int(
+                session.scalar(select(func.count()).select_from(Stock).where(*conditions)) or 0
+            ),
+        )
+        return KeysetPage(rows, next_cursor, total)
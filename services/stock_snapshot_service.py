@@ -0,0 +1,160 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Sequence
+
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from models.stock_flow import StockFlow
+from models.stock_snapshot import StockSnapshot, StockSnapshotRun
+from .base import chunked, to_decimal
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    if value.month == 12:
+        return datetime(value.year + 1, 1, 1)
+    return datetime(value.year, value.month + 1, 1)
+
+
+class StockSnapshotService:
+    """库存结存检查点与历史时点结存查询。
+
+    流水的 created_at 取过账时刻、只增不改，因此已生成的检查点不会失效；
+    任意时点的结存 = 不晚于该时点的最近检查点 + 检查点之后到该时点的流水。
+    """
+
+    @staticmethod
+    def latest_run(session: Session, ts: datetime) -> StockSnapshotRun | None:
+        """返回 as_of 不晚于 ts 的最近一次检查点。"""
+        return session.scalar(
+            select(StockSnapshotRun)
+            .where(StockSnapshotRun.as_of <= ts)
+            .order_by(StockSnapshotRun.as_of.desc())
+            .limit(1)
+        )
+
+    @staticmethod
+    def balance_statement(
+        ts: datetime,
+        run: StockSnapshotRun | None,
+        goods_ids: Sequence[int] | None = None,
+    ) -> Select:
+        """时点结存查询：检查点数量与其后流水 UNION ALL 后按商品汇总，列为 (goods_id, quantity)。
+
+        流水只扫描 (run.as_of, ts] 这一段；没有检查点时从头累加。
+        """
+        flows = select(
+            StockFlow.goods_id.label("goods_id"), StockFlow.change_qty.label("quantity")
+        ).where(StockFlow.created_at <= ts)
+        if run is not None:
+            flows = flows.where(StockFlow.created_at >= run.as_of)
+        if goods_ids is not None:
+            flows = flows.where(StockFlow.goods_id.in_(goods_ids))
+        parts = [flows]
+        if run is not None:
+            base = select(StockSnapshot.goods_id, StockSnapshot.quantity).where(
+                StockSnapshot.run_id == run.id
+            )
+            if goods_ids is not None:
+                base = base.where(StockSnapshot.goods_id.in_(goods_ids))
+            parts.insert(0, base)
+        movements = union_all(*parts).subquery()
+        return select(
+            movements.c.goods_id,
+            func.sum(movements.c.quantity).label("quantity"),
+        ).group_by(movements.c.goods_id)
+
+    @staticmethod
+    def balance_as_of(
+        session: Session,
+        goods_ids: Sequence[int] | None,
+        ts: datetime,
+    ) -> dict[int, Decimal]:
+        """查询各商品在 ts 时刻（含）的结存数量；goods_ids 为 None 时返回全部有结存的商品。"""
+        run = StockSnapshotService.latest_run(session, ts)
+        balances: dict[int, Decimal] = {}
+        batches = [None] if goods_ids is None else chunked(sorted(set(goods_ids)))
+        for chunk in batches:
+            stmt = StockSnapshotService.balance_statement(ts, run, chunk)
+            for goods_id, quantity in session.execute(stmt):
+                balances[goods_id] = to_decimal(quantity or 0)
+        if goods_ids is not None:
+            for goods_id in goods_ids:
+                balances.setdefault(goods_id, Decimal(0))
+        return balances
+
+    @staticmethod
+    def create_snapshot(session: Session, as_of: datetime) -> StockSnapshotRun:
+        """在 as_of 时刻生成一次检查点（不含 as_of 时刻本身的流水）。
+
+        以此前最近的检查点为基础，只累加两次检查点之间的流水。
+        """
+        exists = session.scalar(select(StockSnapshotRun).where(StockSnapshotRun.as_of == as_of))
+        if exists:
+            raise ValueError(f"该时间点的结存检查点已存在: {as_of}")
+
+        previous = session.scalar(
+            select(StockSnapshotRun)
+            .where(StockSnapshotRun.as_of < as_of)
+            .order_by(StockSnapshotRun.as_of.desc())
+            .limit(1)
+        )
+        run = StockSnapshotRun(as_of=as_of)
+        session.add(run)
+        session.flush()
+
+        flows = select(StockFlow.goods_id, StockFlow.change_qty).where(
+            StockFlow.created_at < as_of
+        )
+        parts = [flows]
+        if previous is not None:
+            flows = flows.where(StockFlow.created_at >= previous.as_of)
+            parts = [
+                select(StockSnapshot.goods_id, StockSnapshot.quantity).where(
+                    StockSnapshot.run_id == previous.id
+                ),
+                flows,
+            ]
+        movements = union_all(*parts).subquery()
+        total = func.sum(movements.c[1])
+        grouped = (
+            select(literal(run.id), movements.c[0], total)
+            .group_by(movements.c[0])
+            .having(total != 0)
+        )
+        result = session.execute(
+            insert(StockSnapshot).from_select(["run_id", "goods_id", "quantity"], grouped)
+        )
+        run.goods_count = result.rowcount
+        return run
+
+    @staticmethod
+    def create_monthly_snapshots(
+        session: Session, until: datetime | None = None
+    ) -> List[StockSnapshotRun]:
+        """补齐每月 1 日零点的检查点，直到 until（默认当前时刻）所在月份为止。
+
+        从最近一次检查点（或最早一条流水）所在月份的下一个月初开始逐月生成。
+        检查点不能晚于当前时刻，否则之后过账的流水会被漏算。
+        """
+        now = datetime.now()
+        until = min(until or now, now)
+        last = session.scalar(select(func.max(StockSnapshotRun.as_of)))
+        if last is None:
+            first_flow = session.scalar(select(func.min(StockFlow.created_at)))
+            if first_flow is None:
+                return []
+            as_of = _next_month(_month_start(first_flow))
+        else:
+            as_of = _next_month(_month_start(last))
+
+        runs = []
+        while as_of <= until:
+            runs.append(StockSnapshotService.create_snapshot(session, as_of))
+            as_of = _next_month(as_of)
+        return runs
@@ -0,0 +1,210 @@
+import threading
+from itertools import count
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from sqlalchemy.orm import Session
+
+from services.base import get_session
+from services.report_writers import ExportCancelled, ProgressCallback
+
+# 导出任务状态
+JOB_QUEUED = "排队中"
+JOB_RUNNING = "导出中"
+JOB_DONE = "已完成"
+JOB_CANCELLED = "已取消"
+JOB_FAILED = "失败"
+
+# 导出函数：(会话, 进度回调) -> 导出行数
+ExportFn = Callable[[Session, ProgressCallback], int]
+
+# 导出专用线程池：任务逐个执行，避免多个大导出同时争抢磁盘与数据库
+_POOL: Optional[QThreadPool] = None
+
+
+def export_pool() -> QThreadPool:
+    global _POOL
+    if _POOL is None:
+        _POOL = QThreadPool()
+        _POOL.setMaxThreadCount(1)
+    return _POOL
+
+
+class ExportJob:
+    """一次导出任务的状态，只在界面线程中读写。"""
+
+    def __init__(self, job_id: int, title: str, filepath: str) -> None:
+        self.job_id = job_id
+        self.title = title
+        self.filepath = filepath
+        self.status = JOB_QUEUED
+        self.rows = 0
+        self.total = 0
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.cancelled = threading.Event()
+
+    @property
+    def percent(self) -> int | None:
+        """完成百分比；总行数未知时为 None。"""
+        if self.status == JOB_DONE:
+            return 100
+        if not self.total:
+            return None
+        return min(100, self.rows * 100 // self.total)
+
+    @property
+    def duration(self) -> float | None:
+        """已耗时（秒）；尚未开始时为 None。"""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or monotonic()) - self.started_at
+
+    @property
+    def file_size(self) -> int | None:
+        if self.status != JOB_DONE:
+            return None
+        try:
+            return Path(self.filepath).stat().st_size
+        except OSError:
+            return None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_CANCELLED, JOB_FAILED)
+
+
+class _ExportSignals(QObject):
+    started = Signal(int)
+    progress = Signal(int, int, int)
+    finished = Signal(int, int)
+    cancelled = Signal(int)
+    failed = Signal(int, str)
+
+
+class _ExportRunnable(QRunnable):
+    """在导出线程中执行一次导出，进度与结果经信号回到界面线程。"""
+
+    def __init__(
+        self,
+        job_id: int,
+        export: ExportFn,
+        cancelled: threading.Event,
+        signals: _ExportSignals,
+    ) -> None:
+        super().__init__()
+        self._job_id = job_id
+        self._export = export
+        self._cancelled = cancelled
+        self.signals = signals
+
+    def _progress(self, rows: int, total: int) -> None:
+        if self._cancelled.is_set():
+            raise ExportCancelled()
+        self.signals.progress.emit(self._job_id, rows, total)
+
+    def run(self) -> None:
+        # 排队期间已取消的任务不再执行
+        if self._cancelled.is_set():
+            self.signals.cancelled.emit(self._job_id)
+            return
+        self.signals.started.emit(self._job_id)
+        try:
+            with get_session() as session:
+                rows = self._export(session, self._progress)
+        except ExportCancelled:
+            self.signals.cancelled.emit(self._job_id)
+            return
+        except Exception as exc:  # 交给界面线程统一提示
+            self.signals.failed.emit(self._job_id, str(exc))
+            return
+        self.signals.finished.emit(self._job_id, rows)
+
+
+class ExportJobQueue(QObject):
+    """报表导出任务队列：后台逐个执行，报告进度，支持取消。
+
+    job_changed(job_id) 在任务新增、开始、进度更新和结束时发出，
+    界面据此刷新任务列表；job_failed(job_id, message) 用于提示错误。
+    """
+
+    job_changed = Signal(int)
+    job_failed = Signal(int, str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._ids = count(1)
+        self._jobs: Dict[int, ExportJob] = {}
+        # 持有信号对象，直到任务结束
+        self._signals: Dict[int, _ExportSignals] = {}
+
+    def submit(self, title: str, filepath: str, export: ExportFn) -> ExportJob:
+        job = ExportJob(next(self._ids), title, filepath)
+        signals = _ExportSignals()
+        signals.started.connect(self._on_started)
+        signals.progress.connect(self._on_progress)
+        signals.finished.connect(self._on_finished)
+        signals.cancelled.connect(self._on_cancelled)
+        signals.failed.connect(self._on_failed)
+        self._jobs[job.job_id] = job
+        self._signals[job.job_id] = signals
+        export_pool().start(_ExportRunnable(job.job_id, export, job.cancelled, signals))
+        self.job_changed.emit(job.job_id)
+        return job
+
+    def cancel(self, job_id: int) -> None:
+        """取消任务：排队中的直接跳过，执行中的在下一次进度回调时中止并删除部分文件。"""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.is_finished:
+            job.cancelled.set()
+
+    def cancel_all(self, wait: bool = False) -> None:
+        """取消全部未完成的任务；wait 为 True 时阻塞到导出线程结束（部分文件已删除）。"""
+        for job_id in self._jobs:
+            self.cancel(job_id)
+        if wait:
+            export_pool().waitForDone()
+
+    def job(self, job_id: int) -> ExportJob:
+        return self._jobs[job_id]
+
+    def has_pending(self) -> bool:
+        return any(not job.is_finished for job in self._jobs.values())
+
+    def _finish(self, job_id: int, status: str) -> ExportJob:
+        job = self._jobs[job_id]
+        job.status = status
+        if job.started_at is not None:
+            job.finished_at = monotonic()
+        self._signals.pop(job_id, None)
+        return job
+
+    def _on_started(self, job_id: int) -> None:
+        job = self._jobs[job_id]
+        job.status = JOB_RUNNING
+        job.started_at = monotonic()
+        self.job_changed.emit(job_id)
+
+    def _on_progress(self, job_id: int, rows: int, total: int) -> None:
+        job = self._jobs[job_id]
+        job.rows = rows
+        job.total = total
+        self.job_changed.emit(job_id)
+
+    def _on_finished(self, job_id: int, rows: int) -> None:
+        job = self._finish(job_id, JOB_DONE)
+        job.rows = rows
+        self.job_changed.emit(job_id)
+
+    def _on_cancelled(self, job_id: int) -> None:
+        self._finish(job_id, JOB_CANCELLED)
+        self.job_changed.emit(job_id)
+
+    def _on_failed(self, job_id: int, message: str) -> None:
+        job = self._finish(job_id, JOB_FAILED)
+        job.error = message
+        self.job_changed.emit(job_id)
+        self.job_failed.emit(job_id, message)
@@ -1,4 +1,4 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -6,18 +6,23 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QLabel,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QDialog,
     QFormLayout,
     QDialogButtonBox,
     QMessageBox,
-    QHeaderView,
+    QCompleter,
+    QFileDialog,
 )
 
 from services.goods_service import GoodsService
-from services.base import get_session
+from services.goods_import_service import GoodsImportResult, GoodsImportService
+from services.import_readers import IMPORT_FILE_FILTER, write_error_report
+from services.base import get_session, run_write_transaction
+from services.goods_catalog import GOODS_CATALOG
 from models.goods import Goods
+from ui.import_jobs import ImportTask
+from ui.lazy_table_model import LazyTableModel, configure_lazy_table
 
 class GoodsView(QWidget):
     """商品管理界面占位实现。
@@ -41,16 +46,15 @@ class GoodsView(QWidget):
 
         main_layout.addLayout(search_layout)
 
-        # 中部表格
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["编码", "名称", "分类", "规格", "单位"])
-        header = self.table.horizontalHeader()
-        header.setStretchLastSection(True)
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        # 中部表格：滚动时按游标分块加载
+        self._keyword: str | None = None
+        self.model = LazyTableModel(
+            ["编码", "名称", "分类", "规格", "单位"], self._fetch_page, parent=self
+        )
+        self.model.chunk_loaded.connect(self._on_chunk_loaded)
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        configure_lazy_table(self.table)
         main_layout.addWidget(self.table, 1)
 
         # 底部按钮
@@ -58,52 +62,61 @@ class GoodsView(QWidget):
         self.add_btn = QPushButton("新增", self)
         self.edit_btn = QPushButton("编辑", self)
         self.delete_btn = QPushButton("删除", self)
+        self.import_btn = QPushButton("导入", self)
         btn_layout.addWidget(self.add_btn)
         btn_layout.addWidget(self.edit_btn)
         btn_layout.addWidget(self.delete_btn)
+        btn_layout.addWidget(self.import_btn)
         btn_layout.addStretch(1)
 
         main_layout.addLayout(btn_layout)
 
         # 事件连接
         self.search_btn.clicked.connect(self.refresh_table)
+        # 输入关键字时稍作停顿再查询，连续输入只保留最后一次请求
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_timer.timeout.connect(self.refresh_table)
+        self.keyword_edit.textChanged.connect(lambda _text: self._search_timer.start())
+        self.model.load_failed.connect(self._on_load_failed)
         self.add_btn.clicked.connect(self.add_goods)
         self.edit_btn.clicked.connect(self.edit_goods)
         self.delete_btn.clicked.connect(self.delete_goods)
-        self.table.cellDoubleClicked.connect(lambda _r, _c: self.edit_goods())
+        self.import_btn.clicked.connect(self.import_goods)
+        self.table.doubleClicked.connect(lambda _index: self.edit_goods())
 
-        # 初次加载
-        self.refresh_table()
+        # 初次加载由 MainWindow 在页面首次显示时触发
 
     # ---------- 数据加载 ----------
     def refresh_table(self) -> None:
-        keyword = self.keyword_edit.text().strip() or None
+        self._keyword = self.keyword_edit.text().strip() or None
+        self.model.reset()
+
+    def _fetch_page(self, cursor: str | None, limit: int):
         with get_session() as session:
-            service = GoodsService(session)
-            rows, _ = service.list(session, keyword=keyword, page=1, page_size=200)
-            self._fill_table(rows)
-
-    def _fill_table(self, goods_list: list[Goods]) -> None:
-        self.table.setRowCount(len(goods_list))
-        for row, g in enumerate(goods_list):
-            values = [g.code, g.name, g.category or "", g.spec or "", g.unit or ""]
-            for col, value in enumerate(values):
-                item = QTableWidgetItem(str(value))
-                item.setData(Qt.UserRole, g.id)
-                if col == 0:
-                    # 只在第一列存 id
-                    item.setData(Qt.UserRole, g.id)
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table.setItem(row, col, item)
+            page = GoodsService.list_page(
+                session, keyword=self._keyword, cursor=cursor, page_size=limit
+            )
+            rows = [
+                (g.id, g.code, g.name, g.category or "", g.spec or "", g.unit or "")
+                for g in page.rows
+            ]
+        return rows, page.next_cursor
+
+    def _on_load_failed(self, message: str) -> None:
+        QMessageBox.warning(self, "查询失败", message)
+
+    def _on_chunk_loaded(self, chunk_index: int) -> None:
+        # 只在第一块到达时按样本行计算一次列宽
+        if chunk_index == 0:
+            self.table.resizeColumnsToContents()
 
     def _get_selected_goods_id(self) -> int | None:
-        row = self.table.currentRow()
-        if row < 0:
+        index = self.table.currentIndex()
+        if not index.isValid():
             return None
-        item = self.table.item(row, 0)
-        if not item:
-            return None
-        gid = item.data(Qt.UserRole)
+        gid = self.model.row_key(index.row())
         return int(gid) if gid is not None else None
 
     # ---------- 按钮操作 ----------
@@ -151,6 +164,50 @@ class GoodsView(QWidget):
             GoodsService.delete(session, gid)
         self.refresh_table()
 
+    def import_goods(self) -> None:
+        filepath, _ = QFileDialog.getOpenFileName(self, "导入商品", "", IMPORT_FILE_FILTER)
+        if not filepath:
+            return
+        task = ImportTask(
+            self,
+            "正在导入商品……",
+            # 整个导入在一个写事务中完成，取消时全部回滚
+            lambda progress: run_write_transaction(
+                lambda session: GoodsImportService.import_file(session, filepath, progress)
+            ),
+        )
+        task.finished.connect(self._on_import_finished)
+        task.cancelled.connect(lambda: QMessageBox.information(self, "导入", "导入已取消，未写入任何数据"))
+        task.failed.connect(lambda message: QMessageBox.warning(self, "导入失败", message))
+        # 导入结束后恢复按钮原来的状态（只读用户的按钮保持禁用）
+        was_enabled = self.import_btn.isEnabled()
+        self.import_btn.setEnabled(False)
+        task.destroyed.connect(lambda: self.import_btn.setEnabled(was_enabled))
+        task.start()
+
+    def _on_import_finished(self, result: GoodsImportResult) -> None:
+        self.refresh_table()
+        summary = (
+            f"共 {result.total_rows} 行：新增 {result.inserted}，更新 {result.updated}，"
+            f"出错 {len(result.errors)}（耗时 {result.elapsed:.1f} 秒）"
+        )
+        if not result.errors:
+            QMessageBox.information(self, "导入完成", summary)
+            return
+        if (
+            QMessageBox.question(self, "导入完成", f"{summary}\n\n是否保存错误明细？")
+            != QMessageBox.Yes
+        ):
+            return
+        filepath, _ = QFileDialog.getSaveFileName(
+            self, "保存错误明细", "商品导入错误.csv", "CSV 文件 (*.csv)"
+        )
+        if filepath:
+            try:
+                write_error_report(filepath, result.errors)
+            except OSError as exc:
+                QMessageBox.warning(self, "保存失败", str(exc))
+
 
 class GoodsEditDialog(QDialog):
     """新增/编辑商品对话框。"""
@@ -173,6 +230,11 @@ class GoodsEditDialog(QDialog):
         self.min_stock_edit = QLineEdit(self)
         self.remark_edit = QLineEdit(self)
 
+        # 分类输入提示取自商品目录缓存
+        with get_session() as session:
+            categories = GOODS_CATALOG.categories(session)
+        self.category_edit.setCompleter(QCompleter(categories, self))
+
         form.addRow("编码*", self.code_edit)
         form.addRow("名称*", self.name_edit)
         form.addRow("分类", self.category_edit)
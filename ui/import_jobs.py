@@ -0,0 +1,120 @@
+import threading
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtWidgets import QProgressDialog, QWidget
+
+from services.import_readers import ImportCancelled, ImportProgress
+
+# 导入函数：(进度回调) -> 导入结果；事务由导入函数自行划分
+ImportFn = Callable[[ImportProgress], Any]
+
+# 导入专用线程池：同一时间只执行一个导入，避免多个大事务争抢写锁
+_POOL: Optional[QThreadPool] = None
+
+
+def import_pool() -> QThreadPool:
+    global _POOL
+    if _POOL is None:
+        _POOL = QThreadPool()
+        _POOL.setMaxThreadCount(1)
+    return _POOL
+
+
+class _ImportSignals(QObject):
+    progress = Signal(int, int)
+    finished = Signal(object)
+    cancelled = Signal()
+    failed = Signal(str)
+
+
+class _ImportRunnable(QRunnable):
+    """在导入线程中执行导入，进度与结果经信号回到界面线程。"""
+
+    def __init__(
+        self, run_import: ImportFn, cancelled: threading.Event, signals: _ImportSignals
+    ) -> None:
+        super().__init__()
+        self._import = run_import
+        self._cancelled = cancelled
+        self.signals = signals
+
+    def _progress(self, rows: int, total: int) -> None:
+        if self._cancelled.is_set():
+            raise ImportCancelled()
+        self.signals.progress.emit(rows, total)
+
+    def run(self) -> None:
+        try:
+            result = self._import(self._progress)
+        except ImportCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as exc:  # 交给界面线程统一提示
+            self.signals.failed.emit(str(exc))
+            return
+        self.signals.finished.emit(result)
+
+
+class ImportTask(QObject):
+    """后台执行一次导入，并显示可取消的进度对话框。
+
+    取消后，导入函数下一次报告进度时抛出 ImportCancelled 中止导入，
+    已提交的部分是否保留由导入函数决定。
+    finished(result) / cancelled() / failed(message) 在界面线程中发出。
+    """
+
+    finished = Signal(object)
+    cancelled = Signal()
+    failed = Signal(str)
+
+    def __init__(self, parent: QWidget, title: str, run_import: ImportFn) -> None:
+        super().__init__(parent)
+        self._cancel_requested = threading.Event()
+        self._signals = _ImportSignals()
+        self._signals.progress.connect(self._on_progress)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.cancelled.connect(self._on_cancelled)
+        self._signals.failed.connect(self._on_failed)
+        self._runnable = _ImportRunnable(run_import, self._cancel_requested, self._signals)
+
+        self._dialog = QProgressDialog(title, "取消", 0, 0, parent)
+        self._dialog.setWindowTitle("导入")
+        self._dialog.setWindowModality(Qt.WindowModal)
+        self._dialog.setMinimumDuration(0)
+        # 进度对话框由本任务关闭，不随进度到达最大值自动关闭或重置
+        self._dialog.setAutoClose(False)
+        self._dialog.setAutoReset(False)
+        self._dialog.canceled.connect(self._on_cancel_clicked)
+
+    def start(self) -> None:
+        self._dialog.show()
+        import_pool().start(self._runnable)
+
+    def _on_cancel_clicked(self) -> None:
+        self._cancel_requested.set()
+        self._dialog.setLabelText("正在取消……")
+
+    def _on_progress(self, rows: int, total: int) -> None:
+        if self._cancel_requested.is_set():
+            return
+        self._dialog.setMaximum(max(total, 1))
+        self._dialog.setValue(min(rows, max(total, 1)))
+        self._dialog.setLabelText(f"已处理 {rows:,} / {total:,} 行")
+
+    def _close(self) -> None:
+        self._dialog.canceled.disconnect(self._on_cancel_clicked)
+        self._dialog.close()
+        self.deleteLater()
+
+    def _on_finished(self, result: Any) -> None:
+        self._close()
+        self.finished.emit(result)
+
+    def _on_cancelled(self) -> None:
+        self._close()
+        self.cancelled.emit()
+
+    def _on_failed(self, message: str) -> None:
+        self._close()
+        self.failed.emit(message)
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+from ui.query_runner import QueryRunner
+
+# 每行数据：(行主键, 第 1 列文本, 第 2 列文本, ...)
+Row = Tuple[Any, ...]
+# fetch_page(cursor, limit) -> (rows, next_cursor)，next_cursor 为 None 表示没有更多数据
+FetchPage = Callable[[Optional[str], int], Tuple[List[Row], Optional[str]]]
+
+
+class LazyTableModel(QAbstractTableModel):
+    """按需分块加载的只读表格模型。
+
+    视图滚动到底部时通过 canFetchMore/fetchMore 用游标分页取下一块；
+    内存中只保留最近访问的若干块，被淘汰的块只记住起始游标，再次显示时重新查询。
+    所有查询都在后台线程执行，数据到达前对应单元格暂时为空。
+    """
+
+    chunk_loaded = Signal(int)
+    load_failed = Signal(str)
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        fetch_page: FetchPage,
+        chunk_size: int = 200,
+        max_cached_chunks: int = 25,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._fetch_page = fetch_page
+        self._chunk_size = chunk_size
+        self._max_cached_chunks = max_cached_chunks
+        self._cursors: List[Optional[str]] = [None]
+        self._chunks: "OrderedDict[int, List[Row]]" = OrderedDict()
+        self._row_count = 0
+        self._at_end = False
+        self._runner = QueryRunner(self)
+
+    # ---------- 数据源 ----------
+    def reset(self) -> None:
+        """丢弃已加载的数据，从第一块重新开始（查询条件变化时调用）。"""
+        self.beginResetModel()
+        self._runner.cancel_all()
+        self._cursors = [None]
+        self._chunks.clear()
+        self._row_count = 0
+        self._at_end = False
+        self.endResetModel()
+
+    def row_key(self, row: int) -> Any:
+        record = self._record(row)
+        return None if record is None else record[0]
+
+    def _record(self, row: int) -> Optional[Row]:
+        if row < 0 or row >= self._row_count:
+            return None
+        chunk_index, offset = divmod(row, self._chunk_size)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            self._reload_chunk(chunk_index)
+            return None
+        self._chunks.move_to_end(chunk_index)
+        return chunk[offset] if offset < len(chunk) else None
+
+    def _reload_chunk(self, chunk_index: int) -> None:
+        """后台重新读取已被淘汰的块，读到后刷新这一块的单元格。"""
+        channel = f"chunk-{chunk_index}"
+        if self._runner.is_busy(channel):
+            return
+        cursor = self._cursors[chunk_index]
+
+        def _done(result) -> None:
+            self._remember(chunk_index, result[0])
+            first = chunk_index * self._chunk_size
+            last = min(first + self._chunk_size, self._row_count) - 1
+            self.dataChanged.emit(
+                self.index(first, 0), self.index(last, self.columnCount() - 1)
+            )
+
+        self._runner.submit(
+            channel,
+            lambda: self._fetch_page(cursor, self._chunk_size),
+            _done,
+            self.load_failed.emit,
+        )
+
+    def _remember(self, chunk_index: int, rows: List[Row]) -> None:
+        self._chunks[chunk_index] = rows
+        self._chunks.move_to_end(chunk_index)
+        while len(self._chunks) > self._max_cached_chunks:
+            self._chunks.popitem(last=False)
+
+    # ---------- QAbstractTableModel ----------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            record = self._record(index.row())
+            return None if record is None else record[index.column() + 1]
+        if role == Qt.UserRole:
+            return self.row_key(index.row())
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and not self._at_end and not self._runner.is_busy("more")
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._at_end or self._runner.is_busy("more"):
+            return
+        chunk_index = len(self._cursors) - 1
+        cursor = self._cursors[chunk_index]
+        self._runner.submit(
+            "more",
+            lambda: self._fetch_page(cursor, self._chunk_size),
+            lambda result: self._append_chunk(chunk_index, *result),
+            self.load_failed.emit,
+        )
+
+    def _append_chunk(
+        self, chunk_index: int, rows: List[Row], next_cursor: Optional[str]
+    ) -> None:
+        if next_cursor is None:
+            self._at_end = True
+        else:
+            self._cursors.append(next_cursor)
+        if rows:
+            first = self._row_count
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._remember(chunk_index, rows)
+            self._row_count += len(rows)
+            self.endInsertRows()
+        self.chunk_loaded.emit(chunk_index)
+
+
+def configure_lazy_table(view: QTableView, sample_rows: int = 100) -> None:
+    """为大数据量表格设置固定行高、按样本行计算列宽，避免逐行测量内容。"""
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.setSelectionBehavior(QAbstractItemView.SelectRows)
+    view.setSelectionMode(QAbstractItemView.SingleSelection)
+    view.setWordWrap(False)
+    vertical = view.verticalHeader()
+    vertical.setSectionResizeMode(QHeaderView.Fixed)
+    vertical.setDefaultSectionSize(view.fontMetrics().height() + 10)
+    header = view.horizontalHeader()
+    header.setStretchLastSection(True)
+    header.setSectionResizeMode(QHeaderView.Interactive)
+    header.setResizeContentsPrecision(sample_rows)
@@ -1,3 +1,6 @@
+from typing import Callable, List
+
+from PySide6.QtGui import QCloseEvent
 from PySide6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -8,15 +11,13 @@ from PySide6.QtWidgets import (
     QLabel,
 )
 
-from ui.goods_view import GoodsView
-from ui.stock_in_view import StockInView
-from ui.stock_out_view import StockOutView
-from ui.stock_view import StockView
-from ui.report_view import ReportView
-
 
 class MainWindow(QMainWindow):
-    """应用主窗口：左侧菜单 + 右侧内容区。"""
+    """应用主窗口：左侧菜单 + 右侧内容区。
+
+    各功能页面在第一次切换到时才创建并加载数据，登录后只需构建外壳即可显示窗口；
+    报表页面依赖的 pandas/openpyxl 也因此推迟到打开报表中心时才导入。
+    """
 
     def __init__(self, current_user=None, parent: QWidget | None = None) -> None:
         super().__init__(parent)
@@ -42,41 +43,102 @@ class MainWindow(QMainWindow):
             self.report_index = self.menu_list.count()
             self.menu_list.addItem(QListWidgetItem("报表中心"))      # index 4 (if added)
 
-        # 右侧内容区
+        # 右侧内容区：先放占位页，首次切换到某页时再创建真正的页面
         self.stack = QStackedWidget(central)
-        self.goods_view = GoodsView()
-        self.stock_in_view = StockInView()
-        self.stock_out_view = StockOutView()
-        self.stock_view = StockView()
-        self.report_view = ReportView()
-
-        self.stack.addWidget(self.goods_view)
-        self.stack.addWidget(self.stock_in_view)
-        self.stack.addWidget(self.stock_out_view)
-        self.stack.addWidget(self.stock_view)
-        self.stack.addWidget(self.report_view)
+        self.goods_view = None
+        self.stock_in_view = None
+        self.stock_out_view = None
+        self.stock_view = None
+        self.report_view = None
+        self._view_factories: List[Callable[[], QWidget]] = [
+            self._create_goods_view,
+            self._create_stock_in_view,
+            self._create_stock_out_view,
+            self._create_stock_view,
+            self._create_report_view,
+        ]
+        self._created = [False] * len(self._view_factories)
+        for _ in self._view_factories:
+            self.stack.addWidget(QLabel("加载中…", self.stack))
 
         layout.addWidget(self.menu_list)
         layout.addWidget(self.stack, 1)
 
         self.setCentralWidget(central)
 
-        self.menu_list.currentRowChanged.connect(self.stack.setCurrentIndex)
+        self.menu_list.currentRowChanged.connect(self._activate_page)
         self.menu_list.setCurrentRow(0)
 
+        # 状态栏显示当前用户信息
         role = getattr(self.current_user, "role", None)
+        user_name = getattr(self.current_user, "username", "未知用户")
+        role = role or "unknown"
+        status = self.statusBar()
+        status.showMessage(f"当前用户：{user_name}（角色：{role}）")
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        # 后台导出未完成时先确认并取消，避免进程退出时留下写了一半的文件
+        if self.report_view is not None and not self.report_view.confirm_close():
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+    # ---------- 页面按需创建 ----------
+    def _activate_page(self, index: int) -> None:
+        if 0 <= index < len(self._view_factories) and not self._created[index]:
+            self._created[index] = True
+            placeholder = self.stack.widget(index)
+            view = self._view_factories[index]()
+            self.stack.insertWidget(index, view)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            # 页面显示后再发起首次查询（查询本身在后台线程执行）
+            refresh = getattr(view, "refresh_table", None)
+            if refresh is not None:
+                refresh()
+        self.stack.setCurrentIndex(index)
+
+    def _is_viewer(self) -> bool:
+        return getattr(self.current_user, "role", None) == "viewer"
 
+    def _create_goods_view(self) -> QWidget:
+        from ui.goods_view import GoodsView
+
+        self.goods_view = GoodsView()
         # 简单基于角色的按钮控制示例
-        if role == "viewer":
+        if self._is_viewer():
             self.goods_view.add_btn.setEnabled(False)
             self.goods_view.edit_btn.setEnabled(False)
             self.goods_view.delete_btn.setEnabled(False)
+            self.goods_view.import_btn.setEnabled(False)
+        return self.goods_view
+
+    def _create_stock_in_view(self) -> QWidget:
+        from ui.stock_in_view import StockInView
+
+        self.stock_in_view = StockInView()
+        if self._is_viewer():
             self.stock_in_view.new_btn.setEnabled(False)
+            self.stock_in_view.import_btn.setEnabled(False)
+        return self.stock_in_view
+
+    def _create_stock_out_view(self) -> QWidget:
+        from ui.stock_out_view import StockOutView
+
+        self.stock_out_view = StockOutView()
+        if self._is_viewer():
             self.stock_out_view.new_btn.setEnabled(False)
+            self.stock_out_view.import_btn.setEnabled(False)
+        return self.stock_out_view
 
-        # 状态栏显示当前用户信息
-        user_name = getattr(self.current_user, "username", "未知用户")
-        role = role or "unknown"
-        status = self.statusBar()
-        status.showMessage(f"当前用户：{user_name}（角色：{role}）")
+    def _create_stock_view(self) -> QWidget:
+        from ui.stock_view import StockView
 
+        self.stock_view = StockView()
+        return self.stock_view
+
+    def _create_report_view(self) -> QWidget:
+        from ui.report_view import ReportView
+
+        self.report_view = ReportView()
+        return self.report_view
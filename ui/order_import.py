@@ -0,0 +1,70 @@
+from typing import Callable
+
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QWidget
+
+from services.import_readers import IMPORT_FILE_FILTER, write_error_report
+from services.order_import_service import ORDER_IMPORT_KINDS, OrderImportResult, OrderImportService
+from ui.import_jobs import ImportTask
+
+
+def import_orders(parent: QWidget, kind: str, on_done: Callable[[], None]) -> None:
+    """选择文件并在后台导入入库单 / 出库单，结束后提示结果并调用 on_done 刷新列表。
+
+    单据按批提交：取消或出错时已提交的单据保留，再次导入同一文件会从中断处继续。
+    """
+    label = ORDER_IMPORT_KINDS[kind]
+    filepath, _ = QFileDialog.getOpenFileName(parent, f"导入{label}单", "", IMPORT_FILE_FILTER)
+    if not filepath:
+        return
+
+    def finished(result: OrderImportResult) -> None:
+        on_done()
+        _show_result(parent, label, result)
+
+    def cancelled() -> None:
+        on_done()
+        QMessageBox.information(
+            parent, "导入", "导入已取消，已提交的单据保留；再次导入同一文件将从中断处继续"
+        )
+
+    def failed(message: str) -> None:
+        on_done()
+        QMessageBox.warning(
+            parent, "导入失败", f"{message}\n\n已提交的单据保留，再次导入同一文件将从中断处继续"
+        )
+
+    task = ImportTask(
+        parent,
+        f"正在导入{label}单……",
+        lambda progress: OrderImportService.import_file(filepath, kind, progress),
+    )
+    task.finished.connect(finished)
+    task.cancelled.connect(cancelled)
+    task.failed.connect(failed)
+    task.start()
+
+
+def _show_result(parent: QWidget, label: str, result: OrderImportResult) -> None:
+    if result.completed_before:
+        QMessageBox.information(parent, "导入", "该文件此前已全部导入，本次未做任何处理")
+        return
+    summary = f"过账{label}单 {result.orders_posted} 张，出错 {result.orders_failed} 张"
+    if result.resumed_from:
+        summary += f"（从第 {result.resumed_from} 行之后继续，跳过已处理的 {result.orders_skipped} 张）"
+    summary += f"，耗时 {result.elapsed:.1f} 秒"
+    if not result.errors:
+        QMessageBox.information(parent, "导入完成", summary)
+        return
+    if (
+        QMessageBox.question(parent, "导入完成", f"{summary}\n\n是否保存错误明细？")
+        != QMessageBox.Yes
+    ):
+        return
+    filepath, _ = QFileDialog.getSaveFileName(
+        parent, "保存错误明细", f"{label}单导入错误.csv", "CSV 文件 (*.csv)"
+    )
+    if filepath:
+        try:
+            write_error_report(filepath, result.errors)
+        except OSError as exc:
+            QMessageBox.warning(parent, "保存失败", str(exc))
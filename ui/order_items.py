@@ -0,0 +1,100 @@
+"""入库 / 出库对话框共用的明细解析。
+
+明细表格前三列固定为：商品编码*、数量*、单价；出库对话框另有可选的第四、五列
+批次、库位（留空表示不限）。先在内存中逐行校验格式，
+再经商品目录缓存（未命中的编码一次批量查询）把全部编码解析为商品 id，
+所有问题（包括全部不存在的编码）一次性报告。过账时再由 ensure_codes_current
+在写事务中核对编码与 id 的对应关系，防止按过期的缓存过账。
+"""
+
+from typing import List
+
+from PySide6.QtWidgets import QTableWidget
+from sqlalchemy.orm import Session
+
+from services.base import get_session
+from services.goods_catalog import GOODS_CATALOG
+
+# 错误提示最多列出的条数，其余只给出数量
+MAX_REPORTED_ERRORS = 20
+
+
+def _cell_text(table: QTableWidget, row: int, col: int) -> str:
+    item = table.item(row, col)
+    return item.text().strip() if item else ""
+
+
+def _format_errors(errors: List[str]) -> str:
+    lines = errors[:MAX_REPORTED_ERRORS]
+    if len(errors) > MAX_REPORTED_ERRORS:
+        lines.append(f"……另有 {len(errors) - MAX_REPORTED_ERRORS} 个问题")
+    return "\n".join(lines)
+
+
+def collect_order_items(table: QTableWidget) -> list[dict]:
+    """解析明细表格，返回 [{"code", "goods_id", "quantity", "price", "batch_no", "location"}]；
+    有任何问题时抛出 ValueError 列出全部问题。没有批次、库位列或留空时对应值为 None。
+    """
+    errors: List[str] = []
+    parsed: list[tuple[int, str, float, float | None, str | None, str | None]] = []
+    has_batch_location = table.columnCount() >= 5
+    for row in range(table.rowCount()):
+        line = row + 1
+        code = _cell_text(table, row, 0)
+        qty_text = _cell_text(table, row, 1)
+        price_text = _cell_text(table, row, 2)
+        if not code or not qty_text:
+            errors.append(f"第 {line} 行：商品编码和数量为必填项")
+            continue
+        try:
+            quantity = float(qty_text)
+        except ValueError:
+            errors.append(f"第 {line} 行：数量不是有效数字: {qty_text}")
+            continue
+        if quantity <= 0:
+            errors.append(f"第 {line} 行：数量必须大于 0")
+            continue
+        price = None
+        if price_text:
+            try:
+                price = float(price_text)
+            except ValueError:
+                errors.append(f"第 {line} 行：单价不是有效数字: {price_text}")
+                continue
+        batch_no = location = None
+        if has_batch_location:
+            batch_no = _cell_text(table, row, 3) or None
+            location = _cell_text(table, row, 4) or None
+        parsed.append((line, code, quantity, price, batch_no, location))
+
+    with get_session() as session:
+        goods_ids = GOODS_CATALOG.resolve_codes(session, [row[1] for row in parsed])
+    unknown = sorted({row[1] for row in parsed if row[1] not in goods_ids})
+    if unknown:
+        errors.append(f"以下商品编码不存在（{len(unknown)} 个）: {', '.join(unknown)}")
+    if errors:
+        raise ValueError(_format_errors(errors))
+
+    return [
+        {
+            "code": code,
+            "goods_id": goods_ids[code],
+            "quantity": quantity,
+            "price": price,
+            "batch_no": batch_no,
+            "location": location,
+        }
+        for _, code, quantity, price, batch_no, location in parsed
+    ]
+
+
+def ensure_codes_current(session: Session, items: list[dict]) -> None:
+    """在过账的写事务中核对明细的商品编码仍对应解析时的商品，否则抛出 ValueError。
+
+    编码经目录缓存解析，其他工作站可能已在此期间修改或复用了编码，不能按旧 id 过账。
+    """
+    resolved = {item["code"]: item["goods_id"] for item in items}
+    verified = GOODS_CATALOG.verify_codes(session, resolved)
+    changed = sorted(code for code, gid in resolved.items() if verified.get(code) != gid)
+    if changed:
+        raise ValueError(f"以下商品编码已被修改或删除，请重新填写明细: {', '.join(changed)}")
@@ -0,0 +1,108 @@
+import threading
+from itertools import count
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# 数据库查询专用线程池；SQLite WAL 模式下多个读连接可以并行
+_POOL: Optional[QThreadPool] = None
+
+
+def query_pool() -> QThreadPool:
+    global _POOL
+    if _POOL is None:
+        _POOL = QThreadPool()
+        _POOL.setMaxThreadCount(2)
+    return _POOL
+
+
+class _JobSignals(QObject):
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _QueryJob(QRunnable):
+    """在工作线程中执行一次查询函数，结果经信号回到界面线程。"""
+
+    def __init__(self, ticket: int, fn: Callable[[], Any], signals: _JobSignals) -> None:
+        super().__init__()
+        self.ticket = ticket
+        self._fn = fn
+        self.signals = signals
+        self.cancelled = threading.Event()
+
+    def run(self) -> None:
+        # 排队期间已被新请求取代的任务不再访问数据库
+        if self.cancelled.is_set():
+            return
+        try:
+            result = self._fn()
+        except Exception as exc:  # 交给界面线程统一提示
+            self.signals.failed.emit(self.ticket, str(exc))
+            return
+        self.signals.finished.emit(self.ticket, result)
+
+
+class QueryRunner(QObject):
+    """在后台线程执行数据库查询，避免 SQLite 查询阻塞 Qt 事件循环。
+
+    查询函数必须自行打开会话（get_session），并只返回普通 Python 数据（元组、字符串等），
+    不要把 ORM 对象带回界面线程。同一 channel 上的新请求会作废旧请求：
+    尚未开始的出队后直接跳过，已经在执行的结果到达后被丢弃。
+    """
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._tickets = count(1)
+        self._latest: Dict[str, int] = {}
+        self._jobs: Dict[int, tuple] = {}
+
+    def submit(
+        self,
+        channel: str,
+        fn: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Callable[[str], None] | None = None,
+    ) -> None:
+        self.cancel(channel)
+        ticket = next(self._tickets)
+        signals = _JobSignals()
+        signals.finished.connect(self._on_finished)
+        signals.failed.connect(self._on_failed)
+        job = _QueryJob(ticket, fn, signals)
+        self._latest[channel] = ticket
+        self._jobs[ticket] = (channel, job.cancelled, signals, on_done, on_error)
+        query_pool().start(job)
+
+    def cancel(self, channel: str) -> None:
+        """作废 channel 上尚未返回的请求。"""
+        ticket = self._latest.pop(channel, None)
+        if ticket is None:
+            return
+        entry = self._jobs.pop(ticket, None)
+        if entry is not None:
+            entry[1].set()
+
+    def cancel_all(self) -> None:
+        for channel in list(self._latest):
+            self.cancel(channel)
+
+    def is_busy(self, channel: str) -> bool:
+        return channel in self._latest
+
+    def _take(self, ticket: int):
+        entry = self._jobs.pop(ticket, None)
+        if entry is None:
+            return None
+        del self._latest[entry[0]]
+        return entry
+
+    def _on_finished(self, ticket: int, result: Any) -> None:
+        entry = self._take(ticket)
+        if entry is not None:
+            entry[3](result)
+
+    def _on_failed(self, ticket: int, message: str) -> None:
+        entry = self._take(ticket)
+        if entry is not None and entry[4] is not None:
+            entry[4](message)
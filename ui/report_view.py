@@ -1,6 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from pathlib import Path
 
 from PySide6.QtWidgets import (
+    QApplication,
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
@@ -9,16 +11,34 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QMessageBox,
     QDateEdit,
+    QLineEdit,
+    QComboBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QAbstractItemView,
 )
-from PySide6.QtCore import QDate
+from PySide6.QtCore import QDate, Qt
 
-from services.base import get_session
-from services.report_service import ReportService
+from services.base import run_write_transaction
+from services.report_service import PERIOD_GROUPS, ReportService
+from services.report_writers import DEFAULT_FORMAT, EXPORT_FORMATS
+from services.stock_snapshot_service import StockSnapshotService
 from config.settings import EXPORT_DIR
+from ui.export_jobs import ExportFn, ExportJob, ExportJobQueue
+
+
+def _format_size(size: int | None) -> str:
+    if size is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
 
 class ReportView(QWidget):
-    """报表中心：导出库存汇总与出入库明细。"""
+    """报表中心：导出库存汇总与出入库明细（Excel / CSV / Parquet）。"""
 
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
@@ -28,7 +48,7 @@ class ReportView(QWidget):
         # 库存汇总导出
         stock_layout = QHBoxLayout()
         stock_layout.addWidget(QLabel("库存汇总表：", self))
-        self.export_stock_btn = QPushButton("导出 Excel", self)
+        self.export_stock_btn = QPushButton("导出", self)
         stock_layout.addWidget(self.export_stock_btn)
         stock_layout.addStretch(1)
         main_layout.addLayout(stock_layout)
@@ -46,55 +66,235 @@ class ReportView(QWidget):
         self.end_date_edit.setCalendarPopup(True)
         range_layout.addWidget(self.end_date_edit)
 
-        self.export_inout_btn = QPushButton("导出 Excel", self)
+        self.export_inout_btn = QPushButton("导出", self)
         range_layout.addWidget(self.export_inout_btn)
         range_layout.addStretch(1)
         main_layout.addLayout(range_layout)
 
-        main_layout.addStretch(1)
+        # 明细筛选条件（均可留空）
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("商品编码", self))
+        self.goods_code_edit = QLineEdit(self)
+        filter_layout.addWidget(self.goods_code_edit)
+        filter_layout.addWidget(QLabel("供应商", self))
+        self.supplier_edit = QLineEdit(self)
+        filter_layout.addWidget(self.supplier_edit)
+        filter_layout.addWidget(QLabel("客户", self))
+        self.customer_edit = QLineEdit(self)
+        filter_layout.addWidget(self.customer_edit)
+        filter_layout.addWidget(QLabel("出库类型", self))
+        self.out_type_combo = QComboBox(self)
+        self.out_type_combo.addItem("全部", None)
+        for out_type in ("sale", "use", "scrap"):
+            self.out_type_combo.addItem(out_type, out_type)
+        filter_layout.addWidget(self.out_type_combo)
+        filter_layout.addStretch(1)
+        main_layout.addLayout(filter_layout)
+
+        # 期间汇总导出（读取每日汇总表，使用上方日期范围）
+        period_layout = QHBoxLayout()
+        period_layout.addWidget(QLabel("期间汇总：", self))
+        self.period_group_combo = QComboBox(self)
+        for key, label in PERIOD_GROUPS.items():
+            self.period_group_combo.addItem(label, key)
+        period_layout.addWidget(self.period_group_combo)
+        self.export_period_btn = QPushButton("导出", self)
+        period_layout.addWidget(self.export_period_btn)
+        period_layout.addWidget(QLabel("（使用上方日期范围）", self))
+        period_layout.addStretch(1)
+        main_layout.addLayout(period_layout)
+
+        # 历史时点库存导出（检查点 + 其后流水）
+        as_of_layout = QHBoxLayout()
+        as_of_layout.addWidget(QLabel("历史时点库存：", self))
+        self.as_of_date_edit = QDateEdit(self)
+        self.as_of_date_edit.setCalendarPopup(True)
+        as_of_layout.addWidget(self.as_of_date_edit)
+        as_of_layout.addWidget(QLabel("日终", self))
+        self.export_as_of_btn = QPushButton("导出", self)
+        as_of_layout.addWidget(self.export_as_of_btn)
+        as_of_layout.addStretch(1)
+        main_layout.addLayout(as_of_layout)
+
+        # 导出任务列表：后台逐个执行，可取消
+        jobs_header = QHBoxLayout()
+        jobs_header.addWidget(QLabel("导出任务：", self))
+        jobs_header.addStretch(1)
+        self.cancel_job_btn = QPushButton("取消选中任务", self)
+        jobs_header.addWidget(self.cancel_job_btn)
+        main_layout.addLayout(jobs_header)
+
+        self.jobs_table = QTableWidget(0, 7, self)
+        self.jobs_table.setHorizontalHeaderLabels(
+            ["任务", "文件", "状态", "已导出行数", "进度", "耗时", "文件大小"]
+        )
+        self.jobs_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.jobs_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.jobs_table.horizontalHeader().setStretchLastSection(True)
+        main_layout.addWidget(self.jobs_table, 1)
 
         # 默认日期：最近 30 天
         today = QDate.currentDate()
         self.end_date_edit.setDate(today)
         self.start_date_edit.setDate(today.addDays(-30))
+        self.as_of_date_edit.setDate(today.addDays(-today.day()))
 
         # 事件绑定
         self.export_stock_btn.clicked.connect(self.export_stock_summary)
         self.export_inout_btn.clicked.connect(self.export_inout_detail)
+        self.export_period_btn.clicked.connect(self.export_period_summary)
+        self.export_as_of_btn.clicked.connect(self.export_stock_summary_as_of)
+        self.cancel_job_btn.clicked.connect(self.cancel_selected_job)
 
-    def _choose_save_path(self, default_name: str) -> str | None:
-        default_path = str(EXPORT_DIR / default_name)
-        path, _ = QFileDialog.getSaveFileName(
+        self._jobs = ExportJobQueue(self)
+        self._job_rows: dict[int, int] = {}
+        self._jobs.job_changed.connect(self._on_job_changed)
+        self._jobs.job_failed.connect(self._on_job_failed)
+
+    def _choose_save_path(self, default_name: str) -> tuple[str, str] | None:
+        """选择保存位置与导出格式，返回 (文件路径, 格式)；格式由所选过滤器或扩展名决定。"""
+        default_path = str(EXPORT_DIR / f"{default_name}{EXPORT_FORMATS[DEFAULT_FORMAT][0]}")
+        filters = {name_filter: fmt for fmt, (_, name_filter) in EXPORT_FORMATS.items()}
+        path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "选择保存位置",
             default_path,
-            "Excel 文件 (*.xlsx)",
+            ";;".join(filters),
         )
-        return path or None
+        if not path:
+            return None
+        suffix = Path(path).suffix.lower()
+        for fmt, (extension, _) in EXPORT_FORMATS.items():
+            if suffix == extension:
+                return path, fmt
+        fmt = filters.get(selected_filter, DEFAULT_FORMAT)
+        return path + EXPORT_FORMATS[fmt][0], fmt
 
-    def export_stock_summary(self) -> None:
-        filepath = self._choose_save_path("库存汇总.xlsx")
-        if not filepath:
-            return
+    def _submit_export(self, title: str, filepath: str, export: ExportFn) -> None:
+        """把导出加入后台任务队列，可连续提交多个导出。"""
+        self._jobs.submit(title, filepath, export)
+
+    def _on_job_changed(self, job_id: int) -> None:
+        job = self._jobs.job(job_id)
+        row = self._job_rows.get(job_id)
+        if row is None:
+            row = self.jobs_table.rowCount()
+            self.jobs_table.insertRow(row)
+            self._job_rows[job_id] = row
+        self._fill_job_row(row, job)
+
+    def _fill_job_row(self, row: int, job: ExportJob) -> None:
+        duration = job.duration
+        percent = job.percent
+        values = [
+            job.title,
+            job.filepath,
+            job.status,
+            f"{job.rows:,}",
+            "" if percent is None else f"{percent}%",
+            "" if duration is None else f"{duration:.1f} 秒",
+            _format_size(job.file_size),
+        ]
+        for col, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            if col == 0:
+                item.setData(Qt.UserRole, job.job_id)
+            self.jobs_table.setItem(row, col, item)
+
+    def _on_job_failed(self, job_id: int, message: str) -> None:
+        job = self._jobs.job(job_id)
+        QMessageBox.warning(self, "导出失败", f"{job.title}：{message}")
+
+    def confirm_close(self) -> bool:
+        """主窗口关闭前调用：有未完成的导出时询问是否退出。
+
+        确认后取消全部导出并等待导出线程结束，未写完的文件由导出自行删除；返回 False 表示不关闭。
+        """
+        if not self._jobs.has_pending():
+            return True
+        if (
+            QMessageBox.question(
+                self, "退出", "还有未完成的导出任务，退出将取消这些任务并删除未写完的文件。确定退出吗？"
+            )
+            != QMessageBox.Yes
+        ):
+            return False
+        QApplication.setOverrideCursor(Qt.WaitCursor)
         try:
-            with get_session() as session:
-                ReportService.export_stock_summary(session, filepath)
-        except Exception as exc:
-            QMessageBox.warning(self, "导出失败", str(exc))
+            self._jobs.cancel_all(wait=True)
+        finally:
+            QApplication.restoreOverrideCursor()
+        return True
+
+    def cancel_selected_job(self) -> None:
+        row = self.jobs_table.currentRow()
+        if row < 0:
+            QMessageBox.information(self, "提示", "请先选择要取消的导出任务。")
             return
-        QMessageBox.information(self, "导出完成", f"库存汇总已导出到：\n{filepath}")
+        self._jobs.cancel(self.jobs_table.item(row, 0).data(Qt.UserRole))
+
+    def export_stock_summary(self) -> None:
+        chosen = self._choose_save_path("库存汇总")
+        if not chosen:
+            return
+        filepath, fmt = chosen
+        self._submit_export(
+            "库存汇总",
+            filepath,
+            lambda session, progress: ReportService.export_stock_summary(
+                session, filepath, fmt, progress=progress
+            ),
+        )
 
     def export_inout_detail(self) -> None:
-        filepath = self._choose_save_path("出入库明细.xlsx")
-        if not filepath:
+        chosen = self._choose_save_path("出入库明细")
+        if not chosen:
             return
+        filepath, fmt = chosen
         start = self.start_date_edit.date().toPython()
         end = self.end_date_edit.date().toPython() + timedelta(days=1)
-        try:
-            with get_session() as session:
-                ReportService.export_inout_detail(session, filepath, start, end)
-        except Exception as exc:
-            QMessageBox.warning(self, "导出失败", str(exc))
+        filters = {
+            "goods_code": self.goods_code_edit.text().strip() or None,
+            "supplier": self.supplier_edit.text().strip() or None,
+            "customer": self.customer_edit.text().strip() or None,
+            "out_type": self.out_type_combo.currentData(),
+        }
+        self._submit_export(
+            "出入库明细",
+            filepath,
+            lambda session, progress: ReportService.export_inout_detail(
+                session, filepath, start, end, fmt=fmt, progress=progress, **filters
+            ),
+        )
+
+    def export_period_summary(self) -> None:
+        group_by = self.period_group_combo.currentData()
+        chosen = self._choose_save_path(f"期间汇总_{PERIOD_GROUPS[group_by]}")
+        if not chosen:
             return
-        QMessageBox.information(self, "导出完成", f"出入库明细已导出到：\n{filepath}")
+        filepath, fmt = chosen
+        start = self.start_date_edit.date().toPython()
+        end = self.end_date_edit.date().toPython()
+        self._submit_export(
+            f"期间汇总（{PERIOD_GROUPS[group_by]}）",
+            filepath,
+            lambda session, progress: ReportService.export_period_summary(
+                session, filepath, start, end, group_by, fmt, progress
+            ),
+        )
+
+    def export_stock_summary_as_of(self) -> None:
+        day = self.as_of_date_edit.date().toPython()
+        chosen = self._choose_save_path(f"库存汇总_{day:%Y%m%d}")
+        if not chosen:
+            return
+        filepath, fmt = chosen
+        ts = datetime.combine(day, time.max)
+
+        def _export(session, progress) -> int:
+            # 先在单独的写事务中补齐缺失的月度检查点（提交后即释放写锁），
+            # 导出会话保持只读，只需扫描最近检查点之后的流水
+            run_write_transaction(StockSnapshotService.create_monthly_snapshots)
+            return ReportService.export_stock_summary_as_of(session, filepath, ts, fmt, progress)
 
+        self._submit_export(f"历史库存（{day:%Y-%m-%d} 日终）", filepath, _export)
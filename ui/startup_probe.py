@@ -0,0 +1,32 @@
+import logging
+from typing import Callable
+
+from PySide6.QtCore import QEvent, QObject
+
+from utils.startup import STARTUP, StartupTimer
+
+logger = logging.getLogger(__name__)
+
+
+class FirstPaintProbe(QObject):
+    """监听窗口的第一次绘制事件，记录“首屏”时间后自动卸载。"""
+
+    def __init__(
+        self,
+        window,
+        timer: StartupTimer = STARTUP,
+        on_first_paint: Callable[[], None] | None = None,
+    ) -> None:
+        super().__init__(window)
+        self._timer = timer
+        self._on_first_paint = on_first_paint
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            elapsed = self._timer.mark("first_paint")
+            logger.info("启动完成：距进程启动 %.0f ms 完成首屏绘制\n%s", elapsed * 1000, self._timer.report())
+            if self._on_first_paint is not None:
+                self._on_first_paint()
+        return False
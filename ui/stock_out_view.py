@@ -19,10 +19,15 @@ from PySide6.QtWidgets import (
     QComboBox,
 )
 
-from services.base import get_session
+from sqlalchemy import select
+
+from services.base import get_session, run_write_transaction
 from services.stock_out_service import StockOutService, StockOutItemData
+from services.stock_allocation import STRATEGIES
 from models.stock_out import StockOut
-from models.goods import Goods
+from ui.order_import import import_orders
+from ui.order_items import collect_order_items, ensure_codes_current
+from ui.query_runner import QueryRunner
 
 
 class StockOutView(QWidget):
@@ -49,6 +54,8 @@ class StockOutView(QWidget):
         top.addWidget(self.filter_btn)
         self.new_btn = QPushButton("新建出库单", self)
         top.addWidget(self.new_btn)
+        self.import_btn = QPushButton("导入", self)
+        top.addWidget(self.import_btn)
         layout.addLayout(top)
 
         self.table = QTableWidget(self)
@@ -61,52 +68,77 @@ class StockOutView(QWidget):
 
         self.filter_btn.clicked.connect(self.refresh_table)
         self.new_btn.clicked.connect(self.new_stock_out)
-        self.refresh_table()
+        self.import_btn.clicked.connect(lambda: import_orders(self, "stock_out", self.refresh_table))
+        self._runner = QueryRunner(self)
 
     def refresh_table(self) -> None:
         start_dt = self.start_date.date().toPython()
         end_dt = self.end_date.date().toPython()
+        self._runner.submit(
+            "list",
+            lambda: self._query_rows(start_dt, end_dt),
+            self._fill_table,
+            lambda message: QMessageBox.warning(self, "查询失败", message),
+        )
+
+    @staticmethod
+    def _query_rows(start_dt, end_dt) -> list[list[str]]:
+        """在后台线程执行：查询单据列表并转换为显示文本。"""
         with get_session() as session:
-            q = session.query(StockOut).order_by(StockOut.date.desc())
-            q = q.filter(StockOut.date.between(start_dt, datetime(end_dt.year, end_dt.month, end_dt.day, 23, 59, 59)))
-            rows = q.limit(200).all()
-            self.table.setRowCount(len(rows))
-            for i, s in enumerate(rows):
-                values = [
-                    s.order_no,
-                    s.customer or "",
-                    s.date.strftime("%Y-%m-%d %H:%M"),
-                    s.out_type,
-                    "" if s.user_id is None else str(s.user_id),
+            # 只取列表显示的列，由 ix_stock_out_date_list 覆盖，无需回表
+            stmt = (
+                select(StockOut.order_no, StockOut.customer, StockOut.date, StockOut.out_type, StockOut.user_id)
+                .where(StockOut.date.between(start_dt, datetime(end_dt.year, end_dt.month, end_dt.day, 23, 59, 59)))
+                .order_by(StockOut.date.desc())
+                .limit(200)
+            )
+            return [
+                [
+                    order_no,
+                    customer or "",
+                    date.strftime("%Y-%m-%d %H:%M"),
+                    out_type,
+                    "" if user_id is None else str(user_id),
                 ]
-                for col, v in enumerate(values):
-                    self.table.setItem(i, col, QTableWidgetItem(v))
+                for order_no, customer, date, out_type, user_id in session.execute(stmt)
+            ]
+
+    def _fill_table(self, rows: list[list[str]]) -> None:
+        self.table.setRowCount(len(rows))
+        for i, values in enumerate(rows):
+            for col, v in enumerate(values):
+                self.table.setItem(i, col, QTableWidgetItem(v))
 
     def new_stock_out(self) -> None:
         dialog = SimpleStockOutDialog(self)
         if dialog.exec() == QDialog.Accepted:
             data = dialog.get_data()
+            # 过账在 BEGIN IMMEDIATE 写事务中执行，与其他工作站的写入冲突时自动重试
+            def post(session):
+                ensure_codes_current(session, data["items"])
+                return StockOutService.create_stock_out(
+                    session=session,
+                    order_no=data["order_no"],
+                    customer=data["customer"],
+                    date=datetime.now(),
+                    user_id=None,
+                    out_type=data["out_type"],
+                    strategy=data["strategy"],
+                    items=[
+                        StockOutItemData(
+                            goods_id=item["goods_id"],
+                            quantity=item["quantity"],
+                            price=item.get("price"),
+                            batch_no=item.get("batch_no"),
+                            location=item.get("location"),
+                        )
+                        for item in data["items"]
+                    ],
+                    remark=None,
+                )
+
             try:
-                with get_session() as session:
-                    StockOutService.create_stock_out(
-                        session=session,
-                        order_no=data["order_no"],
-                        customer=data["customer"],
-                        date=datetime.now(),
-                        user_id=None,
-                        out_type=data["out_type"],
-                        items=[
-                            StockOutItemData(
-                                goods_id=item["goods_id"],
-                                quantity=item["quantity"],
-                                price=item.get("price"),
-                                batch_no=None,
-                                location=None,
-                            )
-                            for item in data["items"]
-                        ],
-                        remark=None,
-                    )
+                run_write_transaction(post)
             except Exception as exc:
                 QMessageBox.warning(self, "错误", str(exc))
             self.refresh_table()
@@ -126,17 +158,22 @@ class SimpleStockOutDialog(QDialog):
         self.customer_edit = QLineEdit(self)
         self.out_type_combo = QComboBox(self)
         self.out_type_combo.addItems(["sale", "use", "scrap"])
+        self.strategy_combo = QComboBox(self)
+        for name, strategy in STRATEGIES.items():
+            self.strategy_combo.addItem(strategy.label, name)
 
         form.addRow("出库单号*", self.order_no_edit)
         form.addRow("客户", self.customer_edit)
         form.addRow("类型", self.out_type_combo)
+        form.addRow("出库策略", self.strategy_combo)
 
         layout.addLayout(form)
 
         # 明细表格
         self.items_table = QTableWidget(self)
-        self.items_table.setColumnCount(3)
-        self.items_table.setHorizontalHeaderLabels(["商品编码*", "数量*", "单价"])
+        # 批次、库位可留空；填写后由“指定批次/库位”策略只从匹配的库存行扣减
+        self.items_table.setColumnCount(5)
+        self.items_table.setHorizontalHeaderLabels(["商品编码*", "数量*", "单价", "批次", "库位"])
         header = self.items_table.horizontalHeader()
         header.setStretchLastSection(True)
         header.setSectionResizeMode(QHeaderView.ResizeToContents)
@@ -160,6 +197,7 @@ class SimpleStockOutDialog(QDialog):
 
         self.add_row_btn.clicked.connect(self._add_row)
         self.remove_row_btn.clicked.connect(self._remove_row)
+        self._items: list[dict] | None = None
         self._add_row()
 
     def _add_row(self) -> None:
@@ -179,54 +217,23 @@ class SimpleStockOutDialog(QDialog):
             QMessageBox.warning(self, "校验失败", "至少需要一行出库明细")
             return
         try:
-            _ = self._collect_items()
+            # 校验时解析的结果留给 get_data 使用，提交时不再重复查询
+            self._items = self._collect_items()
         except Exception as exc:
             QMessageBox.warning(self, "校验失败", str(exc))
             return
         self.accept()
 
     def _collect_items(self) -> list[dict]:
-        def _to_float(text: str) -> float:
-            return float(text.strip())
-
-        items: list[dict] = []
-        with get_session() as session:
-            for row in range(self.items_table.rowCount()):
-                code_item = self.items_table.item(row, 0)
-                qty_item = self.items_table.item(row, 1)
-                price_item = self.items_table.item(row, 2)
-                code = (code_item.text().strip() if code_item else "") if code_item else ""
-                qty_text = qty_item.text().strip() if qty_item else ""
-                if not code or not qty_text:
-                    raise ValueError("商品编码和数量为必填项")
-                goods = (
-                    session.query(Goods)
-                    .filter(Goods.code == code)
-                    .first()
-                )
-                if not goods:
-                    raise ValueError(f"商品编码不存在: {code}")
-                quantity = _to_float(qty_text)
-                if quantity <= 0:
-                    raise ValueError("数量必须大于 0")
-                price = None
-                if price_item and price_item.text().strip():
-                    price = _to_float(price_item.text())
-                items.append(
-                    {
-                        "goods_id": goods.id,
-                        "quantity": quantity,
-                        "price": price,
-                    }
-                )
-        return items
+        return collect_order_items(self.items_table)
 
     def get_data(self) -> dict:
-        items = self._collect_items()
+        items = self._items if self._items is not None else self._collect_items()
         return {
             "order_no": self.order_no_edit.text().strip(),
             "customer": self.customer_edit.text().strip() or None,
             "out_type": self.out_type_combo.currentText(),
+            "strategy": self.strategy_combo.currentData(),
             "items": items,
         }
 
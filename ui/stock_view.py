@@ -1,4 +1,4 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -6,14 +6,15 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLineEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QCheckBox,
-    QHeaderView,
+    QMessageBox,
 )
 
 from services.stock_service import StockService
 from services.base import get_session
+from services.goods_catalog import GOODS_CATALOG
+from ui.lazy_table_model import LazyTableModel, configure_lazy_table
 
 
 class StockView(QWidget):
@@ -35,42 +36,67 @@ class StockView(QWidget):
         top.addStretch(1)
         layout.addLayout(top)
 
-        # 表格
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(
-            ["编码", "名称", "分类", "库存数量", "批次", "库位", "有效期"]
+        # 表格：滚动时按游标分块加载
+        self._keyword: str | None = None
+        self._only_warning = False
+        self.model = LazyTableModel(
+            ["编码", "名称", "分类", "库存数量", "批次", "库位", "有效期"],
+            self._fetch_page,
+            parent=self,
         )
-        header = self.table.horizontalHeader()
-        header.setStretchLastSection(True)
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.model.chunk_loaded.connect(self._on_chunk_loaded)
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
+        configure_lazy_table(self.table)
         layout.addWidget(self.table, 1)
 
         self.search_btn.clicked.connect(self.refresh_table)
+        # 输入关键字时稍作停顿再查询，连续输入只保留最后一次请求
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_timer.timeout.connect(self.refresh_table)
+        self.keyword_edit.textChanged.connect(lambda _text: self._search_timer.start())
+        self.model.load_failed.connect(self._on_load_failed)
         self.only_warning_chk.stateChanged.connect(self.refresh_table)
-        self.refresh_table()
 
     def refresh_table(self) -> None:
-        keyword = self.keyword_edit.text().strip() or None
-        only_warning = self.only_warning_chk.isChecked()
+        self._keyword = self.keyword_edit.text().strip() or None
+        self._only_warning = self.only_warning_chk.isChecked()
+        self.model.reset()
+
+    def _fetch_page(self, cursor: str | None, limit: int):
         with get_session() as session:
-            rows, _ = StockService.list_stock(
-                session, keyword=keyword, only_warning=only_warning, page=1, page_size=500
+            page = StockService.list_stock_page(
+                session,
+                keyword=self._keyword,
+                only_warning=self._only_warning,
+                cursor=cursor,
+                page_size=limit,
+                load_goods=False,
             )
-            self.table.setRowCount(len(rows))
-            for row, s in enumerate(rows):
-                goods = s.goods
-                values = [
-                    goods.code if goods else "",
-                    goods.name if goods else "",
-                    goods.category if goods else "",
-                    str(s.quantity),
-                    s.batch_no or "",
-                    s.location or "",
-                    "" if not s.expire_date else s.expire_date.strftime("%Y-%m-%d"),
-                ]
-                for col, v in enumerate(values):
-                    item = QTableWidgetItem(v)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    self.table.setItem(row, col, item)
+            catalog = GOODS_CATALOG.get_many(session, {s.goods_id for s in page.rows})
+            rows = []
+            for s in page.rows:
+                goods = catalog.get(s.goods_id)
+                rows.append(
+                    (
+                        s.id,
+                        goods.code if goods else "",
+                        goods.name if goods else "",
+                        goods.category if goods else "",
+                        str(s.quantity),
+                        s.batch_no or "",
+                        s.location or "",
+                        "" if not s.expire_date else s.expire_date.strftime("%Y-%m-%d"),
+                    )
+                )
+        return rows, page.next_cursor
+
+    def _on_load_failed(self, message: str) -> None:
+        QMessageBox.warning(self, "查询失败", message)
 
+    def _on_chunk_loaded(self, chunk_index: int) -> None:
+        # 只在第一块到达时按样本行计算一次列宽
+        if chunk_index == 0:
+            self.table.resizeColumnsToContents()
@@ -0,0 +1,137 @@
+from time import perf_counter
+
+# main.py 最先导入本模块：在导入其他依赖之前取值，作为进程启动时间点
+_PROCESS_START = perf_counter()
+
+import builtins  # noqa: E402
+import logging  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import List, Optional, Tuple  # noqa: E402
+
+from config.settings import DATA_DIR  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """记录启动各阶段距进程启动（首次导入本模块）的耗时。"""
+
+    def __init__(self, start: float | None = None) -> None:
+        self._start = perf_counter() if start is None else start
+        self.phases: List[Tuple[str, float]] = []
+
+    def elapsed(self) -> float:
+        return perf_counter() - self._start
+
+    def mark(self, phase: str) -> float:
+        elapsed = self.elapsed()
+        self.phases.append((phase, elapsed))
+        return elapsed
+
+    def report(self) -> str:
+        lines = [f"{'阶段':<24}{'累计(ms)':>12}{'本阶段(ms)':>12}"]
+        previous = 0.0
+        for phase, elapsed in self.phases:
+            lines.append(f"{phase:<24}{elapsed * 1000:>12.1f}{(elapsed - previous) * 1000:>12.1f}")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+STARTUP = StartupTimer(_PROCESS_START)
+
+
+class ImportProfiler:
+    """统计主线程中每个模块首次导入的耗时（含子模块的累计耗时与自身耗时）。
+
+    与 ``python -X importtime`` 类似，但在 PyInstaller 打包后的程序中同样可用。
+    只统计经由 import 语句的绝对导入，相对导入的耗时计入其父模块。
+    """
+
+    def __init__(self) -> None:
+        # (模块名, 自身耗时, 累计耗时, 嵌套深度)
+        self.records: List[Tuple[str, float, float, int]] = []
+        self._children: List[float] = []
+        self._original = None
+        self._hook = None
+        self._active = False
+        self._thread_id = threading.get_ident()
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            self._hook = self._import
+            builtins.__import__ = self._hook
+        self._active = True
+
+    def uninstall(self) -> None:
+        """停止统计。
+
+        期间有其他库（如 PySide6 的 __feature_import__）在本钩子之上又装了导入钩子时，
+        不能直接恢复原函数，否则会把对方的钩子一并摘掉；此时保留调用链，本钩子只做透传。
+        """
+        self._active = False
+        if self._original is not None and builtins.__import__ is self._hook:
+            builtins.__import__ = self._original
+            self._original = None
+            self._hook = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if (
+            not self._active
+            or level
+            or name in sys.modules
+            or threading.get_ident() != self._thread_id
+        ):
+            return self._original(name, globals, locals, fromlist, level)
+        depth = len(self._children)
+        self._children.append(0.0)
+        start = perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            total = perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += total
+            self.records.append((name, total - children, total, depth))
+
+    def report(self, limit: int = 40) -> str:
+        lines = [f"{'模块':<48}{'自身(ms)':>10}{'累计(ms)':>10}"]
+        top = sorted(self.records, key=lambda r: r[2], reverse=True)[:limit]
+        for name, own, total, depth in top:
+            lines.append(f"{'  ' * depth + name:<48}{own * 1000:>10.1f}{total * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+def write_startup_profile(
+    path: Path,
+    timer: StartupTimer,
+    profiler: Optional[ImportProfiler],
+) -> None:
+    """把阶段耗时与导入耗时写入文本文件。"""
+    sections = ["== 启动阶段 ==", timer.report()]
+    if profiler is not None:
+        sections += ["", "== 导入耗时（按累计耗时排序）==", profiler.report()]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(sections) + "\n", encoding="utf-8")
+    logger.info("启动耗时分析已写入 %s", path)
+
+
+IMPORT_PROFILER = ImportProfiler()
+
+PROFILE_FLAG = "--profile-startup"
+DEFAULT_PROFILE_PATH = DATA_DIR / "startup_profile.txt"
+
+
+def pop_profile_startup_arg(argv: List[str]) -> Optional[Path]:
+    """从命令行参数中取出 --profile-startup[=路径]，返回报告路径；未指定该参数时返回 None。"""
+    for index, arg in enumerate(argv):
+        if arg == PROFILE_FLAG:
+            del argv[index]
+            return DEFAULT_PROFILE_PATH
+        if arg.startswith(PROFILE_FLAG + "="):
+            del argv[index]
+            return Path(arg.split("=", 1)[1])
+    return None